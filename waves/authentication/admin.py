@@ -7,7 +7,7 @@ from waves.authentication.models import WavesApiUser
 
 class ApiKeyAdmin(admin.ModelAdmin):
     list_display = ('user', 'key', 'created')
-    fields = ('user', 'created', 'key', 'ip_list', 'domain')
+    fields = ('user', 'created', 'key', 'ip_list', 'domain', 'callback_url')
     ordering = ('-created',)
     readonly_fields = ('user', 'created', 'key')
 
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_auto_20180313_1344'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wavesapiuser',
+            name='callback_url',
+            field=models.URLField(blank=True, help_text='Status changes of submitted jobs are posted to this URL', max_length=255, null=True, verbose_name='Default callback URL'),
+        ),
+    ]
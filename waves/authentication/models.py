@@ -25,6 +25,8 @@ class WavesApiUser(models.Model):
     domain = models.CharField(_('Origin URL(s)'), null=True, blank=True, max_length=255,
                               help_text="Comma separated list")
     ip_list = models.CharField(_('Ip(s) List'), null=True, blank=True, max_length=255, help_text="Comma separated list")
+    callback_url = models.URLField(_('Default callback URL'), null=True, blank=True, max_length=255,
+                                   help_text="Status changes of submitted jobs are posted to this URL")
 
     class Meta:
         abstract = 'waves.authentication' not in settings.INSTALLED_APPS
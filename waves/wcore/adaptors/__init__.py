@@ -179,6 +179,17 @@ class JobAdaptor(object):
         self._job_results(job)
         return job
 
+    @check_ready
+    def job_live_output(self, job):
+        """ Synchronize outputs written by a running job (stdout, stderr, progress files) into local job working dir
+
+        :param job: current Job
+        :return: current Job
+        """
+        self.connect()
+        self._job_live_output(job)
+        return job
+
     def job_run_details(self, job):
         """ Retrive job run details for job
 
@@ -250,6 +261,13 @@ class JobAdaptor(object):
         """
         raise NotImplementedError()
 
+    def _job_live_output(self, job):
+        """ Fetch only newly written bytes for each job live output file, by default, jobs are expected to write
+        directly in local working dir so there is nothing to do.
+
+        :raise: `waves.wcore.adaptors.exception.AdaptorException` if error """
+        pass
+
     def _job_run_details(self, job):
         """ Retrieve job run details if possible from concrete adapter
 
@@ -85,4 +85,6 @@ class JobStatus(object):
 
 JobRunDetails = namedtuple("JobRunDetails",
                            ['id', 'slug', 'job_remote_id', 'name', 'exit_code', 'created', 'started',
-                            'finished', 'extra'])
+                            'finished', 'extra', 'wall_time', 'cpu_time', 'max_rss'])
+#: Resources usage (wall time, cpu time in seconds, max resident memory in kB) may not be known by adaptors
+JobRunDetails.__new__.__defaults__ = (None, None, None)
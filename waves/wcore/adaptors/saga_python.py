@@ -2,10 +2,12 @@ from __future__ import unicode_literals
 
 import radical.saga as saga
 import logging
+from os.path import join, isfile
 
 from waves.wcore.adaptors import JobAdaptor
 from waves.wcore.adaptors.const import JobStatus, JobRunDetails
 from waves.wcore.adaptors import exceptions
+from waves.wcore.settings import waves_settings
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,8 @@ class SagaAdaptor(JobAdaptor):
 
     """
     _session = None
+    #: File written in job working dir with resources usage, when JOB_TIME_COMMAND is set
+    usage_file = 'job.usage'
     _states_map = {
         saga.job.UNKNOWN: JobStatus.JOB_UNDEFINED,
         saga.job.NEW: JobStatus.JOB_QUEUED,
@@ -138,8 +142,35 @@ class SagaAdaptor(JobAdaptor):
                     arguments=job.command_line_arguments,
                     output=job.stdout,
                     error=job.stderr)
+        if waves_settings.JOB_TIME_COMMAND:
+            # Wrap command to get resources usage: wall time, user and system times, max resident memory
+            desc.update(executable=waves_settings.JOB_TIME_COMMAND,
+                        arguments="-f '%%e %%U %%S %%M' -o %s %s %s" % (self.usage_file, self.command,
+                                                                       job.command_line_arguments))
         return desc
 
+    def _read_usage_file(self, job):
+        """ Read resources usage file content for job, if any """
+        usage_file = join(job.working_dir, self.usage_file)
+        if isfile(usage_file):
+            with open(usage_file) as fp:
+                return fp.read()
+        return ''
+
+    def _job_usage(self, job, remote_job):
+        """ Retrieve job resources usage as a tuple (wall time, cpu time, max rss), None when not known """
+        lines = self._read_usage_file(job).strip().splitlines()
+        try:
+            # Last line only, time may report a non zero exit status before
+            wall, user, system, max_rss = lines[-1].split()
+            return float(wall), float(user) + float(system), int(max_rss)
+        except (IndexError, ValueError):
+            pass
+        try:
+            return float(remote_job.finished) - float(remote_job.started), None, None
+        except (TypeError, ValueError):
+            return None, None, None
+
     def _job_results(self, job):
         try:
             saga_job = self.connector.get_job(str(job.remote_job_id))
@@ -154,10 +185,14 @@ class SagaAdaptor(JobAdaptor):
         date_created = remote_job.created if remote_job.created else ""
         date_started = remote_job.started if remote_job.started else ""
         date_finished = remote_job.finished if remote_job.finished else ""
+        wall_time, cpu_time, max_rss = self._job_usage(job, remote_job)
         details = JobRunDetails(job.id, str(job.slug), remote_job.id, remote_job.name,
                                 remote_job.exit_code,
                                 date_created,
                                 date_started,
                                 date_finished,
-                                remote_job.execution_hosts)
+                                remote_job.execution_hosts,
+                                wall_time,
+                                cpu_time,
+                                max_rss)
         return details
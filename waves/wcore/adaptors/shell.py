@@ -1,12 +1,21 @@
 from __future__ import unicode_literals
 
+import base64
 import logging
+import os
+import tarfile
+from multiprocessing.pool import ThreadPool
 from os.path import join
 
 import radical.saga as saga
+import radical.saga.utils.pty_shell as pty_shell
+from django.utils.encoding import force_bytes
+from django.utils.six.moves import shlex_quote
 
 from waves.wcore.adaptors.exceptions import AdaptorJobException
 from waves.wcore.adaptors.saga_python import SagaAdaptor
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.storage import file_checksum
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +41,13 @@ class SshShellAdaptor(LocalShellAdaptor):
     name = 'Shell script over SSH (user/pass)'
 
     _session = None
+    _shell = None
 
     def _disconnect(self):
         super(SshShellAdaptor, self)._disconnect()
+        if self._shell is not None:
+            self._shell.finalize(kill_pty=True)
+            self._shell = None
         del self._session
 
     def __init__(self, command=None, protocol='ssh', host="localhost", port=22, password=None, user_id=None,
@@ -85,6 +98,30 @@ class SshShellAdaptor(LocalShellAdaptor):
         """ Construct remote ssh host remote dir (uploads) """
         return "sftp://%s%s" % (self.host, self.basedir)
 
+    @property
+    def remote_shell(self):
+        """ Remote shell on ssh host, used to run file related commands in remote job working dirs """
+        if self._shell is None:
+            self._shell = pty_shell.PTYShell(saga.Url('ssh://%s:%s/' % (self.host, self.port)), session=self.session)
+        return self._shell
+
+    def remote_job_dir(self, job):
+        """ Remote job working dir path, as expected by remote shell """
+        return '%s/%s' % (self.basedir.rstrip('/'), str(job.slug))
+
+    def _run_remote(self, command):
+        """ Run command on remote host shell, return its standard output
+
+        :raise: `waves.wcore.adaptors.exception.AdaptorJobException` if command fails
+        """
+        try:
+            ret, out, _ = self.remote_shell.run_sync(command, iomode=pty_shell.STDOUT)
+        except saga.SagaException as exc:
+            raise AdaptorJobException(exc.message)
+        if ret != 0:
+            raise AdaptorJobException("Remote command '%s' failed [%s]" % (command, ret))
+        return out
+
     @property
     def context(self):
         """ Configure SSH saga context properties """
@@ -101,40 +138,172 @@ class SshShellAdaptor(LocalShellAdaptor):
         return saga.filesystem.Directory(saga.Url('%s/%s' % (self.remote_dir, str(job.slug))), mode,
                                          session=self.session)
 
+    #: Name of archive containing job inputs, when staged on remote host
+    inputs_bundle = '.waves_inputs.tar'
+
     def _prepare_job(self, job):
         """
         Prepare job on remote host
           - Create remote working dir
-          - Upload job input files
+          - Upload job input files, packed in one archive (gzip compressed if INPUTS_STAGING_COMPRESS), files
+            already present remotely with the same checksum (ex: on re-run) are skipped. Files are uploaded one by
+            one if archive can not be unpacked on remote host.
         """
         job.logger.debug('Prepared job in ShellAdapter')
         try:
             work_dir = self.job_work_dir(job, saga.filesystem.CREATE_PARENTS)
-            for input_file in job.input_files:
-                wrapper = saga.filesystem.File(
-                    saga.Url('file://localhost/%s' % join(job.working_dir, input_file.value)))
-                wrapper.copy(work_dir.get_url())
-                job.logger.debug("Uploaded file %s to %s", join(job.working_dir, input_file.value), work_dir.get_url())
+            input_files = dict((input_file.value, file_checksum(join(job.working_dir, input_file.value)))
+                               for input_file in job.input_files)
+            remote_checksums = self._remote_checksums(job, input_files.keys())
+            staged = [file_name for file_name, checksum in input_files.items()
+                      if remote_checksums.get(file_name) != checksum]
+            if staged:
+                try:
+                    self._stage_bundle(job, work_dir, staged)
+                except AdaptorJobException as exc:
+                    job.logger.warning("Inputs bundle not staged (%s), uploading files one by one", exc)
+                    self._stage_files(job, work_dir, staged)
+            job.logger.debug("Uploaded %d input files to %s (%d unchanged)", len(staged), work_dir.get_url(),
+                             len(input_files) - len(staged))
             return job
         except saga.SagaException as exc:
             raise AdaptorJobException(exc.message)
 
+    def _remote_checksums(self, job, file_names):
+        """ Retrieve sha1 checksums of files already present in remote job working dir
+
+        :return: dictionary file name -> checksum
+        """
+        if not file_names:
+            return {}
+        output = self._run_remote('cd "%s" && sha1sum %s 2>/dev/null; true' % (
+            self.remote_job_dir(job), ' '.join(shlex_quote(f) for f in file_names)))
+        checksums = {}
+        for line in output.splitlines():
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                checksums[parts[1].lstrip('*')] = parts[0]
+        return checksums
+
+    def _stage_bundle(self, job, work_dir, file_names):
+        """ Pack files in one archive, upload it in one transfer and unpack it in remote job working dir """
+        compress = waves_settings.INPUTS_STAGING_COMPRESS
+        bundle_name = self.inputs_bundle + ('.gz' if compress else '')
+        local_bundle = join(job.working_dir, bundle_name)
+        with tarfile.open(local_bundle, 'w:gz' if compress else 'w') as archive:
+            for file_name in file_names:
+                archive.add(join(job.working_dir, file_name), arcname=file_name)
+        try:
+            wrapper = saga.filesystem.File(saga.Url('file://localhost/%s' % local_bundle))
+            wrapper.copy(work_dir.get_url())
+            wrapper.close()
+        finally:
+            os.remove(local_bundle)
+        # bundle is removed even if it can not be unpacked
+        self._run_remote('cd "%s" && { tar x%sf %s; ret=$?; rm -f %s; [ $ret -eq 0 ]; }' % (
+            self.remote_job_dir(job), 'z' if compress else '', bundle_name, bundle_name))
+
+    def _stage_files(self, job, work_dir, file_names):
+        """ Upload each file to remote job working dir """
+        for file_name in file_names:
+            wrapper = saga.filesystem.File(saga.Url('file://localhost/%s' % join(job.working_dir, file_name)))
+            wrapper.copy(work_dir.get_url())
+            wrapper.close()
+            job.logger.debug("Uploaded file %s to %s", file_name, work_dir.get_url())
+
+    #: Name of remote archive containing job results, when retrieved as a bundle
+    results_bundle = '.waves_results.tar.gz'
+
     def _job_results(self, job):
         """
-        Download all files located in remote job working dir
+        Download job results files located in remote job working dir, only declared outputs and submission
+        included files are retrieved, either as one remote compressed bundle or with concurrent transfers
+        (see RESULTS_BUNDLE and RESULTS_TRANSFER_THREADS settings)
 
         :param job: the Job to retrieve file for
         :return: None
         """
         try:
             work_dir = self.job_work_dir(job)
-            for remote_file in work_dir.list('*'):
-                work_dir.copy(remote_file, 'file://localhost/%s/' % job.working_dir)
-                job.logger.debug("Retrieved file from %s to %s", remote_file, job.working_dir)
+            remote_files = job.filter_results_files([remote_file.path.split('/')[-1]
+                                                     for remote_file in work_dir.list('*')])
+            if remote_files:
+                if waves_settings.RESULTS_BUNDLE:
+                    self._retrieve_bundle(job, remote_files)
+                else:
+                    self._retrieve_files(job, remote_files)
             return super(SshShellAdaptor, self)._job_results(job)
         except saga.SagaException as exc:
             raise AdaptorJobException(exc.message)
 
+    def _retrieve_files(self, job, remote_files):
+        """ Download each result file, using up to RESULTS_TRANSFER_THREADS concurrent transfers """
+        remote_url = self.job_work_dir(job).get_url()
+
+        def retrieve(file_name):
+            remote_file = saga.filesystem.File(saga.Url('%s/%s' % (remote_url, file_name)), session=self.session)
+            remote_file.copy('file://localhost/%s/' % job.working_dir)
+            remote_file.close()
+            job.logger.debug("Retrieved file from %s to %s", file_name, job.working_dir)
+
+        pool = ThreadPool(max(1, min(waves_settings.RESULTS_TRANSFER_THREADS, len(remote_files))))
+        try:
+            pool.map(retrieve, remote_files)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _retrieve_bundle(self, job, remote_files):
+        """ Pack result files in a compressed archive on remote host, download and unpack it in job working dir """
+        remote_dir = self.remote_job_dir(job)
+        self._run_remote('cd "%s" && tar czf %s %s' % (remote_dir, self.results_bundle,
+                                                        ' '.join(shlex_quote(f) for f in remote_files)))
+        local_bundle = join(job.working_dir, self.results_bundle)
+        bundle = saga.filesystem.File(saga.Url('%s/%s' % (self.job_work_dir(job).get_url(), self.results_bundle)),
+                                      session=self.session)
+        bundle.copy('file://localhost/%s' % local_bundle)
+        bundle.close()
+        try:
+            with tarfile.open(local_bundle, 'r:gz') as archive:
+                archive.extractall(job.working_dir,
+                                   members=[member for member in archive.getmembers() if member.name in remote_files])
+            job.logger.debug("Retrieved %d files in bundle to %s", len(remote_files), job.working_dir)
+        except (tarfile.TarError, IOError) as exc:
+            raise AdaptorJobException('Unable to unpack results bundle: %s' % exc)
+        finally:
+            os.remove(local_bundle)
+            self._run_remote('rm -f "%s/%s"' % (remote_dir, self.results_bundle))
+
+    def _read_usage_file(self, job):
+        """ Read resources usage file content in remote job working dir """
+        return self._run_remote('cat "%s/%s" 2>/dev/null; true' % (self.remote_job_dir(job), self.usage_file))
+
+    def _job_live_output(self, job):
+        """
+        Append newly written bytes of remote live output files to their local copy. Local file size is used as
+        offset, so only bytes written since last synchronization are transferred. Bytes are sent base64 encoded, so
+        that remote shell text channel (newlines translation, decoding) leaves them unchanged: appended bytes are
+        exactly the remote ones and local size stays a valid remote offset.
+
+        :param job: the running Job
+        :return: None
+        """
+        remote_dir = self.remote_job_dir(job)
+        for file_name in job.live_output_files:
+            local_path = join(job.working_dir, file_name)
+            offset = os.path.getsize(local_path) if os.path.isfile(local_path) else 0
+            encoded = self._run_remote('[ ! -f "%s/%s" ] || tail -c +%d "%s/%s" | base64' % (
+                remote_dir, file_name, offset + 1, remote_dir, file_name))
+            try:
+                # line breaks (whatever their translation) are ignored while decoding
+                new_content = base64.b64decode(force_bytes(encoded))
+            except (TypeError, ValueError) as exc:
+                raise AdaptorJobException('Unable to decode live output %s: %s' % (file_name, exc))
+            if new_content:
+                with open(local_path, 'ab') as local_file:
+                    local_file.write(new_content)
+                job.logger.debug("Synchronized %s from offset %d (%d bytes)", file_name, offset, len(new_content))
+
 
 class SshKeyShellAdaptor(SshShellAdaptor):
     """
@@ -2,16 +2,23 @@ from __future__ import unicode_literals
 
 import logging
 import os
+import shutil
+import subprocess
+import tempfile
 import unittest
+from os.path import join
 
+import radical.saga as saga
 from django.conf import settings
 
 from waves.wcore.adaptors.cluster import SshClusterAdaptor
 from waves.wcore.adaptors.const import JobStatus
-from waves.wcore.adaptors.exceptions import AdaptorException
+from waves.wcore.adaptors.exceptions import AdaptorException, AdaptorJobException
 from waves.wcore.adaptors.mocks import MockJobRunnerAdaptor
 from waves.wcore.adaptors.shell import LocalShellAdaptor, SshShellAdaptor, SshKeyShellAdaptor
 from waves.wcore.exceptions.jobs import JobInconsistentStateError
+from waves.wcore.models import JobInput
+from waves.wcore.models.const import ParamType
 from waves.wcore.settings import waves_settings
 from waves.wcore.tests.base import BaseTestCase, TestJobWorkflowMixin
 from waves.wcore.utils.encrypt import Encrypt
@@ -29,6 +36,31 @@ def skip_unless_sge():
     return lambda f: f
 
 
+class LocalStagingShellAdaptor(SshShellAdaptor):
+    """ SSH shell adaptor whose remote host is the local one: remote commands run in a local shell, whose output
+    newlines are translated as remote PTY does """
+
+    def __init__(self, **kwargs):
+        super(LocalStagingShellAdaptor, self).__init__(command='cp', **kwargs)
+        self.staged = []
+        self.fail_unpack = False
+
+    def job_work_dir(self, job, mode=saga.filesystem.READ):
+        return saga.filesystem.Directory(saga.Url('file://localhost%s' % self.remote_job_dir(job)), mode)
+
+    def _run_remote(self, command):
+        if self.fail_unpack:
+            command = 'tar() { return 2; }; ' + command
+        try:
+            return subprocess.check_output(command, shell=True).decode('utf-8').replace('\n', '\r\n')
+        except subprocess.CalledProcessError as exc:
+            raise AdaptorJobException("Remote command '%s' failed [%s]" % (command, exc.returncode))
+
+    def _stage_bundle(self, job, work_dir, file_names):
+        self.staged.append(sorted(file_names))
+        return super(LocalStagingShellAdaptor, self)._stage_bundle(job, work_dir, file_names)
+
+
 class AdaptorTestCase(BaseTestCase, TestJobWorkflowMixin):
     loader = AdaptorLoader
     adaptors = {"local": LocalShellAdaptor(command='cp')}
@@ -161,4 +193,62 @@ class AdaptorTestCase(BaseTestCase, TestJobWorkflowMixin):
         self.assertTrue(self.current_job.status == JobStatus.JOB_CANCELLED)
         self.current_job.delete()
 
-
+    def test_inputs_staging(self):
+        job = self.create_random_job()
+        for name in ('input1.txt', 'input2.txt'):
+            JobInput.objects.create(name=name, value=name, param_type=ParamType.TYPE_FILE, job=job)
+            with open(join(job.working_dir, name), 'w') as input_file:
+                input_file.write('Content of %s' % name)
+        adaptor = LocalStagingShellAdaptor(basedir=tempfile.mkdtemp())
+        remote_dir = adaptor.remote_job_dir(job)
+
+        def remote_files():
+            return dict((name, open(join(remote_dir, name)).read()) for name in os.listdir(remote_dir))
+
+        try:
+            # all inputs sent in one bundle, unpacked and removed remotely
+            adaptor._prepare_job(job)
+            self.assertEqual(adaptor.staged, [['input1.txt', 'input2.txt']])
+            self.assertEqual(remote_files(), {'input1.txt': 'Content of input1.txt',
+                                              'input2.txt': 'Content of input2.txt'})
+            self.assertFalse(any(name.startswith(adaptor.inputs_bundle) for name in os.listdir(job.working_dir)))
+            # unchanged inputs are skipped
+            adaptor._prepare_job(job)
+            self.assertEqual(len(adaptor.staged), 1)
+            with open(join(job.working_dir, 'input2.txt'), 'w') as input_file:
+                input_file.write('Updated')
+            adaptor._prepare_job(job)
+            self.assertEqual(adaptor.staged[-1], ['input2.txt'])
+            self.assertEqual(remote_files()['input2.txt'], 'Updated')
+            # files are uploaded one by one when bundle can not be unpacked
+            with open(join(job.working_dir, 'input1.txt'), 'w') as input_file:
+                input_file.write('Updated again')
+            adaptor.fail_unpack = True
+            adaptor._prepare_job(job)
+            self.assertEqual(adaptor.staged[-1], ['input1.txt'])
+            self.assertEqual(remote_files(), {'input1.txt': 'Updated again', 'input2.txt': 'Updated'})
+        finally:
+            shutil.rmtree(adaptor.basedir)
+            job.delete()
+
+    def test_live_output(self):
+        job = self.create_random_job()
+        adaptor = LocalStagingShellAdaptor(basedir=tempfile.mkdtemp())
+        remote_dir = adaptor.remote_job_dir(job)
+        os.makedirs(remote_dir)
+        local_path = join(job.working_dir, job.stdout)
+        if os.path.isfile(local_path):
+            os.remove(local_path)
+        # synchronized bytes are the remote ones, whatever newlines and multi bytes chars split between reads
+        written = b''
+        try:
+            for chunk in (b'line 1\nline 2\n\xc3', b'\xa9 end\r\n', b'', b'\x00\xff'):
+                with open(join(remote_dir, job.stdout), 'ab') as remote_file:
+                    remote_file.write(chunk)
+                written += chunk
+                adaptor._job_live_output(job)
+                with open(local_path, 'rb') as local_file:
+                    self.assertEqual(local_file.read(), written)
+        finally:
+            shutil.rmtree(adaptor.basedir)
+            job.delete()
@@ -11,6 +11,7 @@ from waves.wcore.admin.forms.jobs import JobInputForm, JobOutputForm, JobForm
 from waves.wcore.admin.views import JobCancelView, JobRerunView
 from waves.wcore.models.history import JobHistory
 from waves.wcore.models.jobs import JobInput, Job, JobOutput
+from waves.wcore.models.webhooks import JobWebhook
 from waves.wcore.utils import url_to_edit_object
 
 __all__ = ['JobAdmin']
@@ -70,6 +71,22 @@ class JobHistoryInline(TabularInline):
         return obj.message.encode('utf-8')
 
 
+class JobWebhookInline(TabularInline):
+    """ Job's status notifications to callback url """
+    model = JobWebhook
+    verbose_name = 'Webhook delivery'
+    verbose_name_plural = "Webhook deliveries"
+    classes = ['collapse', ]
+    readonly_fields = ('status', 'url', 'created', 'attempts', 'delivered', 'next_attempt', 'response_code', 'error')
+    fields = ('status', 'url', 'created', 'attempts', 'delivered', 'next_attempt', 'response_code', 'error')
+    can_delete = False
+    extra = 0
+
+    def has_add_permission(self, request):
+        """ Deliveries are only created upon job status change """
+        return False
+
+
 def mark_rerun(modeladmin, request, queryset):
     """ Mark job as to be run another time """
     for job in queryset.all():
@@ -95,7 +112,15 @@ def delete_model(modeladmin, request, queryset):
             messages.warning(request, message="You are not authorized to delete this job %s" % obj)
 
 
+def refresh_files(modeladmin, request, queryset):
+    """ Scan jobs working dirs to update recorded inputs / outputs files size """
+    for job in queryset.all():
+        job.refresh_files_size()
+    messages.success(request, message="Files refreshed for %d jobs" % queryset.count())
+
+
 mark_rerun.short_description = "Re-run jobs"
+refresh_files.short_description = "Refresh jobs files"
 delete_model.short_description = "Delete selected jobs"
 
 
@@ -105,21 +130,24 @@ class JobAdmin(WavesModelAdmin):
         JobHistoryInline,
         JobInputInline,
         JobOutputInline,
+        JobWebhookInline,
     ]
-    actions = [mark_rerun, delete_model]
+    actions = [mark_rerun, refresh_files, delete_model]
     list_filter = ('_status', 'client')
     list_display = ('get_slug', 'title', 'get_colored_status', 'submission_service_name', 'get_run_on', 'get_client',
                     'created', 'updated')
     list_per_page = 30
     search_fields = ('client__email', 'get_run_on')
-    readonly_fields = ('title', 'slug', 'submission_service_name', 'email_to', '_status', 'created', 'updated',
+    readonly_fields = ('title', 'slug', 'submission_service_name', 'email_to', 'callback_url', '_status', 'created', 'updated',
                        'get_run_on', 'command_line_arguments', 'remote_job_id', 'submission_name', 'nb_retry',
-                       'connexion_string', 'get_command_line', 'working_dir', 'exit_code', 'get_run_details')
+                       'connexion_string', 'get_command_line', 'working_dir', 'exit_code', 'get_run_details',
+                       'wall_time', 'cpu_time', 'max_rss', 'disk_usage', 'last_access')
 
     fieldsets = [
         ('Main', {'classes': ('', 'suit-tab', 'suit-tab-general',),
-                  'fields': ['title', 'slug', 'email_to', '_status', 'created', 'updated',
-                             'client', 'exit_code', 'get_run_details']
+                  'fields': ['title', 'slug', 'email_to', 'callback_url', '_status', 'created', 'updated',
+                             'client', 'exit_code', 'wall_time', 'cpu_time', 'max_rss', 'disk_usage', 'last_access',
+                             'get_run_details']
                   }
          ),
         ('Submission', {
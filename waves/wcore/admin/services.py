@@ -57,7 +57,7 @@ class ServiceAdmin(ExportInMassMixin, DuplicateInMassMixin, MarkPublicInMassMixi
     filter_horizontal = ['restricted_client']
     readonly_fields = ['remote_service_id', 'created', 'updated', 'submission_link', 'display_run_params', 'api_url']
     list_display = ('id', 'get_api_name', 'name', 'status', 'get_runner', 'version', 'created_by', 'updated',
-                    'submission_link')
+                    'get_pending_jobs', 'submission_link')
     list_filter = ('status', 'name', 'created_by', 'runner')
     list_editable = ('status', 'name')
     list_display_links = ('get_api_name', 'id')
@@ -90,6 +90,9 @@ class ServiceAdmin(ExportInMassMixin, DuplicateInMassMixin, MarkPublicInMassMixi
     def get_runner(self, obj):
         return obj.runner
 
+    def get_pending_jobs(self, obj):
+        return obj.pending_jobs_count
+
     def api_url(self, obj):
         from rest_framework.reverse import reverse
         return reverse(viewname='wapi:v2:waves-services-detail',
@@ -97,6 +100,7 @@ class ServiceAdmin(ExportInMassMixin, DuplicateInMassMixin, MarkPublicInMassMixi
 
     api_url.short_description = "Api url"
     get_runner.short_description = "Default execution config."
+    get_pending_jobs.short_description = "Pending jobs"
 
     def get_urls(self):
         urls = super(ServiceAdmin, self).get_urls()
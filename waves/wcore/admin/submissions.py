@@ -158,7 +158,7 @@ class ServiceSubmissionAdmin(WavesModelAdmin, DynamicInlinesAdmin):
     current_obj = None
     form = ServiceSubmissionForm
     exclude = ['order']
-    list_display = ['name', 'api_name', 'get_service', 'availability', 'get_runner', 'updated']
+    list_display = ['name', 'api_name', 'get_service', 'availability', 'get_runner', 'get_pending_jobs', 'updated']
     readonly_fields = ['get_command_line_pattern', 'get_run_params', 'api_url']
     list_filter = ('service__name', 'availability', 'runner')
     list_editable = ('availability',)
@@ -175,6 +175,10 @@ class ServiceSubmissionAdmin(WavesModelAdmin, DynamicInlinesAdmin):
             'fields': ['runner', 'get_run_params', 'get_command_line_pattern', 'binary_file'],
             'classes': ['collapse']
         }),
+        ('Results', {
+            'fields': ['results_include', 'results_exclude'],
+            'classes': ['collapse']
+        }),
     ]
     show_full_result_count = True
     change_form_template = "waves/admin/submission/change_form.html"
@@ -260,6 +264,9 @@ class ServiceSubmissionAdmin(WavesModelAdmin, DynamicInlinesAdmin):
     def get_runner(self, obj):
         return obj.get_runner().name if obj.get_runner() else 'N/A'
 
+    def get_pending_jobs(self, obj):
+        return obj.pending_jobs_count
+
     def _redirect_save_back(self, request, obj):
         self.message_user(request,
                           format_html('Submission "<a href="{}">{}</a>" successfully saved', urlquote(request.path),
@@ -274,6 +281,7 @@ class ServiceSubmissionAdmin(WavesModelAdmin, DynamicInlinesAdmin):
     get_run_params.short_description = "Runner initial params"
     get_service.short_description = "Service"
     get_runner.short_description = "Computing infrastructure"
+    get_pending_jobs.short_description = "Pending jobs"
     get_name.short_description = "Name"
     get_command_line_pattern.short_description = "Command line pattern"
 
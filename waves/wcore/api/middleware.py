@@ -0,0 +1,75 @@
+""" WAVES API responses compression, negotiated with Accept-Encoding: brotli (requires brotli package) or gzip """
+from __future__ import unicode_literals
+
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+from waves.wcore.settings import waves_settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#: Compressed response content types
+COMPRESSED_TYPES = ('application/json', 'application/vnd.waves.compact+json', 'application/msgpack')
+#: Brotli quality, low enough to compress on each response
+BROTLI_QUALITY = 5
+ENCODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+def accepted_encoding(header):
+    """ Preferred available encoding ('br' or 'gzip') accepted in Accept-Encoding header, None if none
+
+    Quality values are respected, brotli is preferred over gzip for equal qualities
+    """
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    qualities = {}
+    for part in (header or '').split(','):
+        match = ENCODING_RE.match(part)
+        if match is None:
+            continue
+        try:
+            qualities[match.group(1).lower()] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+    best, best_quality = None, 0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class ApiCompressionMiddleware(MiddlewareMixin):
+    """ Compress API responses (JSON, compact JSON and MessagePack) larger than API_COMPRESSION_MIN_SIZE, other
+    responses (pages, files, archives) are left untouched """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').split(';')[0].strip() not in COMPRESSED_TYPES:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < waves_settings.API_COMPRESSION_MIN_SIZE:
+            return response
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        else:
+            compressed = compress_string(response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # compressed representation is not byte for byte the same one
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -1,7 +1,63 @@
 from __future__ import unicode_literals
 
+import calendar
+import hashlib
+
+from django.core.urlresolvers import reverse as django_reverse
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.reverse import reverse as drf_reverse
+from rest_framework.utils.encoders import JSONEncoder
+
 from waves.wcore.models.inputs import AParam
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.access import VERSION_KEY as ACCESS_VERSION_KEY
+from waves.wcore.utils.cache import cache_version
+from waves.wcore.utils.schema import VERSION_KEY as SCHEMA_VERSION_KEY
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def relative_urls(request):
+    """ Whether links are rendered relative to host for request accepted media type (compact representations) """
+    return getattr(getattr(request, 'accepted_renderer', None), 'relative_urls', False)
+
+
+def reverse(viewname, args=None, kwargs=None, request=None, format=None, **extra):
+    """
+    Same as DRF reverse, memoized per request: each url is built once per request, host part only once. Urls are
+    relative to host for compact representations (see :class:`CompactJSONRenderer`).
+    """
+    if request is None or extra or getattr(request, 'versioning_scheme', None) is not None:
+        return drf_reverse(viewname, args, kwargs, request, format, **extra)
+    try:
+        urls = request._waves_urls
+    except AttributeError:
+        urls = request._waves_urls = {None: '' if relative_urls(request) else request.build_absolute_uri('/')[:-1]}
+    key = (viewname, tuple(args or ()), tuple(sorted((kwargs or {}).items())), format)
+    url = urls.get(key)
+    if url is None:
+        if format:
+            kwargs = dict(kwargs or {}, format=format)
+        url = urls[key] = urls[None] + django_reverse(viewname, args=args, kwargs=kwargs)
+    return url
+
+
+class HyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """ Hyperlink to object itself, built with memoized :func:`reverse` """
+
+    def __init__(self, view_name=None, **kwargs):
+        super(HyperlinkedIdentityField, self).__init__(view_name, **kwargs)
+        self.reverse = reverse
 
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
@@ -11,6 +67,8 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
     Optionally `hidden` parameter allows to hide some of the fields defined in Serializer
 
     """
+    serializer_url_field = HyperlinkedIdentityField
+
     def __init__(self, *args, **kwargs):
         # Don't pass the 'fields' arg up to the superclass
         fields = kwargs.pop('fields', [])
@@ -36,3 +94,126 @@ class RecursiveField(serializers.ModelSerializer):
     def to_representation(self, value):
         serializer = self.parent.parent.__class__(value, context=self.context)
         return serializer.data
+
+
+class JobCursorPagination(CursorPagination):
+    """
+    Cursor pagination for jobs listings, newest first: page cost does not depend on jobs history size, and pages
+    remain consistent while new jobs are created.
+    Page size is set with 'page_size' query parameter (default API_JOBS_PAGE_SIZE, up to API_JOBS_MAX_PAGE_SIZE)
+    """
+    ordering = ('-created', '-id')
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = waves_settings.API_JOBS_PAGE_SIZE
+        self.max_page_size = waves_settings.API_JOBS_MAX_PAGE_SIZE
+
+
+def requested_fields(request, allowed):
+    """
+    Fields selected with 'fields' query parameter (comma separated list), to be passed to a
+    DynamicFieldsModelSerializer
+
+    :param request: current request
+    :param allowed: serializer available fields
+    :return: list of fields names, empty if no selection
+    :raise: ValidationError if an unknown field is requested
+    """
+    fields = [field.strip() for field in request.query_params.get('fields', '').split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValidationError({'fields': 'Unknown field(s) %s, available: %s' % (', '.join(unknown),
+                                                                                 ', '.join(allowed))})
+    return fields
+
+
+class EventStreamRenderer(BaseRenderer):
+    """ Server-sent events media type, views stream their own response content when selected """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class UploadChunkParser(BaseParser):
+    """ Resumable upload chunks media type, views read data from request stream themselves (body is not parsed,
+    nor loaded in memory) """
+    media_type = 'application/offset+octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {}
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """ Compact JSON, selected with its own media type: links are relative to host """
+    media_type = 'application/vnd.waves.compact+json'
+    format = 'compact'
+    relative_urls = True
+
+
+class MessagePackRenderer(BaseRenderer):
+    """ MessagePack binary representation (requires msgpack package), links are relative to host """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    relative_urls = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
+
+
+def conditional_response(request, build_response, last_modified, *version_parts):
+    """
+    Answer conditional GET / HEAD requests before any serialization: a weak ETag is derived from request (path, query
+    string, host, accepted media type) and version_parts (i.e. objects update timestamps, cache versions), matching
+    If-None-Match (or If-Modified-Since) gets a 304, otherwise build_response is called. Responses must be
+    revalidated on each use, and vary with user credentials.
+
+    :param request: current api request
+    :param build_response: callable returning response, called only when client copy is outdated
+    :param last_modified: latest update datetime of returned data
+    :param version_parts: values changing whenever returned data changes
+    :return: Response
+    """
+    etag = 'W/"%s"' % hashlib.md5(repr((request.get_full_path(), request.get_host(), request.is_secure(),
+                                        getattr(request, 'accepted_media_type', None),
+                                        version_parts)).encode('utf-8')).hexdigest()
+    last_modified = calendar.timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+    return response
+
+
+def services_versions(queryset):
+    """ Services list validators: (latest update, version parts), changes with any service, submission, input or
+    access rule change """
+    stats = queryset.order_by().aggregate(updated=Max('updated'), count=Count('id'))
+    return stats['updated'], (stats['updated'], stats['count'], cache_version(SCHEMA_VERSION_KEY),
+                              cache_version(ACCESS_VERSION_KEY))
+
+
+def service_versions(service):
+    """ Service validators: (latest update, version parts), changes with service, its submissions and inputs, or any
+    access rule change """
+    return service.updated, (service.pk, service.updated, cache_version(SCHEMA_VERSION_KEY),
+                             cache_version(ACCESS_VERSION_KEY))
+
+
+def job_versions(job):
+    """ Job validators: (latest update, version parts), changes with job update or any new history entry """
+    history = job.job_history.order_by().aggregate(last_id=Max('id'), last=Max('timestamp'))
+    updated = max(job.updated, history['last']) if history['last'] else job.updated
+    return updated, (job.pk, job.updated, history['last_id'])
@@ -1,21 +1,42 @@
 from __future__ import unicode_literals
 
+import datetime
+import hashlib
+import io
+import json
 import logging
 import decimal
 
 import random
+import re
 from os.path import join
 import string
+import uuid
+import zipfile
+import zlib
+from collections import OrderedDict
 
 from django.core.urlresolvers import reverse
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APIRequestFactory, APIClient
 
 from waves.wcore.adaptors.const import JobStatus
+from waves.wcore.api.middleware import accepted_encoding
+from waves.wcore.api.share import msgpack
+from waves.wcore.api.v2.serializers import JobSerializer
+from waves.wcore.api.v2.views.jobs import iso_timestamp
 from waves.wcore.models import Job, get_service_model, Runner
+from waves.wcore.models.history import JobHistory
+from waves.wcore.models.uploads import Upload
 from waves.wcore.models.const import ParamType
+from waves.wcore.settings import waves_settings
 from waves.wcore.tests.base import BaseTestCase
 
 Service = get_service_model()
@@ -286,3 +307,429 @@ class WavesAPIV2TestCase(BaseAPITestCase):
         response = self.client.get(
             reverse("wapi:v2:waves-jobs-list") + "?api_key=" + self.users['api_user'].waves_user.key)
         self.assertEqual(response.status_code, 200)
+
+    def test_jobs_list_pagination(self):
+        user = self.users['api_user']
+        service = self.create_random_service()
+        service.status = Service.SRV_PUBLIC
+        service.save()
+        jobs = [self.create_random_job(service=service, user=user) for _ in range(5)]
+        self.login('api_user')
+        url = reverse('wapi:v2:waves-jobs-list')
+        listed = []
+        response = self.client.get(url, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            listed.extend(job['slug'] for job in response.data['results'])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(listed, [str(job.slug) for job in sorted(jobs, key=lambda j: (j.created, j.id),
+                                                                  reverse=True)])
+        response = self.client.get(url, {'fields': 'slug,status'})
+        self.assertEqual(set(response.data['results'][0].keys()), {'slug', 'status'})
+        self.assertEqual(self.client.get(url, {'fields': 'slug,unknown'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        # page cost does not depend on page size
+        def page_queries(page_size, fields):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url, {'page_size': page_size, 'fields': fields}).status_code,
+                                 status.HTTP_200_OK)
+            return len(queries)
+
+        for fields in ('', 'slug,service,submission,last_message,inputs,outputs,history'):
+            self.assertEqual(page_queries(1, fields), page_queries(5, fields))
+        service_url = reverse('wapi:v2:waves-services-jobs', kwargs={'service_app_name': service.api_name})
+        self.assertEqual(len(self.client.get(service_url, {'page_size': 3}).data['results']), 3)
+
+    def test_jobs_bulk_status(self):
+        service = self.create_random_service()
+        jobs = [self.create_random_job(service=service, user=self.users['api_user']) for _ in range(3)]
+        other = self.create_random_job(service=service)
+        slugs = [str(job.slug) for job in jobs + [other]]
+        url = reverse('wapi:v2:waves-jobs-bulk-status')
+        self.assertEqual(self.client.get(url, {'slugs': ','.join(slugs)}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.login('api_user')
+        response = self.client.get(url, {'slugs': ','.join(slugs)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(job[0] for job in response.data['jobs']), sorted(slugs[:3]))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, {'slugs': ','.join(slugs)}, HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.post(url, {'slugs': slugs}, format='json', HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        jobs[0].status = JobStatus.JOB_CANCELLED
+        jobs[0].save()
+        response = self.client.get(url, {'slugs': ','.join(slugs)}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['jobs'][-1][:2], [slugs[0], JobStatus.JOB_CANCELLED])
+        # nothing updated since last call
+        response = self.client.get(url, {'since': response.data['since']})
+        self.assertEqual(response.data['jobs'], [])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'slugs': 'not-a-job'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, status.HTTP_400_BAD_REQUEST)
+        # paging through jobs updated at the same time, none is skipped
+        updated = timezone.now() - datetime.timedelta(minutes=5)
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(updated=updated)
+        since = iso_timestamp(updated - datetime.timedelta(seconds=1))
+        status_max = waves_settings.API_JOBS_STATUS_MAX
+        waves_settings.API_JOBS_STATUS_MAX = 2
+        try:
+            response = self.client.get(url, {'since': since})
+            self.assertTrue(response.data['more'])
+            listed = [job[0] for job in response.data['jobs']]
+            response = self.client.get(url, {'cursor': response.data['cursor']})
+            self.assertFalse(response.data['more'])
+            listed += [job[0] for job in response.data['jobs']]
+        finally:
+            waves_settings.API_JOBS_STATUS_MAX = status_max
+        self.assertEqual(listed, sorted(slugs[:3], key=lambda slug: Job.objects.get(slug=slug).pk))
+        # jobs just updated are listed by next calls only
+        jobs[1].status = JobStatus.JOB_CANCELLED
+        jobs[1].save()
+        self.assertEqual(self.client.get(url, {'cursor': response.data['cursor']}).data['jobs'], [])
+        Job.objects.filter(pk=jobs[1].pk).update(
+            updated=timezone.now() - datetime.timedelta(seconds=waves_settings.API_JOBS_STATUS_DELAY))
+        self.assertEqual([job[0] for job in self.client.get(url, {'cursor': response.data['cursor']}).data['jobs']],
+                         [slugs[1]])
+
+    def test_jobs_events(self):
+        service = self.create_random_service()
+        job = self.create_random_job(service=service, user=self.users['api_user'])
+        other = self.create_random_job(service=service)
+        url = reverse('wapi:v2:waves-jobs-events')
+
+        def settle():
+            JobHistory.objects.filter(job__in=(job, other)).update(
+                timestamp=F('timestamp') - datetime.timedelta(seconds=waves_settings.API_JOBS_STATUS_DELAY))
+
+        settle()
+        self.login('api_user')
+        response = self.client.get(url, {'wait': 0})
+        self.assertEqual(response.data['events'], [])
+        last_id = response.data['last_id']
+        for status_job in (job, other):
+            status_job.status = JobStatus.JOB_QUEUED
+            status_job.save()
+        # events sent once settled
+        self.assertEqual(self.client.get(url, {'last_id': last_id, 'wait': 0}).data['events'], [])
+        settle()
+        response = self.client.get(url, {'last_id': last_id, 'wait': 1})
+        self.assertEqual([(event['slug'], event['status']) for event in response.data['events']],
+                         [(str(job.slug), JobStatus.JOB_QUEUED)])
+        self.assertEqual(response.data['last_id'], response.data['events'][0]['id'])
+        response = self.client.get(url, {'wait': 1}, HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID=last_id)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('id: %s\nevent: status\n' % job.job_history.filter(status=JobStatus.JOB_QUEUED).get().pk,
+                      content)
+        self.assertNotIn(str(other.slug), content)
+
+    def test_jobs_batch(self):
+        service = self.create_random_service()
+        service.status = Service.SRV_PUBLIC
+        service.save()
+        url = reverse('wapi:v2:waves-services-submission-batch',
+                      kwargs={'service_app_name': service.api_name,
+                              'submission_app_name': service.default_submission.api_name})
+        self.login('api_user')
+        shared = SimpleUploadedFile('shared.txt', b'shared content')
+        response = self.client.post(url, {'jobs': json.dumps([{'param1': 'Value%s' % i, 'param2': i % 2 == 0}
+                                                      for i in range(3)]),
+                                          'param3': shared}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['jobs']), 3)
+        jobs = list(Job.objects.filter(slug__in=response.data['jobs']))
+        self.assertEqual(len(jobs), 3)
+        for job in jobs:
+            with open(join(job.working_dir, 'shared.txt'), 'rb') as job_file:
+                self.assertEqual(job_file.read(), b'shared content')
+            self.assertEqual(job.status, JobStatus.JOB_CREATED)
+        # failing set: no job created
+        count = Job.objects.count()
+        response = self.client.post(url, {'jobs': [{'param2': True, 'param3': 'file.txt'},
+                                              {'param2': True}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Job.objects.count(), count)
+        self.assertEqual(self.client.post(url, {'jobs': []}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        for job in jobs:
+            job.delete()
+
+    def test_jobs_archive(self):
+        jobs = [self.create_random_job(user=self.users['api_user']) for _ in range(2)]
+        for job in jobs:
+            for name in ('out1', 'out2'):
+                with open(join(job.working_dir, name), 'w') as fp:
+                    fp.write('%s %s' % (job.slug, name))
+        self.login('api_user')
+        url = reverse('wapi:v2:waves-jobs-bulk-archive')
+        response = self.client.get(url, {'slugs': ','.join(str(job.slug) for job in jobs), 'outputs': 'out1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), sorted('%s/out1' % job.slug for job in jobs))
+        self.assertEqual(archive.read('%s/out1' % jobs[0].slug).decode('utf-8'), '%s out1' % jobs[0].slug)
+        url = reverse('wapi:v2:waves-jobs-archive', kwargs={'unique_id': jobs[0].slug})
+        response = self.client.get(url, {'compress': 1})
+        self.assertNotIn('Content-Length', response)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), ['out1', 'out2'])
+        self.assertEqual(self.client.get(url, {'type': 'rar'}).status_code, status.HTTP_400_BAD_REQUEST)
+        for job in jobs:
+            job.delete()
+
+    def test_resumable_upload(self):
+        service = self.create_random_service()
+        service.status = Service.SRV_PUBLIC
+        service.save()
+        content = b'>seq\nACGT\n' * 1000
+        self.login('api_user')
+        response = self.client.post(reverse('wapi:v2:waves-uploads-list'),
+                                    {'filename': 'input.fasta', 'size': len(content),
+                                     'checksum': 'sha256:%s' % hashlib.sha256(b'wrong').hexdigest()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = response['Location']
+        reference = response.data['reference']
+
+        def patch(data, offset):
+            return self.client.patch(url, data, content_type='application/offset+octet-stream',
+                                     HTTP_UPLOAD_OFFSET=str(offset))
+
+        # instance loaded by a concurrent request, before first chunk is written
+        concurrent = Upload.objects.get(pk=response.data['id'])
+        self.assertEqual(patch(content[:4000], 0).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(concurrent.append(io.BytesIO(b'X' * 4000), 0))
+        self.assertEqual(concurrent.offset, 4000)
+        with open(concurrent.path, 'rb') as data:
+            self.assertEqual(data.read(), content[:4000])
+        # stale offset: nothing written, current offset returned
+        response = patch(content[:4000], 0)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '4000')
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '4000')
+        self.assertEqual(self.client.post(url + '/complete', format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(patch(content[4000:], 4000)['Upload-Offset'], str(len(content)))
+        self.assertEqual(patch(b'more', len(content)).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(url + '/complete', format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url + '/complete',
+                                    {'checksum': 'sha256:%s' % hashlib.sha256(content).hexdigest()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['completed'])
+        # completed upload referenced as job file input
+        jobs_url = reverse('wapi:v2:waves-services-submission-jobs',
+                           kwargs={'service_app_name': service.api_name,
+                                   'submission_app_name': service.default_submission.api_name})
+        response = self.client.post(jobs_url, {'param1': 'Value1', 'param2': True, 'param3': reference},
+                                    format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        job = Job.objects.get(slug=response.data['slug'])
+        self.assertEqual(job.job_inputs.get(name='param3').value, 'input.fasta')
+        with open(join(job.working_dir, 'input.fasta'), 'rb') as job_file:
+            self.assertEqual(job_file.read(), content)
+        job.delete()
+        self.assertEqual(self.client.post(jobs_url, {'param1': 'Value1', 'param2': True,
+                                                     'param3': 'upload:%s' % uuid.uuid4()},
+                                          format='multipart').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.head(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_service_form_cache(self):
+        service = self.create_random_service()
+        service.status = Service.SRV_PUBLIC
+        service.save()
+        url = reverse('wapi:v2:waves-services-submission-form',
+                      kwargs={'service_app_name': service.api_name,
+                              'submission_app_name': service.default_submission.api_name})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertNotIn('__waves_job_title__', response.content.decode('utf-8'))
+        # cached fragment, same ETag, conditional request is not modified
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # admin edit changes rendered form
+        service.default_submission.inputs.filter(name='param1').update(label='Changed label')
+        service.default_submission.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Changed label', response.content.decode('utf-8'))
+        # shared HTML never holds any CSRF token, authenticated users get their own in private responses
+        self.assertNotIn('csrfmiddlewaretoken', response.content.decode('utf-8'))
+        client = APIClient(enforce_csrf_checks=True)
+        self.assertTrue(client.login(username=self.users['api_user'], password=self.users['api_user']))
+        response = client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], etag)
+        token = re.search(r'name="csrfmiddlewaretoken" value="(\w+)"', response.content.decode('utf-8')).group(1)
+        jobs_url = reverse('wapi:v2:waves-services-submission-jobs',
+                           kwargs={'service_app_name': service.api_name,
+                                   'submission_app_name': service.default_submission.api_name})
+        self.assertEqual(client.post(jobs_url, {}).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotEqual(client.post(jobs_url, {'csrfmiddlewaretoken': token}).status_code,
+                            status.HTTP_403_FORBIDDEN)
+
+    def test_services_catalog(self):
+        public, registered, restricted = [self.create_random_service() for _ in range(3)]
+        for service, name, service_status in ((public, 'Public', Service.SRV_PUBLIC),
+                                              (registered, 'Registered', Service.SRV_REGISTERED),
+                                              (restricted, 'Restricted', Service.SRV_RESTRICTED)):
+            service.name = name
+            service.status = service_status
+            service.save()
+        restricted.restricted_client.add(self.users['api_user'])
+        created = ('Public', 'Registered', 'Restricted')
+
+        # catalogs may include other services (i.e. from fixtures): only check services created here
+        def entries(content):
+            return OrderedDict((entry['name'], entry) for entry in json.loads(content.decode('utf-8'))
+                               if entry['name'] in created)
+
+        url = reverse('wapi:v2:waves-services-catalog')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('public', response['Cache-Control'])
+        catalog = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(list(entries(response.content)), ['Public'])
+        self.assertIn('param1', entries(response.content)['Public']['submissions'][0]['inputs'])
+        etag = response['ETag']
+        # served from cache, as is
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(zlib.decompress(response.content, 16 + zlib.MAX_WBITS).decode('utf-8')), catalog)
+        # restricted access merged in registered users catalog
+        self.login('api_user')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(list(entries(zlib.decompress(response.content, 16 + zlib.MAX_WBITS))),
+                         ['Public', 'Registered', 'Restricted'])
+        self.logout()
+        self.login('admin')
+        self.assertEqual(list(entries(self.client.get(url).content)), ['Public', 'Registered', 'Restricted'])
+        self.logout()
+        # regenerated upon services change
+        public.default_submission.outputs.create(label='Output', name='output', file_pattern='output.txt')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('output', entries(response.content)['Public']['submissions'][0]['outputs'])
+
+    def test_conditional_requests(self):
+        service = self.create_random_service()
+        service.status = Service.SRV_PUBLIC
+        service.save()
+        self.login('api_user')
+        job = self.create_random_job(service=service, user=self.users['api_user'])
+        url = reverse('wapi:v2:waves-jobs-detail', kwargs={'unique_id': job.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        # validators depend on rendered representation
+        self.assertNotEqual(self.client.get(url, {'format': 'api'})['ETag'], etag)
+        job.status = JobStatus.JOB_QUEUED
+        job.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        # services list changes with any service update
+        url = reverse('wapi:v2:waves-services-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        service.description = 'Updated description'
+        service.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        job.delete()
+
+    def test_job_details_queries(self):
+        service = self.create_random_service()
+        user = self.users['api_user']
+        small, large = self.create_random_job(service=service, user=user), self.create_random_job(service=service,
+                                                                                                 user=user)
+        for index in range(5):
+            large.job_inputs.create(name='extra%s' % index, api_name='extra%s' % index, value='extra.txt',
+                                    param_type=ParamType.TYPE_FILE)
+            large.outputs.create(_name='extra%s' % index, api_name='extra%s' % index, value='extra%s.txt' % index)
+            large.job_history.create(message='Step %s' % index, status=JobStatus.JOB_RUNNING)
+        self.login('api_user')
+
+        # job details cost does not depend on inputs, outputs or history size
+        def detail_queries(job, version, path):
+            if version == 'v2':
+                url = reverse('wapi:v2:waves-jobs-detail', kwargs={'unique_id': job.slug}) + path
+            else:
+                url = reverse('wapi:v1:waves-jobs-detail', kwargs={'slug': job.slug}) + path
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        for version, path in (('v2', ''), ('v2', '/outputs'), ('v2', '/inputs'),
+                              ('v1', ''), ('v1', 'history/'), ('v1', 'inputs/'), ('v1', 'outputs/')):
+            self.assertEqual(detail_queries(small, version, path), detail_queries(large, version, path),
+                             '%s %s' % (version, path))
+        # jobs listing cost does not depend on jobs count
+        url = reverse('wapi:v1:waves-jobs-list')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        other = self.create_random_job(service=service, user=user)
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(len(self.client.get(url).data), 3)
+        other.delete()
+        # jobs, submissions and services, history, inputs, outputs
+        request = APIRequestFactory().get('/')
+        with self.assertNumQueries(4):
+            JobSerializer(Job.objects.with_details(Job.objects.filter(pk__in=[small.pk, large.pk])), many=True,
+                          context={'request': request}).data
+        url = reverse('wapi:v2:waves-jobs-detail', kwargs={'unique_id': large.slug})
+        self.assertIsNone(self.client.get(url).data['outputs']['extra0']['url'])
+        # outputs availability is read from recorded file size
+        with open(join(large.working_dir, 'extra0.txt'), 'w') as output:
+            output.write('content')
+        large.refresh_files_size()
+        large.save()
+        self.assertIsNotNone(self.client.get(url).data['outputs']['extra0']['url'])
+        # outputs never scanned are checked on disk
+        with open(join(large.working_dir, 'extra1.txt'), 'w') as output:
+            output.write('content')
+        large.outputs.filter(api_name='extra1').update(file_size=None)
+        self.assertIsNotNone(self.client.get(url).data['outputs']['extra1']['url'])
+        url = reverse('wapi:v1:waves-jobs-detail', kwargs={'slug': large.slug}) + 'outputs/'
+        self.assertEqual(self.client.get(url).data['outputs']['extra1']['content'], 'content')
+        small.delete()
+        large.delete()
+
+    def test_compact_and_compressed_responses(self):
+        self.login('api_user')
+        job = self.create_random_job(user=self.users['api_user'])
+        url = reverse('wapi:v2:waves-jobs-detail', kwargs={'unique_id': job.slug})
+        response = self.client.get(url)
+        self.assertTrue(response.data['url'].startswith('http://testserver/'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+        # compact representations links are relative to host
+        compact = self.client.get(url, HTTP_ACCEPT='application/vnd.waves.compact+json')
+        self.assertEqual(compact['Content-Type'], 'application/vnd.waves.compact+json')
+        compact_data = json.loads(compact.content.decode('utf-8'))
+        self.assertEqual(compact_data['url'], response.data['url'][len('http://testserver'):])
+        self.assertEqual(compact_data['slug'], str(job.slug))
+        self.assertLess(len(compact.content), len(response.content))
+        if msgpack is not None:
+            packed = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(packed['Content-Type'], 'application/msgpack')
+            self.assertEqual(msgpack.unpackb(packed.content, raw=False), compact_data)
+        # compression negotiated with Accept-Encoding
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='deflate, gzip;q=0.8')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(compressed.content, 16 + zlib.MAX_WBITS), response.content)
+        self.assertEqual(int(compressed['Content-Length']), len(compressed.content))
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity').content, response.content)
+        self.assertEqual(accepted_encoding('gzip;q=0.5, br;q=0.2'), 'gzip')
+        self.assertIsNone(accepted_encoding('identity, *;q=0'))
+        job.delete()
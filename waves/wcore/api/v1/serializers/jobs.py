@@ -3,14 +3,11 @@
 from __future__ import unicode_literals
 
 import logging
-from os import stat
-from os.path import getsize, isfile
 
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from rest_framework.reverse import reverse
 
-from waves.wcore.api.share import DynamicFieldsModelSerializer
+from waves.wcore.api.share import DynamicFieldsModelSerializer, HyperlinkedIdentityField, reverse
 from waves.wcore.models import JobHistory, JobInput, Job, JobOutput, get_service_model
 
 Service = get_service_model()
@@ -36,6 +33,7 @@ class JobHistorySerializer(DynamicFieldsModelSerializer):
 
 class JobHistoryDetailSerializer(serializers.HyperlinkedModelSerializer):
     """ Job history serializer """
+    serializer_url_field = HyperlinkedIdentityField
 
     class Meta:
         model = Job
@@ -71,6 +69,7 @@ class JobInputSerializer(DynamicFieldsModelSerializer):
 
 class JobInputDetailSerializer(serializers.HyperlinkedModelSerializer):
     """ Job Input Details serializer """
+    serializer_url_field = HyperlinkedIdentityField
 
     class Meta:
         model = Job
@@ -97,23 +96,24 @@ class JobOutputSerializer(serializers.ModelSerializer):
 
     download_url = serializers.SerializerMethodField()
 
-    def file_get_content(self, instance):
-        """ Either returns output content, or text of content size exceeds 500ko"""
-        file_path = instance['file_path']
-        if not isfile(file_path) or stat(file_path).st_size == 0:
+    def file_get_content(self, output):
+        """ Either returns output content, or text of content size exceeds 500ko, availability and size are read
+        from recorded file size (disk is only checked for outputs never scanned) """
+        file_size = output.current_file_size
+        if not file_size:
             return None
-        if getsize(file_path) < 500:
-            with open(file_path) as fp:
+        if file_size < 500:
+            with open(output.file_path) as fp:
                 file_content = fp.read()
             return file_content.decode()
         return None
 
     def to_representation(self, instance):
-        """ Representation for a output """
+        """ Representation for job outputs, instance is the job, its outputs are read from prefetched ones if any """
         to_repr = {}
-        for output in instance:
-            to_repr[output['api_name']] = {
-                "label": output['label'],
+        for output in instance.outputs.all():
+            to_repr[output.get_api_name()] = {
+                "label": output.name,
                 "download_uri": self.get_download_url(output),
                 "content": self.file_get_content(output)
             }
@@ -122,11 +122,12 @@ class JobOutputSerializer(serializers.ModelSerializer):
     def get_download_url(self, obj):
         """ Link to jobOutput download uri """
         return "%s?export=1" % reverse(viewname='wapi:v1:waves-job-output', request=self.context['request'],
-                                       kwargs={'slug': str(obj['slug'])})
+                                       kwargs={'slug': str(obj.slug)})
 
 
 class JobOutputDetailSerializer(serializers.HyperlinkedModelSerializer):
     """ JobOutput List serializer """
+    serializer_url_field = HyperlinkedIdentityField
 
     class Meta:
         model = Job
@@ -137,7 +138,7 @@ class JobOutputDetailSerializer(serializers.HyperlinkedModelSerializer):
 
     status_txt = serializers.SerializerMethodField()
     status_code = serializers.IntegerField(source='status')
-    outputs = JobOutputSerializer(read_only=True, source='output_files_exists')
+    outputs = JobOutputSerializer(read_only=True, source='*')
 
     @staticmethod
     def get_status_txt(obj):
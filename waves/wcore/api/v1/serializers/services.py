@@ -5,9 +5,8 @@ import logging
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from rest_framework import serializers
-from rest_framework.reverse import reverse as reverse
 
-from waves.wcore.api.share import DynamicFieldsModelSerializer
+from waves.wcore.api.share import DynamicFieldsModelSerializer, reverse
 from waves.wcore.api.v1.serializers.inputs import InputSerializer
 from waves.wcore.models import get_service_model, get_submission_model
 from waves.wcore.models.services import SubmissionOutput as ServiceOutput
@@ -49,7 +48,7 @@ class ServiceSubmissionSerializer(DynamicFieldsModelSerializer, serializers.Hype
 
     view_name = 'wapi:v1:waves-services-submissions'
     submission_uri = serializers.SerializerMethodField()
-    inputs = InputSerializer(many=True, source="expected_inputs")
+    inputs = InputSerializer(many=True, source="schema.expected_inputs")
     service = serializers.SerializerMethodField()
     label = serializers.CharField(source='name')
 
@@ -8,6 +8,7 @@ from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import detail_route
 from rest_framework.parsers import MultiPartParser, JSONParser
 from rest_framework.response import Response
+from waves.wcore.api.share import conditional_response, job_versions
 from waves.wcore.api.v1.serializers.jobs import JobSerializer, JobHistoryDetailSerializer, JobInputDetailSerializer, \
     JobOutputDetailSerializer
 from waves.wcore.exceptions import WavesException
@@ -28,8 +29,8 @@ class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.Destro
     lookup_field = 'slug'
 
     def get_queryset(self):
-        """ Basic job queryset """
-        return Job.objects.get_user_job(self.request.user)
+        """ Basic job queryset, with related client displayed in jobs details """
+        return Job.objects.get_user_job(self.request.user).select_related('client')
 
     def list(self, request, *args, **kwargs):
         """ List User's jobs (if any) from ListModelMixin """
@@ -41,8 +42,10 @@ class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.Destro
     def retrieve(self, request, slug=None, *args, **kwargs):
         """ Detailed job info """
         service_job = get_object_or_404(self.get_queryset(), slug=slug)
-        serializer = JobSerializer(service_job, context={'request': request})
-        return Response(serializer.data)
+        last_modified, versions = job_versions(service_job)
+        return conditional_response(
+            request, lambda: Response(JobSerializer(service_job, context={'request': request}).data),
+            last_modified, *versions)
 
     def destroy(self, request, slug=None, *args, **kwargs):
         """ Try to remotely cancel job, then delete it from WAVES DB """
@@ -59,21 +62,27 @@ class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.Destro
         """ List job history elements """
         queryset = Job.objects.get_user_job(user=request.user)
         job = get_object_or_404(queryset, slug=slug)
-        serializer = JobHistoryDetailSerializer(job, many=False, context={'request': request})
-        return Response(serializer.data)
+        last_modified, versions = job_versions(job)
+        return conditional_response(
+            request, lambda: Response(JobHistoryDetailSerializer(job, many=False, context={'request': request}).data),
+            last_modified, *versions)
 
     @detail_route(methods=['get'], url_path='inputs')
     def list_inputs(self, request, slug=None):
         """ list job submitted inputs """
         queryset = Job.objects.get_user_job(user=request.user)
         job = get_object_or_404(queryset, slug=slug)
-        serializer = JobInputDetailSerializer(job, many=False, context={'request': request})
-        return Response(serializer.data)
+        last_modified, versions = job_versions(job)
+        return conditional_response(
+            request, lambda: Response(JobInputDetailSerializer(job, many=False, context={'request': request}).data),
+            last_modified, *versions)
 
     @detail_route(methods=['get'], url_path='outputs')
     def list_outputs(self, request, slug=None):
         """ list job expected outputs """
         queryset = Job.objects.get_user_job(user=request.user)
         job = get_object_or_404(queryset, slug=slug)
-        serializer = JobOutputDetailSerializer(job, many=False, context={'request': request})
-        return Response(serializer.data)
+        last_modified, versions = job_versions(job)
+        return conditional_response(
+            request, lambda: Response(JobOutputDetailSerializer(job, many=False, context={'request': request}).data),
+            last_modified, *versions)
@@ -12,6 +12,7 @@ from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from waves.wcore.api.share import conditional_response, services_versions, service_versions
 from waves.wcore.api.v1.serializers import ServiceSerializer, JobSerializer, ServiceFormSerializer, \
     ServiceSubmissionSerializer
 from waves.wcore.api.views.base import WavesAuthenticatedView
@@ -35,20 +36,33 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
         """ retrieve available services for current request user """
         return Service.objects.get_services(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        last_modified, versions = services_versions(self.get_queryset())
+        return conditional_response(request, lambda: super(ServiceViewSet, self).list(request, *args, **kwargs),
+                                    last_modified, *versions)
+
     @list_route(methods=['get'], permission_classes=[AllowAny])
     def list_services(self, request):
         """ List all available services """
-        serializer = ServiceSerializer(self.get_queryset(), many=True, context={'request': request},
-                                       fields=('url', 'name', 'short_description',
-                                               'version', 'created', 'updated', 'jobs'))
-        return Response(serializer.data)
+        queryset = self.get_queryset()
+        last_modified, versions = services_versions(queryset)
+
+        def build_response():
+            serializer = ServiceSerializer(queryset, many=True, context={'request': request},
+                                           fields=('url', 'name', 'short_description',
+                                                   'version', 'created', 'updated', 'jobs'))
+            return Response(serializer.data)
+
+        return conditional_response(request, build_response, last_modified, *versions)
 
     def retrieve(self, request, *args, **kwargs):
         """ Retrieve Service details"""
         api_name = kwargs.pop('api_name')
         service_tool = get_object_or_404(self.get_queryset(), api_name=api_name)
-        serializer = ServiceSerializer(service_tool, context={'request': request})
-        return Response(serializer.data)
+        last_modified, versions = service_versions(service_tool)
+        return conditional_response(
+            request, lambda: Response(ServiceSerializer(service_tool, context={'request': request}).data),
+            last_modified, *versions)
 
     @detail_route(methods=['get'], url_path='jobs')
     def service_job(self, request, api_name=None):
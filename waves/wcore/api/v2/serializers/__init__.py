@@ -2,8 +2,10 @@
 from __future__ import unicode_literals
 
 from waves.wcore.api.v2.serializers.jobs import JobHistorySerializer, JobInputSerializer, JobSerializer, JobOutputSerializer
-from waves.wcore.api.v2.serializers.services import ServiceSubmissionSerializer, ServiceSerializer
+from waves.wcore.api.v2.serializers.services import ServiceSubmissionSerializer, ServiceSerializer, \
+    ServiceCatalogSerializer
 from waves.wcore.api.v2.serializers.inputs import InputSerializer
+from waves.wcore.api.v2.serializers.uploads import UploadSerializer
 
 __all__ = ['JobInputSerializer', 'JobHistorySerializer', 'JobSerializer', 'JobOutputSerializer',
-           'ServiceSubmissionSerializer', 'ServiceSerializer']
+           'ServiceSubmissionSerializer', 'ServiceSerializer', 'ServiceCatalogSerializer', 'UploadSerializer']
@@ -3,13 +3,11 @@
 from __future__ import unicode_literals
 
 from collections import OrderedDict
-from os.path import isfile
 
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from rest_framework.reverse import reverse
 
-from waves.wcore.api.share import DynamicFieldsModelSerializer
+from waves.wcore.api.share import DynamicFieldsModelSerializer, reverse
 from waves.wcore.models import JobInput, Job, JobOutput, JobHistory, get_service_model
 from waves.wcore.models.const import ParamType
 
@@ -62,9 +60,10 @@ class JobInputSerializer(DynamicFieldsModelSerializer):
         # depth = 1
 
     def to_representation(self, instance):
-        """ Representation for a output """
+        """ Representation for job inputs, instance is the job, its inputs are read from prefetched ones if any (see
+        :func:`waves.wcore.models.jobs.JobManager.with_details`) """
         to_repr = {}
-        for j_input in instance.all():
+        for j_input in instance.job_inputs.all():
             repres = OrderedDict({
                 'name': j_input.api_name,
                 "label": j_input.label,
@@ -74,7 +73,7 @@ class JobInputSerializer(DynamicFieldsModelSerializer):
             if j_input.param_type == ParamType.TYPE_FILE:
                 repres["url"] = reverse(viewname='wapi:v2:waves-jobs-input-detail', request=self.context['request'],
                                         kwargs={
-                                            'unique_id': j_input.job.slug,
+                                            'unique_id': instance.slug,
                                             'app_short_name': j_input.api_name
                                         })
             to_repr[j_input.api_name] = repres
@@ -87,7 +86,7 @@ class JobInputSerializer(DynamicFieldsModelSerializer):
 class JobOutputSerializer(serializers.ModelSerializer):
     """
     JobOutput serializer
-    Serialize a JobOutput, return a dictionary indexed by output api_name(s)
+    Serialize a job outputs, return a dictionary indexed by output api_name(s)
     """
 
     class Meta:
@@ -96,24 +95,27 @@ class JobOutputSerializer(serializers.ModelSerializer):
 
     content = serializers.FileField(read_only=True, source="file_content")
 
-    def get_url(self, output):
-        if isfile(output.file_path):
+    def get_url(self, job, output):
+        """ Output download url, availability is read from recorded file size (disk is only checked for outputs
+        never scanned) """
+        if output.available:
             return reverse(viewname='wapi:v2:waves-jobs-output-detail', request=self.context['request'],
                            kwargs={
-                               'unique_id': output.job.slug,
+                               'unique_id': job.slug,
                                'app_short_name': output.api_name})
         else:
             return None
 
     def to_representation(self, instance):
-        """ Representation for a output """
+        """ Representation for job outputs, instance is the job, its outputs are read from prefetched ones if any
+        (see :func:`waves.wcore.models.jobs.JobManager.with_details`) """
         to_repr = {}
-        for output in instance:
+        for output in instance.outputs.all():
             to_repr[output.api_name] = OrderedDict([
                 ("label", output.name),
                 ("file_name", output.file_name),
                 ("extension", output.get_extension()),
-                ("url", self.get_url(output)),
+                ("url", self.get_url(instance, output)),
             ])
         return to_repr
 
@@ -139,8 +141,8 @@ class JobSerializer(DynamicFieldsModelSerializer,
     status = serializers.SerializerMethodField(source='_status', read_only=True)
     client = serializers.CharField(read_only=True, source="email_to")
     history = JobHistorySerializer(many=True, read_only=True, source="public_history")
-    outputs = JobOutputSerializer(read_only=True, source='output_files')
-    inputs = JobInputSerializer(source='job_inputs', read_only=True)
+    outputs = JobOutputSerializer(read_only=True, source='*')
+    inputs = JobInputSerializer(read_only=True, source='*')
     last_message = JobHistorySerializer(source='last_history', many=False, fields=['timestamp', 'message'],
                                         read_only=True)
 
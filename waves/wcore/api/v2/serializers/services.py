@@ -4,9 +4,8 @@ from __future__ import unicode_literals
 import collections
 
 from rest_framework import serializers
-from rest_framework.reverse import reverse
 
-from waves.wcore.api.share import DynamicFieldsModelSerializer
+from waves.wcore.api.share import DynamicFieldsModelSerializer, reverse
 from waves.wcore.api.v2.serializers.inputs import InputSerializer as DetailInputSerializer
 from waves.wcore.models import get_service_model, get_submission_model
 from waves.wcore.models.services import SubmissionOutput
@@ -14,7 +13,7 @@ from waves.wcore.models.services import SubmissionOutput
 Service = get_service_model()
 Submission = get_submission_model()
 
-__all__ = ['OutputSerializer', 'ServiceSerializer', 'ServiceSubmissionSerializer']
+__all__ = ['OutputSerializer', 'ServiceSerializer', 'ServiceSubmissionSerializer', 'ServiceCatalogSerializer']
 
 
 class OutputSerializer(DynamicFieldsModelSerializer):
@@ -47,7 +46,7 @@ class OutputSerializer(DynamicFieldsModelSerializer):
 class InputSerializer(DetailInputSerializer):
     def to_representation(self, instance):
         to_repr = {}
-        for baseinst in instance.all():
+        for baseinst in instance:
             base_repr = super(InputSerializer, self).to_representation(baseinst)
             to_repr[baseinst.api_name] = base_repr
         return to_repr
@@ -64,7 +63,7 @@ class ServiceSubmissionSerializer(DynamicFieldsModelSerializer,
 
     view_name = 'wapi:v2:waves-services-submission-detail'
 
-    inputs = InputSerializer(many=False, read_only=True, source='expected_inputs')
+    inputs = InputSerializer(many=False, read_only=True, source='schema.expected_inputs')
     form = serializers.SerializerMethodField()
     service = serializers.SerializerMethodField()
     jobs = serializers.SerializerMethodField()
@@ -143,3 +142,19 @@ class ServiceSerializer(DynamicFieldsModelSerializer, serializers.HyperlinkedMod
         """ return uri to access current service users' jobs """
         return reverse(viewname='wapi:v2:waves-services-jobs', request=self.context['request'],
                        kwargs={'service_app_name': obj.api_name})
+
+
+class ServiceCatalogSerializer(ServiceSerializer):
+    """ Serialize a service catalog entry: service with its submissions details (inputs and outputs) """
+
+    def get_submissions(self, obj):
+        submissions = []
+        for submission in obj.submissions_api.all():
+            details = collections.OrderedDict([
+                ('submission_app_name', submission.api_name),
+                ('url', reverse(viewname='wapi:v2:waves-services-submission-detail', request=self.context['request'],
+                                kwargs={'service_app_name': obj.api_name, 'submission_app_name': submission.api_name}))
+            ])
+            details.update(ServiceSubmissionSerializer(submission, context=self.context).data)
+            submissions.append(details)
+        return submissions
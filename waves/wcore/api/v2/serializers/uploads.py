@@ -0,0 +1,26 @@
+""" WAVES API resumable uploads serializers """
+from __future__ import unicode_literals
+
+from rest_framework import serializers
+
+from waves.wcore.api.share import HyperlinkedIdentityField
+from waves.wcore.models.uploads import Upload, REFERENCE_PREFIX
+
+
+class UploadSerializer(serializers.HyperlinkedModelSerializer):
+    """ Serializer for Upload, 'reference' is the value to submit for a job file input """
+    serializer_url_field = HyperlinkedIdentityField
+
+    class Meta:
+        model = Upload
+        fields = ('url', 'id', 'filename', 'size', 'offset', 'checksum', 'created', 'updated', 'completed',
+                  'reference')
+        read_only_fields = ('id', 'offset', 'created', 'updated', 'completed')
+        extra_kwargs = {
+            'url': {'view_name': 'wapi:v2:waves-uploads-detail', 'lookup_url_kwarg': 'upload_id'}
+        }
+
+    reference = serializers.SerializerMethodField()
+
+    def get_reference(self, obj):
+        return REFERENCE_PREFIX + str(obj.id)
@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 from django.conf.urls import url, include
 from rest_framework import routers
 
-from waves.wcore.api.v2.views import jobs, services
+from waves.wcore.api.v2.views import jobs, services, uploads
 
 # API router setup
 router = routers.DefaultRouter(trailing_slash=False)
@@ -15,6 +15,10 @@ router.register(prefix=r'services',
 router.register(prefix=r'jobs',
                 viewset=jobs.JobViewSet,
                 base_name='waves-jobs')
+# Resumable uploads URIs configuration
+router.register(prefix=r'uploads',
+                viewset=uploads.UploadViewSet,
+                base_name='waves-uploads')
 
 urlpatterns = [
     url(r'^', include(router.urls)),
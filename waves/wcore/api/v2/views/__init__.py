@@ -2,3 +2,4 @@
 import jobs
 import services
 
+import uploads
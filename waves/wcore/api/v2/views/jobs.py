@@ -3,27 +3,97 @@
 
 from __future__ import unicode_literals, print_function
 
+import datetime
+import hashlib
+import json
 import logging
+import time
+import uuid
 from os.path import getsize
 
 import magic
-from django.http import HttpResponse, HttpResponseNotFound, HttpResponseForbidden
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound, HttpResponseForbidden, StreamingHttpResponse
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 from rest_framework import mixins
 from rest_framework import status
 from rest_framework import viewsets
-from rest_framework.decorators import detail_route, permission_classes
-from rest_framework.exceptions import PermissionDenied, NotFound
+from rest_framework.decorators import detail_route, list_route, permission_classes
+from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
 from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from waves.wcore.api.share import JobCursorPagination, EventStreamRenderer, requested_fields, conditional_response, \
+    job_versions
 from waves.wcore.api.v2.serializers.jobs import JobSerializer, JobStatusSerializer, JobOutputSerializer, \
     JobInputSerializer
+from waves.wcore.adaptors.const import JobStatus
 from waves.wcore.exceptions.jobs import JobInconsistentStateError
 from waves.wcore.models import Job
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.archives import build_archive, jobs_outputs_entries
+from waves.wcore.utils.events import latest_event_id, wait_job_events, POLL_INTERVAL
+from waves.wcore.views.files import archive_response
 
 logger = logging.getLogger(__name__)
 
+#: Max seconds without data sent on a job events stream
+KEEP_ALIVE = 15
+#: Jobs details not listed unless explicitly requested with 'fields' query parameter
+LIST_HIDDEN_FIELDS = ['inputs', 'outputs', 'history']
+
+
+def jobs_list_response(view, queryset):
+    """
+    Paginated jobs listing (see :class:`waves.wcore.api.share.JobCursorPagination`), fields may be selected with
+    'fields' query parameter. Related submission, service, history, inputs and outputs are loaded once for the
+    whole page, so that a page is retrieved with a constant number of queries.
+
+    :param view: current api view
+    :param queryset: jobs to list
+    :return: Response
+    """
+    request = view.request
+    fields = requested_fields(request, JobSerializer.Meta.fields)
+    displayed = fields or [field for field in JobSerializer.Meta.fields if field not in LIST_HIDDEN_FIELDS]
+    queryset = Job.objects.with_details(queryset,
+                                        history='history' in displayed or 'last_message' in displayed,
+                                        inputs='inputs' in displayed, outputs='outputs' in displayed)
+    paginator = JobCursorPagination()
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    serializer = JobSerializer(page, many=True, context={'request': request}, fields=displayed)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def iso_timestamp(value):
+    """ ISO 8601 representation for value, aware datetimes are expressed in UTC ('Z' suffix, safe in query strings) """
+    if timezone.is_aware(value):
+        return value.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + 'Z'
+    return value.isoformat()
+
+
+def job_events_stream(user, last_id, duration):
+    """ Server-sent events for user jobs status changes after last_id, for duration seconds """
+    deadline = time.time() + duration
+    yield 'retry: %d\n\n' % (POLL_INTERVAL * 1000)
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        events = wait_job_events(user, last_id, min(remaining, KEEP_ALIVE))
+        if not events:
+            yield ': keep-alive\n\n'
+        for event in events:
+            last_id = event['id']
+            event['timestamp'] = iso_timestamp(event['timestamp'])
+            yield 'id: %s\nevent: status\ndata: %s\n\n' % (event['id'], json.dumps(event))
+
 
 class JobFileView(object):
 
@@ -84,16 +154,20 @@ class JobViewSet(mixins.ListModelMixin,
         """
         Retrieve detailed WAVES job info
         """
-        return super(JobViewSet, self).retrieve(request, *args, **kwargs)
+        job = self.get_object()
+        last_modified, versions = job_versions(job)
+        return conditional_response(
+            request, lambda: Response(self.get_serializer(Job.objects.prefetch_details([job])[0]).data),
+            last_modified, *versions)
 
     @permission_classes((IsAuthenticated,))
     def list(self, request, *args, **kwargs):
         """
-        List current jobs related to user, require to be logged in
+        List current jobs related to user, require to be logged in, paginated by creation date (newest first)
+
+        Query parameters: 'fields' (comma separated job fields to return), 'page_size', 'cursor'
         """
-        queryset = Job.objects.get_user_job(user=request.user)
-        serializer = self.get_serializer(queryset, many=True, hidden=['inputs', 'outputs', 'history'])
-        return Response(serializer.data)
+        return jobs_list_response(self, Job.objects.get_user_job(user=request.user))
 
     @permission_classes((IsAuthenticated,))
     def destroy(self, request, *args, **kwargs):
@@ -109,12 +183,142 @@ class JobViewSet(mixins.ListModelMixin,
             pass
         return super(JobViewSet, self).destroy(request, *args, **kwargs)
 
+    @list_route(methods=['get', 'post'], url_name='bulk-status', url_path='status')
+    def bulk_status(self, request):
+        """
+        Status for many jobs in one call, jobs are selected with 'slugs' (comma separated in query string or list in
+        JSON body, up to API_JOBS_STATUS_MAX) and / or 'since' (ISO 8601 timestamp, jobs updated after) or 'cursor'
+        (as returned by previous call).
+
+        Returns compact [slug, status code, updated] lists ordered by update time, 'since' and 'cursor' values for next
+        call and 'more' when more jobs are available. When polling with 'since' or 'cursor', jobs updated during the
+        last API_JOBS_STATUS_DELAY seconds are returned by next calls only, so that jobs updates committed late are
+        not missed. Unknown or not owned jobs are omitted. An unchanged result gets a 304 when its ETag is sent in
+        If-None-Match header.
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        slugs = params.get('slugs', [])
+        if not isinstance(slugs, (list, tuple)):
+            slugs = [slug for slug in slugs.split(',') if slug.strip()]
+        since, after_id = params.get('since'), None
+        if params.get('cursor'):
+            since, _, after_id = params['cursor'].rpartition(',')
+            try:
+                after_id = int(after_id) if after_id else None
+            except ValueError:
+                raise ValidationError('Invalid cursor')
+        if not slugs and not since:
+            raise ValidationError('slugs, since or cursor parameter is required')
+        if len(slugs) > waves_settings.API_JOBS_STATUS_MAX:
+            raise ValidationError('Too many slugs (max %s)' % waves_settings.API_JOBS_STATUS_MAX)
+        queryset = Job.objects.get_user_job(user=request.user)
+        if slugs:
+            try:
+                queryset = queryset.filter(slug__in=[uuid.UUID(slug.strip()) for slug in slugs])
+            except (ValueError, TypeError, AttributeError):
+                raise ValidationError('slugs must be jobs uuids')
+        if since:
+            try:
+                since = parse_datetime(since)
+            except (TypeError, ValueError):
+                since = None
+            if since is None:
+                raise ValidationError('since must be an ISO 8601 timestamp')
+            if settings.USE_TZ and timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            elif not settings.USE_TZ and timezone.is_aware(since):
+                since = timezone.make_naive(since)
+            if after_id is None:
+                queryset = queryset.filter(updated__gt=since)
+            else:
+                # jobs updated at the same time are ordered by id
+                queryset = queryset.filter(Q(updated__gt=since) | Q(updated=since, id__gt=after_id))
+            queryset = queryset.filter(updated__lte=timezone.now() - datetime.timedelta(
+                seconds=waves_settings.API_JOBS_STATUS_DELAY))
+        rows = list(queryset.order_by('updated', 'id').values_list('slug', '_status', 'updated', 'id')[
+                    :waves_settings.API_JOBS_STATUS_MAX])
+        jobs = [[str(slug), job_status, iso_timestamp(updated)] for slug, job_status, updated, _ in rows]
+        if rows:
+            since, after_id = rows[-1][2], rows[-1][3]
+        data = {'jobs': jobs,
+                'since': iso_timestamp(since) if since else None,
+                'cursor': '%s,%s' % (iso_timestamp(since), '' if after_id is None else after_id) if since else None,
+                'more': len(jobs) == waves_settings.API_JOBS_STATUS_MAX}
+        etag = '"%s"' % hashlib.md5(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @list_route(methods=['get'], url_name='events', url_path='events',
+                renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer])
+    def events(self, request):
+        """
+        Subscribe to current user jobs status changes, events are sent after 'last_id' (or 'Last-Event-ID' header),
+        default to new events only.
+
+        Requested with 'Accept: text/event-stream', events are streamed as server-sent events for at most
+        JOB_EVENTS_STREAM_TIMEOUT seconds (clients reconnect with last received id). Otherwise, waits at most 'wait'
+        seconds (bounded by JOB_FOLLOW_TIMEOUT) for events, returns them with 'last_id' to use for next call.
+        Events are sent once API_JOBS_STATUS_DELAY seconds old, so that history committed late is not missed.
+        """
+        stream = request.accepted_renderer.format == EventStreamRenderer.format
+        timeout = waves_settings.JOB_EVENTS_STREAM_TIMEOUT if stream else waves_settings.JOB_FOLLOW_TIMEOUT
+        try:
+            last_id = request.META.get('HTTP_LAST_EVENT_ID', request.query_params.get('last_id'))
+            last_id = latest_event_id() if last_id is None else int(last_id)
+            wait = min(int(request.query_params.get('wait', timeout)), timeout)
+        except ValueError:
+            raise ValidationError('last_id and wait must be integers')
+        if stream:
+            response = StreamingHttpResponse(job_events_stream(request.user, last_id, wait),
+                                             content_type=EventStreamRenderer.media_type)
+            patch_cache_control(response, no_cache=True)
+            # disable proxy buffering (nginx)
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        events = wait_job_events(request.user, last_id, wait)
+        return Response({'last_id': events[-1]['id'] if events else last_id, 'events': events})
+
     @detail_route(methods=['get'])
     def status(self, request, *args, **kwargs):
         job = self.get_object()
         serializer = JobStatusSerializer(instance=job)
         return Response(serializer.data)
 
+    @detail_route(methods=['get'], url_path="follow")
+    def follow(self, request, unique_id):
+        """ Long poll a job live output file (stdout, stderr or progress files)
+
+        Query parameters: 'file' (default job.stdout), 'offset' (bytes already received, default 0), 'wait' (max
+        seconds to wait for new content, bounded by JOB_FOLLOW_TIMEOUT). Returns new content and offset to use for
+        next call.
+        """
+        job = self.get_object()
+        file_name = request.query_params.get('file', job.stdout)
+        if file_name not in job.live_output_files:
+            raise NotFound('File %s is not followed for this job' % file_name)
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            wait = min(int(request.query_params.get('wait', waves_settings.JOB_FOLLOW_TIMEOUT)),
+                       waves_settings.JOB_FOLLOW_TIMEOUT)
+        except ValueError:
+            raise ValidationError('offset and wait must be integers')
+        deadline = time.time() + wait
+        content, new_offset = job.read_live_output(file_name, offset)
+        while not content and job.status in JobStatus.PENDING_STATUS and time.time() < deadline:
+            time.sleep(1)
+            job.refresh_from_db(fields=['_status'])
+            content, new_offset = job.read_live_output(file_name, offset)
+        return Response({'file': file_name,
+                         'offset': new_offset,
+                         'content': content,
+                         'finished': job.status not in JobStatus.PENDING_STATUS,
+                         'status': JobStatusSerializer(instance=job).data})
+
     @detail_route(methods=['get'], url_name='output-detail', url_path="outputs/(?P<app_short_name>[\w-]+)")
     @permission_classes((IsAuthenticated,))
     def output(self, request, unique_id, app_short_name):
@@ -125,20 +329,63 @@ class JobViewSet(mixins.ListModelMixin,
         else:
             return NotFound('Not found')
 
+    @detail_route(methods=['get'], url_name='archive', url_path="archive")
+    def archive(self, request, unique_id):
+        """
+        Download job available outputs in one archive, streamed while built: 'type' (zip - default - or tar.gz),
+        'outputs' (comma separated outputs api names, default to all), 'compress' (deflate zip entries). Stored zip
+        archives (default) support byte ranges to resume downloads.
+        """
+        job = self.get_object()
+        return self._archive_response([job], job.slug, job_dirs=False)
+
+    @list_route(methods=['get'], url_name='bulk-archive', url_path="archive")
+    def bulk_archive(self, request):
+        """
+        Download available outputs for several jobs ('slugs', comma separated, up to API_ARCHIVE_MAX_JOBS) in one
+        archive, each job in a directory named after its slug. Same parameters as single job archive.
+        """
+        slugs = [slug for slug in request.query_params.get('slugs', '').split(',') if slug.strip()]
+        if not slugs:
+            raise ValidationError('slugs parameter is required')
+        if len(slugs) > waves_settings.API_ARCHIVE_MAX_JOBS:
+            raise ValidationError('Too many slugs (max %s)' % waves_settings.API_ARCHIVE_MAX_JOBS)
+        try:
+            jobs = list(Job.objects.get_user_job(user=request.user).filter(
+                slug__in=[uuid.UUID(slug.strip()) for slug in slugs]).order_by('created', 'id'))
+        except ValueError:
+            raise ValidationError('slugs must be jobs uuids')
+        if not jobs:
+            raise NotFound('No job found')
+        return self._archive_response(jobs, 'jobs', job_dirs=True)
+
+    def _archive_response(self, jobs, file_name, job_dirs):
+        params = self.request.query_params
+        api_names = [name.strip() for name in params.get('outputs', '').split(',') if name.strip()]
+        entries = jobs_outputs_entries(jobs, api_names, job_dirs=job_dirs)
+        try:
+            archive = build_archive(entries, params.get('type', 'zip'), compress=bool(params.get('compress')))
+        except ValueError as e:
+            raise ValidationError({'type': str(e)})
+        return archive_response(self.request, archive, file_name)
+
     @detail_route(methods=['get'], url_path="outputs$")
     def outputs(self, request, unique_id):
         job = self.get_object()
-        serializer = JobOutputSerializer(instance=job.outputs.all(), context={'request': self.request})
-        return Response(serializer.data)
+        last_modified, versions = job_versions(job)
+        return conditional_response(
+            request, lambda: Response(JobOutputSerializer(instance=job, context={'request': self.request}).data),
+            last_modified, *versions)
 
     @detail_route(methods=['get'], url_path="inputs$")
     def inputs(self, request, unique_id):
         """ List all inputs for this job
         """
         job = self.get_object()
-        serializer = JobInputSerializer(instance=job.job_inputs.all(),
-                                        context={'request': self.request})
-        return Response(serializer.data)
+        last_modified, versions = job_versions(job)
+        return conditional_response(
+            request, lambda: Response(JobInputSerializer(instance=job, context={'request': self.request}).data),
+            last_modified, *versions)
 
     @detail_route(methods=['get'], url_name='input-detail', url_path="inputs/(?P<app_short_name>[\w-]+)")
     @permission_classes((IsAuthenticated,))
@@ -1,27 +1,48 @@
 """ WAVES API services end points """
 from __future__ import unicode_literals
 
+import hashlib
+import json
 import logging
+import os
+import re
+import shutil
+import tempfile
+
+import six
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.core.exceptions import ValidationError
 from django.http import HttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
-from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.text import compress_string
+from crispy_forms.layout import HTML
 from rest_framework import status
 from rest_framework import viewsets
-from rest_framework.decorators import detail_route, renderer_classes
+from rest_framework.decorators import detail_route, list_route, renderer_classes
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.renderers import StaticHTMLRenderer
 from rest_framework.response import Response
-from rest_framework.reverse import reverse
-from rest_framework.parsers import MultiPartParser, DjangoMultiPartParser
+from rest_framework.parsers import MultiPartParser, DjangoMultiPartParser, JSONParser
 
 from waves.wcore.api.permissions import ServiceAccessPermission
+from waves.wcore.api.share import conditional_response, services_versions, service_versions, reverse
 from waves.wcore.api.v2.serializers.jobs import JobSerializer
-from waves.wcore.api.v2.serializers.services import ServiceSerializer, ServiceSubmissionSerializer
+from waves.wcore.api.v2.serializers.services import ServiceSerializer, ServiceSubmissionSerializer, \
+    ServiceCatalogSerializer
+from waves.wcore.api.v2.views.jobs import jobs_list_response
 from waves.wcore.exceptions.jobs import JobException
 from waves.wcore.models import Job, get_service_model, get_submission_model
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils import random_analysis_name
+from waves.wcore.utils.access import VERSION_KEY as ACCESS_VERSION_KEY
+from waves.wcore.utils.cache import waves_cache, cache_version
+from waves.wcore.utils.catalog import get_catalog
+from waves.wcore.utils.schema import VERSION_KEY as SCHEMA_VERSION_KEY
+from waves.wcore.utils.storage import SharedFile
 from waves.wcore.views.services import ServiceSubmissionForm
 
 Submission = get_submission_model()
@@ -29,6 +50,13 @@ Service = get_service_model()
 
 logger = logging.getLogger(__name__)
 
+#: Generated job title, set in cached forms HTML upon each response
+TITLE_PLACEHOLDER = '__waves_job_title__'
+#: CSRF token input, set in cached forms HTML upon each response for authenticated users, removed otherwise
+CSRF_PLACEHOLDER = '<input type="hidden" name="csrfmiddlewaretoken" value="__waves_csrf_token__" />'
+#: Accept-Encoding allowing gzip
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
 
 def get_css(obj):
     """ link to service css """
@@ -44,6 +72,82 @@ def get_js(obj):
     ]
 
 
+def api_submission_form(submission, service, **kwargs):
+    """
+    Submission form for API, job title and CSRF token are set on each response (see :func:`cached_form_response`)
+    """
+    form = ServiceSubmissionForm(instance=submission, parent=service, submit_ajax=True, **kwargs)
+    form.fields['title'].initial = TITLE_PLACEHOLDER
+    # rendered HTML is shared between users, never embed current request token
+    form.helper.disable_csrf = True
+    form.helper.layout.fields.insert(0, HTML(CSRF_PLACEHOLDER))
+    return form
+
+
+def cached_form_response(request, render_form, key_parts, public=False):
+    """
+    Serve rendered forms HTML from cache, keyed by submissions schemas / services versions and key_parts (template
+    pack, form action...). Response holds a weak ETag (only the generated default job title changes between
+    responses) and Cache-Control headers (API_FORM_MAX_AGE), conditional requests get a 304.
+    Authenticated users get their own CSRF token in the form (session based submissions), their responses are then
+    private whatever the value of public.
+
+    :param request: current request
+    :param render_form: callable returning rendered form HTML, called on cache miss
+    :param key_parts: values identifying the rendered form
+    :param public: whether shared caches may store the response for anonymous users
+    :return: HttpResponse
+    """
+    cache = waves_cache()
+    key = 'waves:form:%s:%s:%s' % (cache_version(SCHEMA_VERSION_KEY), cache_version(ACCESS_VERSION_KEY),
+                                   hashlib.md5(repr(key_parts).encode('utf-8')).hexdigest())
+    cached = cache.get(key)
+    if cached is None:
+        content = render_form()
+        cached = (content, 'W/"%s"' % hashlib.md5(content.encode('utf-8')).hexdigest())
+        cache.set(key, cached, waves_settings.SERVICES_CACHE_TIMEOUT)
+    content, etag = cached
+    csrf_input = ''
+    if request.user.is_authenticated():
+        token = get_token(request)
+        csrf_input = CSRF_PLACEHOLDER.replace('__waves_csrf_token__', token)
+        etag = 'W/"%s"' % hashlib.md5(('%s:%s' % (etag, token)).encode('utf-8')).hexdigest()
+        public = False
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content = content.replace(CSRF_PLACEHOLDER, csrf_input)
+        response = HttpResponse(content=content.replace(TITLE_PLACEHOLDER, 'Job %s' % random_analysis_name()),
+                                content_type="text/html; charset=utf8")
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    patch_cache_control(response, public=public, private=not public, max_age=waves_settings.API_FORM_MAX_AGE)
+    return response
+
+
+def catalog_response(request, document, public=False):
+    """
+    Serve a catalog document (see :mod:`waves.wcore.utils.catalog`) as is, gzip compressed when accepted by client.
+    Response holds a weak ETag and Cache-Control headers (API_CATALOG_MAX_AGE), conditional requests get a 304.
+
+    :param request: current request
+    :param document: :class:`waves.wcore.utils.catalog.CatalogDocument`
+    :param public: whether shared caches may store the response
+    :return: HttpResponse
+    """
+    response = get_conditional_response(request, etag=document.etag)
+    if response is None:
+        if ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = HttpResponse(content=document.gzipped or compress_string(document.content),
+                                    content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(content=document.content, content_type='application/json')
+    response['ETag'] = document.etag
+    patch_vary_headers(response, ('Accept-Encoding', 'Authorization', 'Cookie'))
+    patch_cache_control(response, public=public, private=not public, max_age=waves_settings.API_CATALOG_MAX_AGE)
+    return response
+
+
 class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API entry point to Services (Retrieve, job submission)
@@ -60,59 +164,77 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
 
     def list(self, request, **kwargs):
         """ List all available services """
-        serializer = ServiceSerializer(self.get_queryset(), many=True, context={'request': request})
-        return Response(serializer.data)
+        queryset = self.get_queryset()
+        last_modified, versions = services_versions(queryset)
+        return conditional_response(
+            request, lambda: Response(ServiceSerializer(queryset, many=True, context={'request': request}).data),
+            last_modified, *versions)
+
+    @list_route(methods=['get'], url_name='catalog', url_path='catalog')
+    def catalog(self, request):
+        """
+        Services catalog: all services available to current user with their submissions inputs and outputs, in one
+        precomputed JSON document (one per visibility class, user restricted services merged in)
+        """
+        base_url = reverse('wapi:v2:waves-services-list', request=request)
+
+        def serialize(services):
+            return ServiceCatalogSerializer(services, many=True, context={'request': request}).data
+
+        document = get_catalog(request.user, serialize, key_parts=(base_url,))
+        return catalog_response(request, document, public=request.user.is_anonymous())
 
     def retrieve(self, request, *args, **kwargs):
         """ Retrieve Service details"""
         service_tool = get_object_or_404(self.get_queryset(), api_name=kwargs.get('service_app_name'))
-        serializer = ServiceSerializer(service_tool, context={'request': request})
-        return Response(serializer.data)
+        last_modified, versions = service_versions(service_tool)
+        return conditional_response(
+            request, lambda: Response(ServiceSerializer(service_tool, context={'request': request}).data),
+            last_modified, *versions)
 
     @detail_route(methods=['get'])
     def jobs(self, request, service_app_name):
         """ Retrieves services Jobs """
         service_tool = get_object_or_404(self.get_queryset(), api_name=service_app_name)
-        queryset_jobs = Job.objects.get_service_job(user=request.user, service=service_tool)
-        serializer = JobSerializer(queryset_jobs, many=True, context={'request': request},
-                                   hidden=['inputs', 'outputs', 'history'])
-        return Response(serializer.data)
+        return jobs_list_response(self, Job.objects.get_service_job(user=request.user, service=service_tool))
 
     @detail_route(methods=['get'])
     @renderer_classes((StaticHTMLRenderer,))
     def form(self, request, *args, **kwargs):
         """ Retrieve service form """
-        from django.shortcuts import render
-        from django.http import HttpResponse
-        from waves.wcore.forms.services import ServiceSubmissionForm
         api_name = self.kwargs.get('service_app_name')
         service_tool = get_object_or_404(self.get_queryset(), api_name=api_name)
-        form = [{'submission': service_submission,
-                 'form': ServiceSubmissionForm(instance=service_submission,
-                                               parent=service_tool,
-                                               submit_ajax=True,
-                                               form_action=request.build_absolute_uri(
-                                                   reverse('wapi:v2:waves-services-submission-jobs',
-                                                           kwargs=dict(
-                                                               service_app_name=self.kwargs.get('service_app_name'),
-                                                               submission_app_name=service_submission.api_name)
-                                                           )))}
-                for service_submission in service_tool.submissions_api.all()]
-
-        content = render(request=self.request,
-                         template_name='waves/api/service_api_form.html',
-                         context={'submissions': form,
-                                  'js': get_js(self),
-                                  'css': get_css(self)},
-                         content_type='')
-        return HttpResponse(content=content, content_type="text/html; charset=utf8")
+        submissions = list(service_tool.submissions_api.all())
+        form_actions = [self._form_action(service_tool.api_name, submission) for submission in submissions]
+
+        def render_form():
+            form = [{'submission': service_submission,
+                     'form': api_submission_form(service_submission, service_tool, form_action=form_action)}
+                    for service_submission, form_action in zip(submissions, form_actions)]
+            return render_to_string(template_name='waves/api/service_api_form.html',
+                                    context={'submissions': form,
+                                             'js': get_js(self),
+                                             'css': get_css(self)},
+                                    request=self.request)
+
+        return cached_form_response(request, render_form, public=service_tool.status == Service.SRV_PUBLIC,
+                                    key_parts=('service', service_tool.pk, [s.pk for s in submissions], form_actions,
+                                               get_js(self), get_css(self)))
+
+    def _form_action(self, service_app_name, submission):
+        return self.request.build_absolute_uri(reverse('wapi:v2:waves-services-submission-jobs',
+                                                       kwargs=dict(service_app_name=service_app_name,
+                                                                   submission_app_name=submission.api_name)))
 
     @detail_route(methods=['get'], url_name='submission-detail', url_path="submissions/(?P<submission_app_name>[\w-]+)")
     def submission(self, request, service_app_name, submission_app_name):
         obj = self.get_object()
-        submission = obj.submissions_api.filter(api_name=submission_app_name)
-        serializer = ServiceSubmissionSerializer(many=False, instance=submission[0], context={'request': self.request})
-        return Response(serializer.data)
+        submission = get_object_or_404(obj.submissions_api, api_name=submission_app_name)
+        last_modified, versions = service_versions(obj)
+        return conditional_response(
+            request, lambda: Response(ServiceSubmissionSerializer(many=False, instance=submission,
+                                                                  context={'request': self.request}).data),
+            last_modified, submission.pk, *versions)
 
     @detail_route(methods=['get'], url_name="submission-form",
                   url_path="submissions/(?P<submission_app_name>[\w-]+)/form")
@@ -128,22 +250,19 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
         obj = self.get_object()
         submission = obj.submissions_api.filter(api_name=submission_app_name)[0]
         template_pack = self.request.GET.get('tp', 'bootstrap3')
-        form = [{'submission': submission,
-                 'form': ServiceSubmissionForm(instance=submission,
-                                               parent=submission.service,
-                                               submit_ajax=True,
-                                               template_pack=template_pack,
-                                               form_action=request.build_absolute_uri(
-                                                   reverse('wapi:v2:waves-services-submission-jobs',
-                                                           kwargs=dict(
-                                                               service_app_name=service_app_name,
-                                                               submission_app_name=submission_app_name
-                                                           ))))}]
-        content = render(request=self.request,
-                         template_name='waves/api/service_api_form.html',
-                         context={'submissions': form,
-                                  'js': get_js(self)})
-        return HttpResponse(content=content, content_type="text/html; charset=utf8")
+        form_action = self._form_action(service_app_name, submission)
+
+        def render_form():
+            form = [{'submission': submission,
+                     'form': api_submission_form(submission, obj, form_action=form_action,
+                                                 template_pack=template_pack)}]
+            return render_to_string(template_name='waves/api/service_api_form.html',
+                                    context={'submissions': form,
+                                             'js': get_js(self)},
+                                    request=self.request)
+
+        return cached_form_response(request, render_form, public=obj.status == Service.SRV_PUBLIC,
+                                    key_parts=('submission', submission.pk, template_pack, form_action, get_js(self)))
 
     @detail_route(methods=['get', 'post'], url_name='submission-jobs',
                   url_path="submissions/(?P<submission_app_name>[\w-]+)/jobs")
@@ -151,10 +270,7 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
         service = self.get_object()
         obj = service.submissions_api.filter(api_name=submission_app_name)[0]
         if self.request.method == 'GET':
-            queryset_jobs = Job.objects.get_submission_job(user=request.user, submission=obj)
-            serializer = JobSerializer(queryset_jobs, many=True, context={'request': request},
-                                       hidden=['inputs', 'outputs', 'history'])
-            return Response(serializer.data)
+            return jobs_list_response(self, Job.objects.get_submission_job(user=request.user, submission=obj))
         elif self.request.method == 'POST':
             # CREATE a new job for this submission
             logger.debug("Create Job")
@@ -172,7 +288,8 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
                 created_job = Job.objects.create_from_submission(submission=obj,
                                                                  email_to=ass_email,
                                                                  submitted_inputs=data,
-                                                                 user=self.request.user)
+                                                                 user=self.request.user,
+                                                                 callback_url=passed_data.get('callback_url', None))
                 # Now job is created (or raise an exception),
                 serializer = JobSerializer(created_job, many=False, context={'request': request},
                                            fields=('slug', 'url', 'created', 'status', 'service', 'submission'))
@@ -185,6 +302,59 @@ class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
                 logger.fatal("Create Error %s", e.message)
                 return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
 
+    @detail_route(methods=['post'], url_name='submission-batch', parser_classes=(MultiPartParser, JSONParser),
+                  url_path="submissions/(?P<submission_app_name>[\w-]+)/batch")
+    def submission_batch(self, request, service_app_name, submission_app_name):
+        """
+        Create many jobs for submission in a single request and transaction, returns created jobs slugs.
+
+        'jobs' is the list of jobs inputs (JSON encoded in multipart requests), up to API_BATCH_MAX_JOBS. Files are
+        uploaded once: a file part is referenced in jobs inputs with {"file": "<part name>"}, a file part named after
+        a submission input is used by all jobs which do not set this input. 'email' and 'callback_url' apply to all
+        jobs.
+        """
+        service = self.get_object()
+        submission = get_object_or_404(service.submissions_api, api_name=submission_app_name)
+        batch = request.data.get('jobs')
+        if isinstance(batch, six.string_types):
+            try:
+                batch = json.loads(batch)
+            except ValueError:
+                raise DRFValidationError({'jobs': 'Invalid JSON'})
+        if not isinstance(batch, list) or not batch or not all(isinstance(inputs, dict) for inputs in batch):
+            raise DRFValidationError({'jobs': 'Expected a non empty list of jobs inputs'})
+        if len(batch) > waves_settings.API_BATCH_MAX_JOBS:
+            raise DRFValidationError({'jobs': 'Too many jobs (max %s)' % waves_settings.API_BATCH_MAX_JOBS})
+        if not os.path.isdir(waves_settings.JOB_BASE_DIR):
+            os.makedirs(waves_settings.JOB_BASE_DIR)
+        # shared files are stored next to jobs dirs, so that they can be hard linked
+        shared_dir = tempfile.mkdtemp(prefix='.batch-', dir=waves_settings.JOB_BASE_DIR)
+        try:
+            uploads = {name: SharedFile.store(uploaded, os.path.join(shared_dir, '%d' % index))
+                       for index, (name, uploaded) in enumerate(request.FILES.items())}
+            batch_inputs = []
+            for inputs in batch:
+                job_inputs = dict(uploads)
+                for name, value in inputs.items():
+                    if isinstance(value, dict) and 'file' in value:
+                        if value['file'] not in uploads:
+                            raise DRFValidationError({'jobs': 'Unknown file part %s' % value['file']})
+                        value = uploads[value['file']]
+                    job_inputs[name] = value
+                batch_inputs.append(job_inputs)
+            jobs = Job.objects.create_batch(submission, batch_inputs,
+                                            email_to=request.data.get('email', None),
+                                            user=request.user,
+                                            callback_url=request.data.get('callback_url', None))
+        except ValidationError as e:
+            raise DRFValidationError(e.message_dict)
+        except JobException as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+        logger.debug('Batch of %d jobs created for %s', len(jobs), submission)
+        return Response({'jobs': [str(job.slug) for job in jobs]}, status=status.HTTP_201_CREATED)
+
     @detail_route(methods=['get'], url_name='submission-list')
     def submissions_list(self, request, service_app_name):
         obj = self.get_object()
@@ -0,0 +1,119 @@
+""" WAVES API resumable uploads end points: create an upload, PATCH data chunks at current offset (Upload-Offset
+header, 'application/offset+octet-stream' body), HEAD to get offset after an interruption, then complete it """
+from __future__ import unicode_literals
+
+import logging
+
+from django.core.exceptions import ValidationError
+from rest_framework import mixins
+from rest_framework import status
+from rest_framework import viewsets
+from rest_framework.decorators import detail_route
+from rest_framework.exceptions import ValidationError as DRFValidationError, UnsupportedMediaType
+from rest_framework.parsers import JSONParser, FormParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from waves.wcore.api.share import UploadChunkParser
+from waves.wcore.api.v2.serializers.uploads import UploadSerializer
+from waves.wcore.models.uploads import Upload
+
+logger = logging.getLogger(__name__)
+
+def drf_validation_error(error):
+    """ Django ValidationError as an api ValidationError """
+    return DRFValidationError(error.message_dict if hasattr(error, 'error_dict') else error.messages)
+
+
+def upload_headers(upload):
+    return {'Upload-Offset': str(upload.offset),
+            'Upload-Length': str(upload.size),
+            'Cache-Control': 'no-store'}
+
+
+class UploadViewSet(mixins.ListModelMixin,
+                    mixins.RetrieveModelMixin,
+                    mixins.DestroyModelMixin,
+                    viewsets.GenericViewSet):
+    """
+    API entry point for resumable uploads, completed uploads are referenced in jobs submissions file inputs with
+    their 'reference' ('upload:<id>', or {"upload": "<id>"} in JSON submissions)
+    """
+    serializer_class = UploadSerializer
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (JSONParser, FormParser, UploadChunkParser)
+    lookup_url_kwarg = 'upload_id'
+    http_method_names = ['get', 'head', 'options', 'post', 'patch', 'delete']
+
+    def get_queryset(self):
+        return Upload.objects.filter(client=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Declare a new upload: 'filename', 'size' (or Upload-Length header) in bytes, optional 'checksum'
+        ('<md5|sha1|sha256>:<hex digest>') verified upon completion
+        """
+        try:
+            size = int(request.data.get('size', request.META.get('HTTP_UPLOAD_LENGTH')))
+        except (TypeError, ValueError):
+            raise DRFValidationError({'size': 'Upload size is required'})
+        filename = request.data.get('filename')
+        if not filename:
+            raise DRFValidationError({'filename': 'File name is required'})
+        try:
+            upload = Upload.objects.start(request.user, filename, size, request.data.get('checksum', ''))
+        except ValidationError as e:
+            raise drf_validation_error(e)
+        serializer = self.get_serializer(upload)
+        headers = upload_headers(upload)
+        headers['Location'] = serializer.data['url']
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Upload details, current offset is also sent as Upload-Offset header (use HEAD to get headers only)
+        """
+        upload = self.get_object()
+        return Response(self.get_serializer(upload).data, headers=upload_headers(upload))
+
+    def partial_update(self, request, *args, **kwargs):
+        """
+        Append request body to upload data, Upload-Offset header must be current upload offset, otherwise nothing
+        is written and 409 is returned with current offset. Data received before an interruption is kept.
+        """
+        upload = self.get_object()
+        if request.content_type.split(';')[0].strip() != UploadChunkParser.media_type:
+            raise UnsupportedMediaType(request.content_type)
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+        except (KeyError, ValueError):
+            raise DRFValidationError({'Upload-Offset': 'Upload offset header is required'})
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        try:
+            appended = upload.append(request.stream, offset, length) if length else upload.offset == offset
+        except ValidationError as e:
+            raise drf_validation_error(e)
+        if not appended:
+            upload.refresh_from_db()
+            return Response({'detail': 'Offset mismatch, current offset is %s' % upload.offset},
+                            status=status.HTTP_409_CONFLICT, headers=upload_headers(upload))
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=upload_headers(upload))
+
+    @detail_route(methods=['post'], url_path="complete")
+    def complete(self, request, upload_id):
+        """
+        Mark upload as completed once all data is received, data is verified against 'checksum' if given (here or
+        upon creation), completed upload can then be referenced in jobs submissions.
+        """
+        upload = self.get_object()
+        if request.data.get('checksum'):
+            upload.checksum = request.data['checksum']
+        try:
+            upload.complete()
+        except ValidationError as e:
+            raise drf_validation_error(e)
+        logger.debug('Upload %s completed', upload)
+        return Response(self.get_serializer(upload).data, headers=upload_headers(upload))
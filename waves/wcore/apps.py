@@ -88,5 +88,14 @@ def check_waves_config(app_configs=('waves.wcore',), **kwargs):
                 hint='Try changing group permission to a group where your user belong',
                 obj=waves_settings,
                 id="waves.wcore.W001"))
+    # services access maps, schemas and catalogs are invalidated by bumping versions stored in SERVICES_CACHE
+    cache_backend = settings.CACHES.get(waves_settings.SERVICES_CACHE, {}).get('BACKEND', '')
+    if cache_backend.endswith('LocMemCache') and not settings.DEBUG:
+        errors.append(Warning(
+            "SERVICES_CACHE [%s] is a per process memory cache: changes made in one process (i.e. admin) are not "
+            "seen by others (api, daemons) before SERVICES_CACHE_TIMEOUT" % waves_settings.SERVICES_CACHE,
+            hint='Use a cache shared by all WAVES processes (memcached, redis, database or file based cache)',
+            obj=waves_settings,
+            id="waves.wcore.W002"))
 
     return errors
@@ -21,6 +21,7 @@ import waves.wcore.exceptions
 from waves.wcore.adaptors.const import JobStatus
 from waves.wcore.adaptors.exceptions import AdaptorException
 from waves.wcore.models import Job
+from waves.wcore.utils.webhooks import deliver_webhooks
 
 logger = logging.getLogger('waves.cron')
 
@@ -34,8 +35,8 @@ def process_job_queue():
 
     :return: None
     """
-    jobs = Job.objects.prefetch_related('job_inputs'). \
-        prefetch_related('outputs').filter(_status__lt=JobStatus.JOB_TERMINATED)
+    jobs = Job.objects.get_unfinished_jobs().prefetch_related('job_inputs'). \
+        prefetch_related('outputs')
     if jobs.count() > 0:
         logger.info("Starting queue process with %i(s) unfinished jobs", jobs.count())
     for job in jobs:
@@ -71,3 +72,6 @@ def process_job_queue():
             job.check_send_mail()
             if runner is not None:
                 runner.disconnect()
+    delivered, failed = deliver_webhooks()
+    if delivered or failed:
+        logger.info("Webhooks: %d delivered, %d failed", delivered, failed)
@@ -16,22 +16,21 @@ from __future__ import unicode_literals
 
 import datetime
 import logging
-from itertools import chain
-
-from waves.wcore.models import Job
 
 logger = logging.getLogger('waves.cron')
 
 
 def purge_old_jobs():
-    from waves.wcore.settings import waves_settings
+    from waves.wcore.models import Upload
+    from waves.wcore.utils.purge import purge_expired_jobs, evict_jobs
 
     logger.info("Purge job launched at: %s", datetime.datetime.now().strftime('%A, %d %B %Y %H:%M:%I'))
-    date_anonymous = datetime.date.today() - datetime.timedelta(waves_settings.KEEP_ANONYMOUS_JOBS)
-    date_registered = datetime.date.today() - datetime.timedelta(waves_settings.KEEP_REGISTERED_JOBS)
-    anonymous = Job.objects.filter(client__isnull=True, updated__lt=date_anonymous)
-    registered = Job.objects.filter(client__isnull=False, updated__lt=date_registered)
-    for job in list(chain(*[anonymous, registered])):
-        logger.info('Deleting job %s created on %s', job.slug, job.created)
-        job.delete()
+    deleted, removed = purge_expired_jobs()
+    logger.info("Purge deleted %d jobs, %d directories removed", deleted, removed)
+    expired_uploads = Upload.objects.purge_expired()
+    if expired_uploads:
+        logger.info("Purge deleted %d expired uploads", expired_uploads)
+    evicted, freed = evict_jobs()
+    if evicted:
+        logger.info("Disk usage watermark reached, %d jobs evicted (%d bytes)", evicted, freed)
     logger.info("Purge job terminated at: %s", datetime.datetime.now().strftime('%A, %d %B %Y %H:%M:%I'))
@@ -4,7 +4,7 @@ from waves.wcore.adaptors.exceptions import AdaptorJobException
 from waves.wcore.exceptions import WavesException
 
 __all__ = ['JobException', 'JobRunException', 'JobSubmissionException', 'JobCreateException',
-           'JobMissingMandatoryParam', 'JobInconsistentStateError', 'JobPrepareException']
+           'JobMissingMandatoryParam', 'JobInconsistentStateError', 'JobPrepareException', 'JobQuotaExceeded']
 
 
 class JobException(WavesException):
@@ -33,6 +33,11 @@ class JobCreateException(JobSubmissionException):
         super(JobException, self).__init__(message)
 
 
+class JobQuotaExceeded(JobSubmissionException):
+    """ User jobs disk usage exceeds configured quota, no more submission allowed """
+    pass
+
+
 class JobMissingMandatoryParam(JobSubmissionException):
     """ Inconsistency in job submission detected, missing a required params to run job (issued from service
     configuration """
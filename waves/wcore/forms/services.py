@@ -31,7 +31,7 @@ class ServiceSubmissionForm(forms.ModelForm):
         logger.warn("current input %s %s ", dependent_input, dependent_input.label)
         self.fields.update(dependent_input.form_widget(self.data.get(dependent_input.api_name, None)))
         self.helper.set_layout(dependent_input)
-        for srv_input in dependent_input.dependents_inputs.exclude(required=None):
+        for srv_input in self.schema.dependents(dependent_input):
             self.process_dependent(srv_input)
 
     def __init__(self, *args, **kwargs):
@@ -47,7 +47,9 @@ class ServiceSubmissionForm(forms.ModelForm):
             init_fields.append('email')
         self.fields['title'].initial = 'Job %s' % random_analysis_name()
         self.fields['slug'].initial = str(self.instance.slug)
-        self.list_inputs = list(self.instance.expected_inputs.order_by('-required', 'order'))
+        # compiled schema, shared through cache: inputs are loaded once, with their dependents and samples
+        self.schema = self.instance.schema
+        self.list_inputs = list(self.schema.form_inputs)
         self.helper.init_layout(fields=self.fields)
 
         extra_fields = []
@@ -56,7 +58,7 @@ class ServiceSubmissionForm(forms.ModelForm):
             self.fields.update(service_input.form_widget(self.data.get(service_input.api_name, None)))
             self.helper.set_layout(service_input)
 
-            for dependent_input in service_input.dependents_inputs.exclude(required=None):
+            for dependent_input in self.schema.dependents(service_input):
                 self.process_dependent(dependent_input)
         self.list_inputs.extend(extra_fields)
         self.helper.end_layout()
@@ -3,10 +3,11 @@ from __future__ import unicode_literals
 
 from ..base import SubcommandDispatcher
 from ..command import JobQueueCommand, PurgeDaemonCommand
-from ..subcommands import CleanUpCommand, ImportCommand, DumpConfigCommand, ShowUrlsCommand
+from ..subcommands import CleanUpCommand, ImportCommand, DumpConfigCommand, ShowUrlsCommand, CountersCommand
 
 CLEAN = 'clean'
 CONFIG = 'config'
+COUNTERS = 'counters'
 DUMP = 'dump'
 LOAD = 'load'
 QUEUE = 'queue'
@@ -17,7 +18,7 @@ SHOWURLS = 'show_urls'
 class Command(SubcommandDispatcher):
     """ WAVES dedicated administration Django subcommand line interface (./manage.py) """
     help = 'WAVES Administration dedicated commands: type manage.py waves <sub_command> --help for sub-commands help'
-    command_list = (CLEAN, CONFIG, LOAD, SHOWURLS)
+    command_list = (CLEAN, CONFIG, COUNTERS, LOAD, SHOWURLS)
 
     def _subcommand(self, name):
         if name == CLEAN:
@@ -28,6 +29,8 @@ class Command(SubcommandDispatcher):
             return ImportCommand()
         elif name == CONFIG:
             return DumpConfigCommand()
+        elif name == COUNTERS:
+            return CountersCommand()
         elif name == PURGE:
             return PurgeDaemonCommand()
         elif name == SHOWURLS:
@@ -6,15 +6,16 @@ import logging
 import os
 import signal
 import time
-from itertools import chain
 
 from daemons.prefab import run
 
 import waves.wcore.exceptions
 from waves.wcore.adaptors.exceptions import AdaptorException
 from waves.wcore.adaptors.const import JobStatus
-from waves.wcore.models import Job
+from waves.wcore.models import Job, Upload
 from waves.wcore.settings import waves_settings
+from waves.wcore.utils.purge import purge_expired_jobs, evict_jobs
+from waves.wcore.utils.webhooks import deliver_webhooks
 
 logger = logging.getLogger('waves.daemon')
 LOG = logging.getLogger('daemons')
@@ -105,8 +106,8 @@ class JobQueueRunDaemon(BaseRunDaemon):
 
         :return: None
         """
-        jobs = Job.objects.prefetch_related('job_inputs'). \
-            prefetch_related('outputs').filter(_status__lt=JobStatus.JOB_TERMINATED)
+        jobs = Job.objects.get_unfinished_jobs().prefetch_related('job_inputs'). \
+            prefetch_related('outputs')
         if jobs.count() > 0:
             logger.info("Starting queue process with %i(s) unfinished jobs", jobs.count())
         for job in jobs:
@@ -142,6 +143,12 @@ class JobQueueRunDaemon(BaseRunDaemon):
                 job.check_send_mail()
                 if runner is not None:
                     runner.disconnect()
+        try:
+            delivered, failed = deliver_webhooks()
+            if delivered or failed:
+                logger.info("Webhooks: %d delivered, %d failed", delivered, failed)
+        except Exception as exc:
+            logger.exception('Webhooks delivery raised unrecoverable exception %s', exc)
         time.sleep(5)
 
 
@@ -152,12 +159,13 @@ class PurgeDaemon(BaseRunDaemon):
 
     def loop_callback(self):
         logger.info("Purge job launched at: %s", datetime.datetime.now().strftime('%A, %d %B %Y %H:%M:%I'))
-        date_anonymous = datetime.date.today() - datetime.timedelta(waves_settings.KEEP_ANONYMOUS_JOBS)
-        date_registered = datetime.date.today() - datetime.timedelta(waves_settings.KEEP_REGISTERED_JOBS)
-        anonymous = Job.objects.filter(client__isnull=True, updated__lt=date_anonymous)
-        registered = Job.objects.filter(client__isnull=False, updated__lt=date_registered)
-        for job in list(chain(*[anonymous, registered])):
-            logger.info('Deleting job %s created on %s', job.slug, job.created)
-            job.delete()
+        deleted, removed = purge_expired_jobs()
+        logger.info("Purge deleted %d jobs, %d directories removed", deleted, removed)
+        expired_uploads = Upload.objects.purge_expired()
+        if expired_uploads:
+            logger.info("Purge deleted %d expired uploads", expired_uploads)
+        evicted, freed = evict_jobs()
+        if evicted:
+            logger.info("Disk usage watermark reached, %d jobs evicted (%d bytes)", evicted, freed)
         logger.info("Purge job terminated at: %s", datetime.datetime.now().strftime('%A, %d %B %Y %H:%M:%I'))
         time.sleep(waves_settings.PURGE_WAIT)
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
 
+import datetime
 import json
 import logging
 import os
@@ -9,26 +10,62 @@ import uuid
 from shutil import rmtree
 
 # noinspection PyProtectedMember,PyProtectedMember
+from django.conf import settings
 from django.conf.urls import RegexURLPattern, RegexURLResolver
 from django.core import urlresolvers
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.management import BaseCommand
 from django.core.management import CommandError
 from django.db import (
     DEFAULT_DB_ALIAS, transaction,
 )
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework.exceptions import ValidationError
 
 from waves.wcore.management.utils import choice_input
-from waves.wcore.models import Job
+from waves.wcore.models import Job, JobCounter
 from waves.wcore.import_export.services import ServiceSerializer
 from waves.wcore.settings import waves_settings as config
+from waves.wcore.utils.purge import DirectoryRemover
 
-__all__ = ['CleanUpCommand', 'ImportCommand', 'DumpConfigCommand', 'ShowUrlsCommand']
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+__all__ = ['CleanUpCommand', 'ImportCommand', 'DumpConfigCommand', 'ShowUrlsCommand', 'CountersCommand']
 
 logger = logging.getLogger(__name__)
 
 
+def job_dir_names(base_dir):
+    """ Stream directory names in jobs base dir, using scandir when available """
+    if scandir is None:
+        for dir_name in os.listdir(base_dir):
+            if os.path.isdir(os.path.join(base_dir, dir_name)):
+                yield dir_name
+    else:
+        for entry in scandir(base_dir):
+            if entry.is_dir():
+                yield entry.name
+
+
+def known_job_slugs(queryset=None, chunk_size=10000):
+    """ Load all jobs (or queryset jobs) slugs in a set, by chunks of chunk_size """
+    queryset = Job.objects.all() if queryset is None else queryset
+    slugs = set()
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'slug')[:chunk_size])
+        if not chunk:
+            return slugs
+        slugs.update(slug for _, slug in chunk)
+        last_pk = chunk[-1][0]
+
+
 class CleanUpCommand(BaseCommand):
     """ Clean up file system according to jobs in database """
     help = "Clean up inconsistent data on disk related to jobs"
@@ -37,20 +74,63 @@ class CleanUpCommand(BaseCommand):
     def print_file_error(self, islink, path, exe_info):
         self.stderr.write("Unable to remove dir %s (%s)" % (path, exe_info))
 
+    @property
+    def base_dir(self):
+        """ Jobs base dir, read from current settings """
+        from waves.wcore.settings import waves_settings
+        return waves_settings.JOB_BASE_DIR
+
     def add_arguments(self, parser):
-        parser.add_argument('--to-date', default=None, help="Restrict purge to a date (anterior)")
+        parser.add_argument('--to-date', default=None, help="Restrict clean up to jobs created / directories modified before this date "
+                                 "(YYYY-MM-DD[ HH:MM])")
+        parser.add_argument('--yes', action='store_true', default=False,
+                            help="Do not prompt, remove orphan directories")
+        parser.add_argument('--parallel', type=int, default=1, help="Number of parallel directory removals")
+        parser.add_argument('--delete-missing', action='store_true', default=False,
+                            help="Delete jobs whose working directory is missing")
 
     def handle(self, *args, **options):
+        to_date = None
+        if options.get('to_date'):
+            to_date = parse_datetime(options['to_date']) or parse_date(options['to_date'])
+            if to_date is None:
+                raise CommandError("Invalid date %s, expected YYYY-MM-DD[ HH:MM]" % options['to_date'])
+            if not isinstance(to_date, datetime.datetime):
+                to_date = datetime.datetime.combine(to_date, datetime.time())
+            if settings.USE_TZ and timezone.is_naive(to_date):
+                to_date = timezone.make_aware(to_date)
+        if not os.path.isdir(self.base_dir):
+            raise CommandError("Jobs base dir %s not found" % self.base_dir)
+        known = known_job_slugs()
+        on_disk = set()
         removed = []
-        for dir_name in os.listdir(config.JOB_BASE_DIR):
+        for dir_name in job_dir_names(self.base_dir):
             try:
-                # DO nothing, job exists in DB
-                Job.objects.get(slug=uuid.UUID('{%s}' % dir_name))
-            except ObjectDoesNotExist:
-                removed.append(str(dir_name))
+                slug = uuid.UUID('{%s}' % dir_name)
             except ValueError:
-                pass
+                continue
+            on_disk.add(slug)
+            if slug not in known and (to_date is None or self.modified_before(dir_name, to_date)):
+                removed.append(str(dir_name))
+        if to_date is None:
+            missing = known - on_disk
+        else:
+            missing = known_job_slugs(Job.objects.filter(created__lt=to_date)) - on_disk
+        if missing:
+            self.stdout.write("%i job(s) without working directory" % len(missing))
+            if options.get('delete_missing'):
+                if not on_disk:
+                    # most likely an unmounted / misconfigured jobs base dir, not jobs data loss
+                    raise CommandError("No job directory found in %s, refusing to delete jobs" %
+                                       self.base_dir)
+                missing = list(missing)
+                for i in range(0, len(missing), 500):
+                    Job.objects.filter(slug__in=missing[i:i + 500]).delete()
+                self.stdout.write("Deleted %i job(s) without working directory" % len(missing))
         if len(removed) > 0:
+            if options.get('yes'):
+                self.remove_dirs(removed, options.get('parallel'))
+                return
             while True:
                 choice = choice_input(
                     "%i directory(ies) to be deleted, this operation is not reversible" % len(removed), choices=[
@@ -61,20 +141,46 @@ class CleanUpCommand(BaseCommand):
                 if choice == 1:
                     self.stdout.write("Directories to delete: ")
                     for dir_name in removed:
-                        self.stdout.write(os.path.join(config.JOB_BASE_DIR, dir_name))
+                        self.stdout.write(os.path.join(self.base_dir, dir_name))
                 elif choice == 2:
-                    for dir_name in removed:
-                        self.stdout.write('Removed directory: %s' % dir_name)
-                        # onerror(os.path.islink, path, sys.exc_info())
-                        rmtree(os.path.join(config.JOB_BASE_DIR, dir_name),
-                               onerror=self.print_file_error)
+                    self.remove_dirs(removed, options.get('parallel'))
                     removed = []
                 else:
                     break
             self.stdout.write("...Bye")
-        else:
+        elif not missing:
             self.stdout.write("Your jobs data dir is sane, nothing wrong here")
 
+    def modified_before(self, dir_name, to_date):
+        """ Whether job directory was last modified before to_date """
+        modified = os.path.getmtime(os.path.join(self.base_dir, dir_name))
+        if timezone.is_aware(to_date):
+            return datetime.datetime.fromtimestamp(modified, timezone.utc) < to_date
+        return datetime.datetime.fromtimestamp(modified) < to_date
+
+    def remove_dirs(self, removed, parallel=1):
+        """ Remove orphan directories, with parallel workers if more than one """
+        if parallel and parallel > 1:
+            remover = DirectoryRemover(workers=parallel)
+            for dir_name in removed:
+                remover.remove(os.path.join(self.base_dir, dir_name))
+            self.stdout.write('Removed %i directories' % remover.close())
+        else:
+            for dir_name in removed:
+                self.stdout.write('Removed directory: %s' % dir_name)
+                # onerror(os.path.islink, path, sys.exc_info())
+                rmtree(os.path.join(self.base_dir, dir_name),
+                       onerror=self.print_file_error)
+
+
+class CountersCommand(BaseCommand):
+    """ Recompute denormalized jobs counters from jobs table """
+    help = "Repair jobs counters (per submission, user and status)"
+
+    def handle(self, *args, **options):
+        counters, out_of_sync = JobCounter.objects.rebuild()
+        self.stdout.write("Rebuilt %i counter(s), %i were out of sync" % (counters, out_of_sync))
+
 
 class ImportCommand(BaseCommand):
     """ Load and create a new service from a previously exported service from WAVES backoffice """
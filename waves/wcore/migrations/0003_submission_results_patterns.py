@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0002_auto_20190624_1122'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='results_include',
+            field=models.CharField(blank=True, default='', help_text='Comma separated glob patterns, ex: *.log,report_*', max_length=255, verbose_name='Include in results'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='results_exclude',
+            field=models.CharField(blank=True, default='', help_text='Comma separated glob patterns, ex: *.tmp,scratch*', max_length=255, verbose_name='Exclude from results'),
+        ),
+    ]
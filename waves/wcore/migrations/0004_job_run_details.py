@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0003_submission_results_patterns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='_run_details',
+            field=models.TextField(editable=False, null=True, verbose_name='Run details'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='wall_time',
+            field=models.FloatField(editable=False, null=True, verbose_name='Wall time (s)'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='cpu_time',
+            field=models.FloatField(editable=False, null=True, verbose_name='CPU time (s)'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='max_rss',
+            field=models.BigIntegerField(editable=False, null=True, verbose_name='Max resident memory (kB)'),
+        ),
+    ]
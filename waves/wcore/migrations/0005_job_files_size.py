@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0004_job_run_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobinput',
+            name='file_size',
+            field=models.BigIntegerField(editable=False, null=True, verbose_name='File size'),
+        ),
+        migrations.AddField(
+            model_name='joboutput',
+            name='file_size',
+            field=models.BigIntegerField(editable=False, null=True, verbose_name='File size'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0005_job_files_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='disk_usage',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Disk usage (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='last_access',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Last access'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0006_job_disk_usage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['_status', 'updated'], name='wcore_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['client', 'updated'], name='wcore_job_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['email_to', 'updated'], name='wcore_job_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated'], name='wcore_job_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['submission', '_status'], name='wcore_job_submission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobhistory',
+            index=models.Index(fields=['job', 'is_admin', 'timestamp'], name='wcore_jobhistory_public_idx'),
+        ),
+    ]
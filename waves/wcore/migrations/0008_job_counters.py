@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+import swapper
+
+
+def init_counters(apps, schema_editor):
+    Job = apps.get_model('wcore', 'Job')
+    JobCounter = apps.get_model('wcore', 'JobCounter')
+    JobCounter.objects.bulk_create([
+        JobCounter(submission_id=row['submission'], client_id=row['client'], status=row['_status'], count=row['count'])
+        for row in Job.objects.order_by().values('submission', 'client', '_status').annotate(count=Count('id'))])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        swapper.dependency('auth', 'User'),
+        swapper.dependency('wcore', 'Submission'),
+        ('wcore', '0007_job_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.IntegerField(choices=[(-1, 'Undefined'), (0, 'Created'), (1, 'Prepared'), (2, 'Queued'), (3, 'Running'), (4, 'Suspended'), (5, 'Run completed, pending data retrieval'), (6, 'Results data retrieved'), (7, 'Cancelled'), (8, 'Warnings'), (9, 'Error')], verbose_name='Job status')),
+                ('count', models.IntegerField(default=0, verbose_name='Jobs count')),
+                ('client', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job_counters', to=settings.AUTH_USER_MODEL)),
+                ('submission', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job_counters', to=swapper.get_model_name('wcore', 'Submission'))),
+            ],
+            options={
+                'verbose_name': 'Jobs counter',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobcounter',
+            unique_together=set([('submission', 'client', 'status')]),
+        ),
+        migrations.RunPython(init_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0008_job_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='callback_url',
+            field=models.URLField(blank=True, help_text='Job status changes are posted to this URL', max_length=255, null=True, verbose_name='Callback URL'),
+        ),
+        migrations.CreateModel(
+            name='JobWebhook',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=255, verbose_name='Callback URL')),
+                ('status', models.IntegerField(choices=[(-1, 'Undefined'), (0, 'Created'), (1, 'Prepared'), (2, 'Queued'), (3, 'Running'), (4, 'Suspended'), (5, 'Run completed, pending data retrieval'), (6, 'Results data retrieved'), (7, 'Cancelled'), (8, 'Warnings'), (9, 'Error')], verbose_name='Job status')),
+                ('payload', models.TextField(verbose_name='Payload')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created on')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt', models.DateTimeField(blank=True, null=True, verbose_name='Next attempt')),
+                ('delivered', models.DateTimeField(blank=True, null=True, verbose_name='Delivered on')),
+                ('response_code', models.IntegerField(blank=True, null=True, verbose_name='Response code')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Last error')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhooks', to='wcore.Job')),
+            ],
+            options={
+                'ordering': ['id'],
+                'verbose_name': 'Job webhook',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='jobwebhook',
+            index=models.Index(fields=['next_attempt'], name='wcore_jobwebhook_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wcore', '0009_job_webhooks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='File name')),
+                ('size', models.BigIntegerField(verbose_name='Size')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Offset')),
+                ('checksum', models.CharField(blank=True, default='', max_length=150, verbose_name='Checksum')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created on')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Last update')),
+                ('completed', models.DateTimeField(blank=True, null=True, verbose_name='Completed on')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+                'verbose_name': 'Upload',
+            },
+        ),
+    ]
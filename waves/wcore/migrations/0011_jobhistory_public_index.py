@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wcore', '0010_uploads'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobhistory',
+            name='wcore_jobhistory_public_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobhistory',
+            index=models.Index(fields=['job', 'is_admin', 'timestamp', 'status'], name='wcore_jobhistory_public_idx'),
+        ),
+    ]
@@ -10,6 +10,9 @@ from waves.wcore.models.binaries import ServiceBinaryFile
 from waves.wcore.models.services import SubmissionOutput, SubmissionExitCode
 from waves.wcore.models.inputs import AParam, TextParam, BooleanParam, IntegerParam, DecimalParam, ListParam
 from waves.wcore.models.jobs import JobOutput, JobInput, Job
+from waves.wcore.models.counters import JobCounter
+from waves.wcore.models.webhooks import JobWebhook
+from waves.wcore.models.uploads import Upload
 from waves.wcore.models.binaries import ServiceBinaryFile
 
 
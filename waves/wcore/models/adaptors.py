@@ -141,7 +141,9 @@ class HasAdaptorClazzMixin(WavesBaseModel):
     def from_db(cls, db, field_names, values):
         """ Executed each time a Service is restored from DB layer"""
         instance = super(HasAdaptorClazzMixin, cls).from_db(db, field_names, values)
-        instance._clazz = instance.clazz
+        if 'clazz' in field_names:
+            # only stored clazz is kept, computed ones (see HasRunnerParamsMixin) would cost queries on each load
+            instance._clazz = instance.clazz
         return instance
 
     @property
@@ -0,0 +1,96 @@
+""" Denormalized jobs counters, maintained upon job creation, status change and deletion """
+from __future__ import unicode_literals
+
+import swapper
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum, Count
+
+from waves.wcore.adaptors.const import JobStatus
+
+
+class JobCounterManager(models.Manager):
+    def increment(self, submission_id, client_id, status, delta=1):
+        """
+        Add delta to jobs counter for submission, client and status, create counter if not exists
+
+        .. note::
+            Nullable keys may lead to duplicated counters under concurrent creation, counts are always summed.
+            Missing counters are not created for negative delta (i.e. counter deleted along with its submission
+            or client).
+        """
+        updated = self.filter(submission_id=submission_id, client_id=client_id, status=status).update(
+            count=F('count') + delta)
+        if not updated and delta > 0:
+            self.create(submission_id=submission_id, client_id=client_id, status=status, count=delta)
+
+    def move(self, submission_id, client_id, from_status, to_status):
+        """ Job changed from status from_status to to_status """
+        with transaction.atomic():
+            self.increment(submission_id, client_id, from_status, -1)
+            self.increment(submission_id, client_id, to_status)
+
+    def job_count(self, status=None, **filters):
+        """
+        Return jobs count from counters
+
+        :param status: list of status to count, default to all
+        :param filters: extra counters filters (submission, client, submission__service...)
+        :return: int
+        """
+        queryset = self.filter(**filters)
+        if status is not None:
+            queryset = queryset.filter(status__in=status)
+        return queryset.aggregate(total=Sum('count'))['total'] or 0
+
+    def pending_count(self, **filters):
+        """ Return pending jobs count (see :attr:`waves.wcore.adaptors.const.JobStatus.PENDING_STATUS`) """
+        return self.job_count(JobStatus.PENDING_STATUS, **filters)
+
+    @transaction.atomic
+    def rebuild(self):
+        """
+        Recompute all counters from jobs table
+
+        :return: a tuple (number of counters, number of counters which were out of sync)
+        """
+        from waves.wcore.models import Job
+        current = {}
+        for submission_id, client_id, status, count in self.values_list('submission', 'client', 'status', 'count'):
+            key = (submission_id, client_id, status)
+            current[key] = current.get(key, 0) + count
+        counters = [JobCounter(submission_id=row['submission'], client_id=row['client'], status=row['_status'],
+                               count=row['count'])
+                    for row in Job.objects.order_by().values('submission', 'client', '_status').annotate(
+                        count=Count('id'))]
+        expected = {(c.submission_id, c.client_id, c.status): c.count for c in counters}
+        out_of_sync = len([key for key in set(current) | set(expected) if current.get(key, 0) != expected.get(key, 0)])
+        self.all().delete()
+        self.bulk_create(counters)
+        return len(counters), out_of_sync
+
+
+class JobCounter(models.Model):
+    """ Number of jobs per submission, client and status """
+
+    class Meta:
+        verbose_name = 'Jobs counter'
+        unique_together = ('submission', 'client', 'status')
+
+    objects = JobCounterManager()
+    #: Jobs submission (None for jobs whose submission has been deleted)
+    submission = models.ForeignKey(swapper.get_model_name('wcore', 'Submission'), related_name='job_counters',
+                                   null=True, on_delete=models.CASCADE)
+    #: Jobs client, None for anonymous jobs
+    client = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.CASCADE,
+                               related_name='job_counters')
+    #: Jobs status
+    status = models.IntegerField('Job status', choices=JobStatus.STATUS_LIST)
+    #: Number of jobs
+    count = models.IntegerField('Jobs count', default=0)
+
+    def __str__(self):
+        return '{}:{}:{}:{}'.format(self.submission_id, self.client_id, self.get_status_display(), self.count)
+
+    def __unicode__(self):
+        return '{}:{}:{}:{}'.format(self.submission_id, self.client_id, self.get_status_display(), self.count)
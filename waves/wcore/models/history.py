@@ -43,6 +43,10 @@ class JobHistory(WavesBaseModel):
     class Meta:
         ordering = ['-timestamp', '-status']
         unique_together = ('job', 'timestamp', 'status', 'is_admin')
+        indexes = [
+            # public_history / last_history, matches default ordering
+            models.Index(fields=['job', 'is_admin', 'timestamp', 'status'], name='wcore_jobhistory_public_idx'),
+        ]
 
     objects = JobHistoryManager()
     #: Related :class:`waves.wcore.models.jobs.Job`
@@ -1,10 +1,12 @@
 """ WAVES job related models class objects """
 from __future__ import unicode_literals
 
+import datetime
 import json
 import logging
 import os
 import shutil
+from fnmatch import fnmatch
 from os import path as path
 from os.path import join
 
@@ -14,14 +16,15 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.core.exceptions import ValidationError
 from django.core.files.base import File
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Q, Sum, Count
+from django.utils import timezone
 from django.utils.encoding import smart_text
 from django.utils.html import format_html
 
 import waves.wcore.adaptors.exceptions
 from waves.wcore.adaptors.const import JobStatus, JobRunDetails
 from waves.wcore.exceptions import WavesException
-from waves.wcore.exceptions.jobs import JobInconsistentStateError, JobMissingMandatoryParam
+from waves.wcore.exceptions.jobs import JobInconsistentStateError, JobMissingMandatoryParam, JobQuotaExceeded
 from waves.wcore.utils.logged import LoggerClass
 from waves.wcore.models.const import OptType, ParamType
 from waves.wcore.models.base import TimeStamped, Slugged, Ordered, UrlMixin, ApiModel
@@ -29,7 +32,9 @@ from waves.wcore.models.inputs import FileInputSample
 from waves.wcore.models.services import SubmissionOutput
 from waves.wcore.settings import waves_settings
 from waves.wcore.utils import random_analysis_name
-from waves.wcore.utils.storage import allow_display_online
+from waves.wcore.utils.events import broker as events_broker
+from waves.wcore.utils.storage import allow_display_online, SharedFile
+from waves.wcore.utils.webhooks import check_callback_url
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +120,106 @@ class JobManager(models.Manager):
         # User is not supposed to be None
         return self.none()
 
+    def count_pending_jobs(self, user=None):
+        """
+        Return pending jobs count for user, as :func:`get_pending_jobs`, read from jobs counters
+        :param user: currently logged in user
+        :return: int
+        """
+        from waves.wcore.models.counters import JobCounter
+        if user and not user.is_anonymous:
+            if user.is_superuser or user.is_staff:
+                return JobCounter.objects.pending_count()
+            return JobCounter.objects.pending_count(client=user)
+        return 0
+
+    def with_public_history(self, queryset=None):
+        """
+        Prefetch jobs public history (one query for all jobs), used by :attr:`Job.public_history` and
+        :attr:`Job.last_history` instead of one query per job
+        :param queryset: jobs queryset to extend, default to all jobs
+        :return: QuerySet
+        """
+        queryset = self.all() if queryset is None else queryset
+        return queryset.prefetch_related(*self.details_lookups(inputs=False, outputs=False))
+
+    @staticmethod
+    def details_lookups(history=True, inputs=True, outputs=True):
+        """
+        Related objects lookups needed to display jobs details: public history (see :func:`with_public_history`),
+        inputs and outputs
+        :return: list of lookups, for prefetch_related
+        """
+        from waves.wcore.models.history import JobHistory
+        lookups = []
+        if history:
+            lookups.append(models.Prefetch('job_history', queryset=JobHistory.objects.filter(is_admin=False),
+                                           to_attr='_public_history'))
+        if inputs:
+            lookups.append('job_inputs')
+        if outputs:
+            lookups.append('outputs')
+        return lookups
+
+    def with_details(self, queryset=None, history=True, inputs=True, outputs=True):
+        """
+        Jobs queryset loading submission, service and related details once for all jobs (see
+        :func:`details_lookups`), so that jobs are serialized with a constant number of queries
+        :param queryset: jobs queryset to extend, default to all jobs
+        :return: QuerySet
+        """
+        queryset = self.all() if queryset is None else queryset
+        return queryset.select_related('submission__service').prefetch_related(
+            *self.details_lookups(history, inputs, outputs))
+
+    def prefetch_details(self, jobs, history=True, inputs=True, outputs=True):
+        """
+        Load submission, service and related details (see :func:`details_lookups`) for already retrieved jobs
+        :param jobs: list of jobs
+        :return: jobs
+        """
+        models.prefetch_related_objects(jobs, 'submission__service', *self.details_lookups(history, inputs, outputs))
+        return jobs
+
+    def user_disk_usage(self, user):
+        """
+        Return disk usage (in bytes) for all user jobs
+        :param user: a registered user
+        :return: int
+        """
+        return self.filter(client=user).aggregate(usage=Sum('disk_usage'))['usage'] or 0
+
+    def disk_usage_by_user(self):
+        """
+        Return disk usage aggregated by registered user (anonymous jobs are aggregated with client None)
+        :return: QuerySet of dictionaries {client, usage, jobs}
+        """
+        return self.order_by().values('client').annotate(usage=Sum('disk_usage'), jobs=Count('id'))
+
+    def disk_usage_by_service(self):
+        """
+        Return disk usage aggregated by service
+        :return: QuerySet of dictionaries {service, usage, jobs}
+        """
+        return self.order_by().values('service').annotate(usage=Sum('disk_usage'), jobs=Count('id'))
+
+    def get_unfinished_jobs(self):
+        """
+        Return jobs to process in queue (not yet terminated), ordered by status
+        :return: QuerySet
+        """
+        return self.filter(_status__lt=JobStatus.JOB_TERMINATED).order_by('_status', 'updated')
+
+    def get_expired_jobs(self):
+        """
+        Return jobs older than retention delays (KEEP_ANONYMOUS_JOBS / KEEP_REGISTERED_JOBS days since last update)
+        :return: QuerySet, ordered by id
+        """
+        date_anonymous = datetime.date.today() - datetime.timedelta(waves_settings.KEEP_ANONYMOUS_JOBS)
+        date_registered = datetime.date.today() - datetime.timedelta(waves_settings.KEEP_REGISTERED_JOBS)
+        return self.filter(Q(client__isnull=True, updated__lt=date_anonymous) |
+                           Q(client__isnull=False, updated__lt=date_registered)).order_by('pk')
+
     def get_created_job(self, extra_filter, user=None):
         """
         Return pending jobs for user, according to following access rule:
@@ -133,7 +238,7 @@ class JobManager(models.Manager):
     @transaction.atomic
     def create_from_submission(self, submission, submitted_inputs,
                                email_to=None, user=None,
-                               force_status=None, update=None):
+                               force_status=None, update=None, callback_url=None):
         """ Create a new job from service submission data and submitted inputs values
         :type update: Existing Job to extend
         :param force_status: Force initial job status
@@ -141,13 +246,26 @@ class JobManager(models.Manager):
         :param submitted_inputs: received input from client submission
         :param email_to: if given, email address to notify job process to
         :param user: associated user (may be anonymous)
+        :param callback_url: if given, url to post job status changes to, default to user's one if any
         :return: a newly create Job instance
         :rtype: :class:`waves.wcore.models.jobs.Job`
         """
         default_email = user.email if user and not user.is_anonymous() else None
         follow_email = email_to or default_email
         client = user if user and not user.is_anonymous() else None
-        mandatory_params = submission.expected_inputs.filter(required=True)
+        if not callback_url and client is not None and 'waves.authentication' in settings.INSTALLED_APPS \
+                and hasattr(client, 'waves_user'):
+            callback_url = client.waves_user.callback_url
+        if callback_url:
+            try:
+                check_callback_url(callback_url)
+            except ValueError as exc:
+                raise ValidationError({'callback_url': '%s' % exc})
+        if client is not None and waves_settings.USER_DISK_QUOTA is not None \
+                and self.user_disk_usage(client) >= waves_settings.USER_DISK_QUOTA:
+            raise JobQuotaExceeded('Disk quota exceeded, please delete some of your jobs before submitting new ones')
+        schema = submission.schema
+        mandatory_params = schema.mandatory_inputs
         missing = {m.name: '%s (:%s:) is required field' % (m.label, m.api_name) for m in mandatory_params if
                    m.api_name not in submitted_inputs.keys()}
         if len(missing) > 0:
@@ -155,58 +273,108 @@ class JobManager(models.Manager):
             logger.warning("Expected mandatory %s", [(m.label, m.api_name) for m in mandatory_params])
             logger.warning("Missing %s", [m for m in missing])
             raise ValidationError(missing)
+        from waves.wcore.models.uploads import Upload
+        uploads = Upload.objects.resolve_inputs(user, [service_input.api_name for service_input in
+                                                       schema.submitted_inputs(submitted_inputs.keys())
+                                                       if service_input.param_type == ParamType.TYPE_FILE],
+                                                submitted_inputs)
         if update is None:
-            job = Job.objects.create(email_to=follow_email,
-                                     client=client,
-                                     title=submitted_inputs.get('title', None),
-                                     submission=submission,
-                                     service=submission.service.name,
-                                     _adaptor=submission.adaptor.serialize(),
-                                     notify=submission.service.email_on)
+            job = Job(email_to=follow_email,
+                      callback_url=callback_url,
+                      client=client,
+                      title=submitted_inputs.get('title', None),
+                      submission=submission,
+                      service=submission.service.name,
+                      _adaptor=submission.adaptor.serialize(),
+                      notify=submission.service.email_on)
         else:
             job = update
+            if job.submission_id != submission.pk:
+                from waves.wcore.models.counters import JobCounter
+                JobCounter.objects.increment(job.submission_id, job.client_id, job.status, -1)
+                JobCounter.objects.increment(submission.pk, job.client_id, job.status)
             job.submission = submission
             job.adaptor = submission.adaptor
             job.notify = submission.service.email_on
             job.service = submission.service.name
+            if callback_url:
+                job.callback_url = callback_url
 
-        # First create inputs
-        submission_inputs = submission.inputs.filter(api_name__in=submitted_inputs.keys()).exclude(required=None)
-        for service_input in submission_inputs:
-            incoming_input = submitted_inputs.get(service_input.api_name, None)
-            # test service input mandatory, without default and no value
-            if service_input.required and not service_input.default and incoming_input is None:
-                raise JobMissingMandatoryParam(service_input.label, job)
-            logger.debug("Current Service Input: %s, %s", service_input, service_input.required)
-            job.logger.debug('Param %s', service_input.api_name)
-            logger.debug('Param %s', service_input.api_name)
+        try:
+            if update is None:
+                # working dir is created upon first save
+                job.save(force_insert=True)
+
+            # First create inputs
+            submission_inputs = schema.submitted_inputs(submitted_inputs.keys())
+            for service_input in submission_inputs:
+                incoming_input = uploads.get(service_input.api_name, submitted_inputs.get(service_input.api_name, None))
+                # test service input mandatory, without default and no value
+                if service_input.required and not service_input.default and incoming_input is None:
+                    raise JobMissingMandatoryParam(service_input.label, job)
+                logger.debug("Current Service Input: %s, %s", service_input, service_input.required)
+                job.logger.debug('Param %s', service_input.api_name)
+                logger.debug('Param %s', service_input.api_name)
+                if incoming_input:
+                    # transform single incoming into list to keep process iso
+                    incoming_input = [incoming_input] if type(incoming_input) != list else incoming_input
+                    for in_input in incoming_input:
+                        job.job_inputs.add(
+                            JobInput.objects.create_from_submission(job, service_input, service_input.order, in_input))
+
+            # create expected outputs
+            for service_output in submission.outputs.all():
+                job.outputs.add(
+                    JobOutput.objects.create_from_submission(job, service_output, submitted_inputs))
+            job.update_disk_usage()
+            job.logger.debug('Job %s created with %i inputs', job.slug, job.job_inputs.count())
+            if job.logger.isEnabledFor(logging.DEBUG):
+                # LOG full command line
+                logger.debug('Job %s command will be :', job.title)
+                logger.debug('Job %s command will be :', job.title)
+                logger.debug('%s %s', job.command, job.command_line_arguments)
+                logger.debug('Expected outputs will be:')
+                for j_output in job.outputs.all():
+                    logger.debug('Output %s: %s', j_output.name, j_output.value)
+                    logger.debug('Output %s: %s', j_output.name, j_output.value)
+            job._command_line = "{} {}".format(job.command, job.command_line_arguments)
+            if force_status is not None and force_status in JobStatus.STATUS_MAP.keys():
+                job.status = force_status
             job.save()
-            if incoming_input:
-                # transform single incoming into list to keep process iso
-                incoming_input = [incoming_input] if type(incoming_input) != list else incoming_input
-                for in_input in incoming_input:
-                    job.job_inputs.add(
-                        JobInput.objects.create_from_submission(job, service_input, service_input.order, in_input))
-
-        # create expected outputs
-        for service_output in submission.outputs.all():
-            job.outputs.add(
-                JobOutput.objects.create_from_submission(job, service_output, submitted_inputs))
-        job.logger.debug('Job %s created with %i inputs', job.slug, job.job_inputs.count())
-        if job.logger.isEnabledFor(logging.DEBUG):
-            # LOG full command line
-            logger.debug('Job %s command will be :', job.title)
-            logger.debug('Job %s command will be :', job.title)
-            logger.debug('%s %s', job.command, job.command_line_arguments)
-            logger.debug('Expected outputs will be:')
-            for j_output in job.outputs.all():
-                logger.debug('Output %s: %s', j_output.name, j_output.value)
-                logger.debug('Output %s: %s', j_output.name, j_output.value)
-        job._command_line = "{} {}".format(job.command, job.command_line_arguments)
-        if force_status is not None and force_status in JobStatus.STATUS_MAP.keys():
-            job.status = force_status
-        job.save()
-        return job
+            return job
+        except Exception:
+            if update is None:
+                # job creation is rolled back, so are its inputs: remove its working dir
+                shutil.rmtree(job.working_dir, ignore_errors=True)
+            raise
+
+    def create_batch(self, submission, batch_inputs, **kwargs):
+        """ Create a job for each submitted inputs set, in a single transaction: no job is created if one fails
+
+        :param submission: jobs submission
+        :param batch_inputs: list of submitted inputs (see :func:`create_from_submission`), files shared by several
+            jobs are given as :class:`waves.wcore.utils.storage.SharedFile`
+        :param kwargs: other :func:`create_from_submission` parameters, applied to all jobs
+        :return: list of created jobs
+        :raise: ValidationError, errors keys are prefixed with failing inputs set index
+        """
+        jobs = []
+        try:
+            with transaction.atomic():
+                for index, submitted_inputs in enumerate(batch_inputs):
+                    try:
+                        jobs.append(self.create_from_submission(submission, submitted_inputs, **kwargs))
+                    except ValidationError as exc:
+                        if hasattr(exc, 'error_dict'):
+                            raise ValidationError({'%s.%s' % (index, field): messages
+                                                   for field, messages in exc.message_dict.items()})
+                        raise ValidationError({'%s' % index: exc.messages})
+        except Exception:
+            # jobs rolled back, remove their working dirs
+            for job in jobs:
+                shutil.rmtree(job.working_dir, ignore_errors=True)
+            raise
+        return jobs
 
 
 class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
@@ -224,6 +392,17 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         verbose_name = 'Job'
         verbose_name_plural = "Jobs"
         ordering = ['-updated', '-created']
+        indexes = [
+            # queue / pending jobs
+            models.Index(fields=['_status', 'updated'], name='wcore_job_status_idx'),
+            # user jobs listings, registered jobs purge
+            models.Index(fields=['client', 'updated'], name='wcore_job_client_idx'),
+            models.Index(fields=['email_to', 'updated'], name='wcore_job_email_idx'),
+            # anonymous jobs purge
+            models.Index(fields=['updated'], name='wcore_job_updated_idx'),
+            # service / submission pending jobs
+            models.Index(fields=['submission', '_status'], name='wcore_job_submission_idx'),
+        ]
 
     objects = JobManager()
     #: Job Title, automatic or set by user upon submission
@@ -241,6 +420,9 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
                                related_name='clients_job', help_text='Associated registered user')
     #: Email to notify job status to
     email_to = models.EmailField('Email results', null=True, blank=True, help_text='Notify results to this email')
+    #: URL to post job status changes to (see :class:`waves.wcore.models.webhooks.JobWebhook`)
+    callback_url = models.URLField('Callback URL', max_length=255, null=True, blank=True,
+                                   help_text='Job status changes are posted to this URL')
     #: Job ExitCode (mainly for admin purpose)
     exit_code = models.IntegerField('Job system exit code', default=0, help_text="Job exit code on relative adapter")
     #: Tell whether job results files are available for download from client
@@ -259,6 +441,16 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
     service = models.CharField('Service name', max_length=255, editable=False, null=True, default="")
     #: Should Waves Notify client about Job Status
     notify = models.BooleanField("Notify this result", default=False, editable=False)
+    #: Run details retrieved from adapter once job is completed (serialized JobRunDetails)
+    _run_details = models.TextField('Run details', null=True, editable=False)
+    #: Resources usage reported by adapter
+    wall_time = models.FloatField('Wall time (s)', null=True, editable=False)
+    cpu_time = models.FloatField('CPU time (s)', null=True, editable=False)
+    max_rss = models.BigIntegerField('Max resident memory (kB)', null=True, editable=False)
+    #: Job working dir size on disk, updated at submission and results retrieval
+    disk_usage = models.BigIntegerField('Disk usage (bytes)', default=0, editable=False)
+    #: Last time job has been viewed or downloaded by client
+    last_access = models.DateTimeField('Last access', null=True, editable=False)
 
     LOG_LEVEL = waves_settings.JOB_LOG_LEVEL
 
@@ -293,7 +485,9 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
 
     @status.setter
     def status(self, value):
-        """ Set current status for job, and save state in job history
+        """ Set current status for job, and save state in job history. For saved jobs, status is saved at once and
+        jobs counters move from status found in database (this instance may be stale), job row stays locked until
+        transaction commit so that concurrent changes are counted in turn.
 
         :param value:
         :return: None
@@ -302,7 +496,20 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
             message = "[{}] {}".format(value, smart_text(self.message)) if self.message else "New job status {}".format(
                 value)
             logger.debug('JobHistory saved [%s][%s] status: %s', self.slug, self.get_status_display(), message)
-            self.job_history.create(message=message, status=value)
+            with transaction.atomic():
+                self.job_history.create(message=message, status=value)
+                # wake up status events subscribers once committed
+                transaction.on_commit(events_broker.notify)
+                if self.pk:
+                    # not yet saved jobs are counted upon creation
+                    from waves.wcore.models.counters import JobCounter
+                    from waves.wcore.models.webhooks import JobWebhook
+                    saved = Job.objects.select_for_update().filter(pk=self.pk).values_list('_status', flat=True)
+                    for saved_status in saved:
+                        Job.objects.filter(pk=self.pk).update(_status=value, updated=timezone.now())
+                        if saved_status != value:
+                            JobCounter.objects.move(self.submission_id, self.client_id, saved_status, value)
+                    JobWebhook.objects.schedule(self, value)
         self._status = value
 
     def colored_status(self):
@@ -327,8 +534,14 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
             os.chmod(self.working_dir, 0o775)
 
     def delete_job_dirs(self):
-        """ Upon job deletion in database, cleanup associated working dirs """
-        shutil.rmtree(self.working_dir, ignore_errors=True)
+        """ Upon job deletion in database, cleanup associated working dirs, in background when deleted from purge
+        process (see :func:`waves.wcore.utils.purge.purge_expired_jobs`) """
+        from waves.wcore.utils.purge import current_remover
+        remover = current_remover()
+        if remover is not None:
+            remover.remove(self.working_dir)
+        else:
+            shutil.rmtree(self.working_dir, ignore_errors=True)
 
     @classmethod
     def from_db(cls, db, field_names, values):
@@ -371,7 +584,8 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
                      api_name=the_output.get_api_name(),
                      label=the_output.name,
                      slug=the_output.slug,
-                     available=os.path.isfile(the_output.file_path) and os.path.getsize(the_output.file_path) > 0))
+                     size=the_output.current_file_size,
+                     available=the_output.available))
         return existing
 
     @property
@@ -388,6 +602,46 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         """
         return self.outputs.all()
 
+    def refresh_files_size(self):
+        """ Scan job working dir and record inputs / outputs files size """
+        for job_file in list(self.input_files) + list(self.outputs.all()):
+            job_file.refresh_file_size()
+
+    def update_disk_usage(self):
+        """ Compute and record job working dir size on disk """
+        usage = 0
+        for root, _, files in os.walk(self.working_dir):
+            for file_name in files:
+                try:
+                    usage += os.path.getsize(join(root, file_name))
+                except os.error:
+                    pass
+        self.disk_usage = usage
+        self.save(update_fields=['disk_usage'])
+        return usage
+
+    def touch(self):
+        """ Record job last access """
+        self.last_access = timezone.now()
+        Job.objects.filter(pk=self.pk).update(last_access=self.last_access)
+
+    def filter_results_files(self, file_names):
+        """ Filter remote file names to retrieve as results: declared outputs values plus submission include
+        patterns, minus submission exclude patterns
+
+        :param file_names: list of file names found in job working dir
+        :return: list of file names to retrieve
+        :rtype: list
+        """
+        includes = [output.value for output in self.outputs.all() if output.value]
+        excludes = []
+        if self.submission is not None:
+            includes += self.submission.results_include_patterns
+            excludes = self.submission.results_exclude_patterns
+        return [file_name for file_name in file_names
+                if any(fnmatch(file_name, pattern) for pattern in includes)
+                and not any(fnmatch(file_name, pattern) for pattern in excludes)]
+
     @property
     def input_params(self):
         """ Return tool params, i.e job execution parameters
@@ -514,6 +768,14 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         """
         return 'job.stderr'
 
+    @property
+    def live_output_files(self):
+        """ Files followed while job is running: standard outputs and declared progress files
+
+        :rtype: list
+        """
+        return [self.stdout, self.stderr] + list(waves_settings.JOB_PROGRESS_FILES)
+
     def create_non_editable_inputs(self):
         """
         Create non editable (i.e not submitted anywhere and used for run)
@@ -521,7 +783,7 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         :return: None
         """
         if self.submission:
-            for service_input in self.submission.inputs.filter(required=None):
+            for service_input in self.submission.schema.non_editable_inputs:
                 # Create fake "submitted_inputs" with non editable ones with default value if not already set
                 self.logger.debug('Created non editable job input: %s (%s, %s)', service_input.label,
                                   service_input.name, service_input.default)
@@ -553,15 +815,20 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
 
     @property
     def public_history(self):
-        """ Filter Job history elements for public (non `JobAdminHistory` elements)
+        """ Filter Job history elements for public (non `JobAdminHistory` elements), use prefetched ones if any
+        (see :func:`JobManager.with_public_history`)
 
-        :rtype: QuerySet
+        :rtype: QuerySet or list
         """
+        if hasattr(self, '_public_history'):
+            return self._public_history
         return self.job_history.filter(is_admin=False)
 
     @property
     def last_history(self):
         """ Retrieve last public history message """
+        if hasattr(self, '_public_history'):
+            return self._public_history[0] if self._public_history else None
         return self.public_history.first()
 
     def retry(self, message):
@@ -640,6 +907,8 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         """ Ask job adapter current job status """
         self._run_action('job_status')
         self.logger.debug('job current state :%s', self.status)
+        if self.status == JobStatus.JOB_RUNNING:
+            self.run_live_output()
         if self.status == JobStatus.JOB_COMPLETED:
             self.run_results()
         if self.status == JobStatus.JOB_UNDEFINED and self.nb_retry > waves_settings.JOBS_MAX_RETRY:
@@ -652,9 +921,18 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         self.message = 'Job cancelled'
         self._run_action('cancel_job')
 
+    def run_live_output(self):
+        """ Ask job adapter to synchronize outputs written so far by running job, failures are not retried """
+        try:
+            self.adaptor.job_live_output(self)
+        except waves.wcore.adaptors.exceptions.AdaptorException as exc:
+            self.logger.warning('Unable to synchronize live outputs: %s', exc.message)
+
     def run_results(self):
         """ Ask job adapter to get results files (dowload files if needed) """
         self._run_action('job_results')
+        self.refresh_files_size()
+        self.update_disk_usage()
         self.retrieve_run_details()
         self.logger.debug("Results %s %s %d", self.get_status_display(), self.exit_code,
                           os.stat(join(self.working_dir, self.stderr)).st_size)
@@ -667,13 +945,21 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
             self.status = JobStatus.JOB_TERMINATED
 
     def retrieve_run_details(self):
-        """ Ask job adapter to get JobRunDetails information (started, finished, exit_code ...)"""
+        """ Ask job adapter to get JobRunDetails information (started, finished, exit_code, resources usage ...)
+        Details are stored in database, and in job working dir as well"""
         if self.run_details is None:
             file_run_details = join(self.working_dir, 'job_run_details.json')
             try:
                 remote_details = self._run_action('job_run_details')
             except waves.wcore.adaptors.exceptions.AdaptorException:
+                remote_details = None
+            if remote_details is None:
                 remote_details = self.default_run_details()
+            self._run_details = json.dumps(remote_details, ensure_ascii=False)
+            self.wall_time = remote_details.wall_time
+            self.cpu_time = remote_details.cpu_time
+            self.max_rss = remote_details.max_rss
+            self.save(update_fields=['_run_details', 'wall_time', 'cpu_time', 'max_rss'])
             with open(file_run_details, 'w') as fp:
                 json.dump(obj=remote_details, fp=fp, ensure_ascii=False)
             return remote_details
@@ -681,6 +967,9 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
 
     @property
     def run_details(self):
+        """ Job JobRunDetails, as stored in database, falls back to file stored in job working dir """
+        if self._run_details:
+            return JobRunDetails(*json.loads(self._run_details))
         file_run_details = join(self.working_dir, 'job_run_details.json')
         if os.path.isfile(file_run_details):
             # Details have already been downloaded
@@ -704,6 +993,24 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         with open(join(self.working_dir, self.stderr), 'r') as fp:
             return fp.read()
 
+    def read_live_output(self, file_name, offset=0, max_size=None):
+        """ Read live output file content written since offset
+
+        :param file_name: one of live_output_files
+        :param offset: position to start reading from
+        :param max_size: max bytes to read, default to waves_settings.JOB_FOLLOW_MAX_SIZE
+        :return: a tuple (content read, new offset)
+        """
+        if file_name not in self.live_output_files:
+            raise ValueError("%s is not a followed job file" % file_name)
+        file_path = join(self.working_dir, file_name)
+        if not os.path.isfile(file_path):
+            return '', offset
+        with open(file_path, 'rb') as fp:
+            fp.seek(offset)
+            content = fp.read(max_size or waves_settings.JOB_FOLLOW_MAX_SIZE)
+        return smart_text(content, errors='replace'), offset + len(content)
+
     @property
     def allow_rerun(self):
         """ set whether current job state allow rerun """
@@ -717,9 +1024,14 @@ class Job(TimeStamped, Slugged, UrlMixin, LoggerClass):
         self.job_history.create(message='Marked for re-run', status=self.status)
         self.status = JobStatus.JOB_CREATED
         self._command_line = None
+        self._run_details = None
+        self.wall_time = self.cpu_time = self.max_rss = None
+        if os.path.isfile(join(self.working_dir, 'job_run_details.json')):
+            os.remove(join(self.working_dir, 'job_run_details.json'))
 
         for job_out in self.outputs.all():
             open(job_out.file_path, 'w').close()
+        self.outputs.update(file_size=None)
         # Reset logs
         open(self.log_file, 'w').close()
         self.save()
@@ -775,7 +1087,10 @@ class JobInputManager(models.Manager):
                           label=service_input.label,
                           value=str(submitted_input))
         if service_input.param_type == ParamType.TYPE_FILE:
-            if isinstance(submitted_input, File):
+            if isinstance(submitted_input, SharedFile):
+                # file uploaded once for several jobs
+                submitted_input.link_to(path.join(job.working_dir, submitted_input.name))
+            elif isinstance(submitted_input, File):
                 # classic uploaded file
                 filename = path.join(job.working_dir, submitted_input.name)
                 with open(filename, 'wb+') as uploaded_file:
@@ -804,10 +1119,50 @@ class JobInputManager(models.Manager):
             else:
                 logger.warn("Unable to determine usable type for input %s:%s " % (service_input.name, submitted_input))
         new_input = self.create(**input_dict)
+        if new_input.param_type == ParamType.TYPE_FILE:
+            new_input.refresh_file_size()
         return new_input
 
 
-class JobInput(Ordered, Slugged, ApiModel, UrlMixin):
+class JobFileMixin(models.Model):
+    """ Job related file, file size is recorded when scanned so that availability does not need disk access """
+
+    class Meta:
+        abstract = True
+
+    #: File size as recorded at last scan, None if never scanned
+    file_size = models.BigIntegerField('File size', null=True, editable=False)
+
+    def refresh_file_size(self, commit=True):
+        """ Scan file on disk and record its size (0 if file does not exist) """
+        try:
+            self.file_size = os.path.getsize(self.file_path) if self.file_path else 0
+        except os.error:
+            self.file_size = 0
+        if commit:
+            self.save(update_fields=['file_size'])
+        return self.file_size
+
+    @property
+    def current_file_size(self):
+        """ Recorded file size, disk is only checked when file has never been scanned """
+        if self.file_size is None:
+            try:
+                return os.path.getsize(self.file_path) if self.file_path else 0
+            except os.error:
+                return 0
+        return self.file_size
+
+    @property
+    def display_online(self):
+        return allow_display_online(self.file_path, self.current_file_size)
+
+    @property
+    def available(self):
+        return self.current_file_size > 0
+
+
+class JobInput(Ordered, Slugged, ApiModel, UrlMixin, JobFileMixin):
     """
     Job Inputs is association between a Job, a SubmissionParam, setting a value specific for this job
     """
@@ -897,7 +1252,7 @@ class JobInput(Ordered, Slugged, ApiModel, UrlMixin):
     @property
     def srv_input(self):
         if self.job.submission:
-            return self.job.submission.inputs.filter(name=self.name).first()
+            return self.job.submission.schema.get_input(name=self.name)
         raise RuntimeError('Missing submission for this job')
 
     def clean(self):
@@ -917,10 +1272,6 @@ class JobInput(Ordered, Slugged, ApiModel, UrlMixin):
             pass
         return self.value
 
-    @property
-    def display_online(self):
-        return allow_display_online(self.file_path)
-
     @property
     def download_url(self):
         if self.available:
@@ -930,8 +1281,7 @@ class JobInput(Ordered, Slugged, ApiModel, UrlMixin):
 
     @property
     def available(self):
-        return self.param_type == ParamType.TYPE_FILE and os.path.isfile(self.file_path) \
-               and os.path.getsize(self.file_path) > 0
+        return self.param_type == ParamType.TYPE_FILE and super(JobInput, self).available
 
     def get_absolute_url(self):
         """Reverse url for this Job according to Django urls configuration
@@ -991,7 +1341,7 @@ class JobOutputManager(models.Manager):
         return self.create(**output_dict)
 
 
-class JobOutput(Ordered, Slugged, UrlMixin, ApiModel):
+class JobOutput(Ordered, Slugged, UrlMixin, ApiModel, JobFileMixin):
     """ JobOutput is association fro a Job, a SubmissionOutput, and the effective value set for this Job
     """
 
@@ -1081,14 +1431,6 @@ class JobOutput(Ordered, Slugged, UrlMixin, ApiModel):
         else:
             return "#"
 
-    @property
-    def display_online(self):
-        return allow_display_online(self.file_path)
-
-    @property
-    def available(self):
-        return os.path.isfile(self.file_path) and os.path.getsize(self.file_path) > 0
-
     def duplicate_api_name(self, api_name):
         """ Check is another entity is set with same api_name
 
@@ -87,7 +87,7 @@ class HasRunnerParamsMixin(HasAdaptorClazzMixin):
     class Meta:
         abstract = True
 
-    _runner = None
+    _runner_pk = None
     runner = models.ForeignKey(Runner, verbose_name="Computing infrastructure",
                                related_name='%(app_label)s_%(class)s_runs',
                                null=True, blank=False, on_delete=models.SET_NULL,
@@ -97,7 +97,8 @@ class HasRunnerParamsMixin(HasAdaptorClazzMixin):
     def from_db(cls, db, field_names, values):
         """ Executed each time a Service is restored from DB layer"""
         instance = super(HasRunnerParamsMixin, cls).from_db(db, field_names, values)
-        instance._runner = instance.runner
+        # runner id only, runner is not loaded until needed
+        instance._runner_pk = instance.runner_id
         return instance
 
     @property
@@ -112,7 +113,9 @@ class HasRunnerParamsMixin(HasAdaptorClazzMixin):
 
     @property
     def config_changed(self):
-        return self._runner != self.get_runner() or self._clazz != self.clazz
+        """ Effective runner changed since loaded (clazz is runner's one) """
+        runner = self.get_runner()
+        return self._runner_pk != (runner.pk if runner else None)
 
     @property
     def run_params(self):
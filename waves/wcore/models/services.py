@@ -35,7 +35,20 @@ class ServiceManager(models.Manager):
 
     def get_services(self, user=None):
         """
-        Return services allowed for this specific user
+        Return services allowed for this specific user, from cached access map (see :mod:`waves.wcore.utils.access`)
+
+        :param user: current User
+        :return: services allowed for this user
+        :rtype: Django queryset
+        """
+        from waves.wcore.utils.access import get_access
+        if user is None:
+            return self.none()
+        return self.filter(pk__in=get_access(user).services)
+
+    def visible_services(self, user):
+        """
+        Return services allowed for this specific user, computed from database
 
         :param user: current User
         :return: services allowed for this user
@@ -65,6 +78,29 @@ class ServiceManager(models.Manager):
             queryset = self.filter(status=self.model.SRV_PUBLIC)
         return queryset
 
+    def available_services(self, user):
+        """
+        Return services open for job submission for this specific user, computed from database (see
+        :func:`BaseService.available_for_user`)
+
+        :param user: current User
+        :return: services available for this user
+        :rtype: Django queryset
+        """
+        if waves_settings.ALLOW_JOB_SUBMISSION is False:
+            return self.none()
+        queryset = self.filter(runner__isnull=False)
+        if user.is_superuser:
+            return queryset
+        allowed = Q(status=self.model.SRV_PUBLIC)
+        if not user.is_anonymous():
+            allowed |= Q(status=self.model.SRV_REGISTERED) | Q(status=self.model.SRV_DRAFT, created_by=user)
+            if user.is_staff:
+                allowed |= Q(status__in=(self.model.SRV_TEST, self.model.SRV_RESTRICTED))
+            else:
+                allowed |= Q(status=self.model.SRV_RESTRICTED, restricted_client__in=(user,))
+        return queryset.filter(allowed).distinct()
+
     def get_by_natural_key(self, api_name, version, status):
         return self.get(api_name=api_name, version=version, status=status)
 
@@ -197,6 +233,24 @@ class BaseService(TimeStamped, Described, ApiModel, ExportAbleMixin, HasRunnerPa
         return Job.objects.filter(submission__in=self.submissions.all(),
                                   _status__in=JobStatus.PENDING_STATUS)
 
+    @property
+    def pending_jobs_count(self):
+        """ Number of non-terminated service's related jobs, read from jobs counters
+
+        :return: int
+        """
+        from waves.wcore.models.counters import JobCounter
+        return JobCounter.objects.pending_count(submission__service=self)
+
+    @property
+    def running_jobs_count(self):
+        """ Number of running service's related jobs, read from jobs counters
+
+        :return: int
+        """
+        from waves.wcore.models.counters import JobCounter
+        return JobCounter.objects.job_count([JobStatus.JOB_RUNNING], submission__service=self)
+
     @property
     def command_parser(self):
         """ Return command parser for current service
@@ -244,10 +298,13 @@ class BaseService(TimeStamped, Described, ApiModel, ExportAbleMixin, HasRunnerPa
         :param user: Request User
         :return: boolean
         """
-        # TODO reuse manager function or use authorization dedicated class
+        if waves_settings.ALLOW_JOB_SUBMISSION is False:
+            return False
+        if self.pk is not None:
+            from waves.wcore.utils.access import get_access
+            return self.pk in get_access(user).available
         # RULES to set if user can access service page
-        # TODO reuse manager function or use authorization dedicated class
-        if waves_settings.ALLOW_JOB_SUBMISSION is False or self.get_runner() is None:
+        if self.get_runner() is None:
             return False
         if self.status == self.SRV_PUBLIC or user.is_superuser:
             return True
@@ -275,8 +332,7 @@ class BaseService(TimeStamped, Described, ApiModel, ExportAbleMixin, HasRunnerPa
 
     @property
     def running_jobs(self):
-        return self.jobs.filter(
-            status__in=[JobStatus.JOB_CREATED, JobStatus.JOB_COMPLETED])
+        return self.jobs.filter(_status=JobStatus.JOB_RUNNING)
 
     def get_admin_url(self):
         return reverse('admin:{}_{}_change'.format(self._meta.app_label, self._meta.model_name), args=[self.pk])
@@ -314,6 +370,12 @@ class BaseSubmission(TimeStamped, ApiModel, Ordered, Slugged, HasRunnerParamsMix
     availability = models.IntegerField('Availability', default=AVAILABLE_API, choices=AVAILABILITY_CHOICES)
     #: Submission label
     name = models.CharField('Label', max_length=255, null=False, blank=False)
+    #: Extra files retrieved with job results (declared outputs are always retrieved)
+    results_include = models.CharField('Include in results', max_length=255, blank=True, default='',
+                                       help_text="Comma separated glob patterns, ex: *.log,report_*")
+    #: Files never retrieved with job results
+    results_exclude = models.CharField('Exclude from results', max_length=255, blank=True, default='',
+                                       help_text="Comma separated glob patterns, ex: *.tmp,scratch*")
 
     def get_runner(self):
         """ Return the run configuration associated with this submission, or the default service one if not set
@@ -343,6 +405,28 @@ class BaseSubmission(TimeStamped, ApiModel, Ordered, Slugged, HasRunnerParamsMix
     def __unicode__(self):
         return '{}'.format(self.name)
 
+    @property
+    def results_include_patterns(self):
+        """ List of glob patterns for extra files to retrieve with job results """
+        return [pattern.strip() for pattern in self.results_include.split(',') if pattern.strip()]
+
+    @property
+    def results_exclude_patterns(self):
+        """ List of glob patterns for files never retrieved with job results """
+        return [pattern.strip() for pattern in self.results_exclude.split(',') if pattern.strip()]
+
+    @property
+    def schema(self):
+        """ Compiled submission inputs (see :class:`waves.wcore.utils.schema.SubmissionSchema`), loaded once per
+        instance
+
+        :rtype: :class:`waves.wcore.utils.schema.SubmissionSchema`
+        """
+        if getattr(self, '_schema', None) is None:
+            from waves.wcore.utils.schema import get_schema
+            self._schema = get_schema(self)
+        return self._schema
+
     @property
     def expected_inputs(self):
         """ Retrieve only expected inputs to submit a job """
@@ -391,12 +475,18 @@ class BaseSubmission(TimeStamped, ApiModel, Ordered, Slugged, HasRunnerParamsMix
         """ Get current Service Jobs """
         return self.service_jobs.filter(_status__in=JobStatus.PENDING_STATUS)
 
+    @property
+    def pending_jobs_count(self):
+        """ Number of current submission pending jobs, read from jobs counters """
+        from waves.wcore.models.counters import JobCounter
+        return JobCounter.objects.pending_count(submission=self)
+
     def form_fields(self, data):
         form_fields = collections.OrderedDict({
             'title': forms.CharField(max_length=200),
             'email': forms.EmailField()
         })
-        for in_param in self.expected_inputs.all().order_by('-required', 'order'):
+        for in_param in self.schema.form_inputs:
             form_fields.update(in_param.form_widget(data=data.get(in_param.api_name, None)))
         return form_fields
 
@@ -416,6 +506,9 @@ class BaseSubmission(TimeStamped, ApiModel, Ordered, Slugged, HasRunnerParamsMix
         :param user: Request User
         :return: True or False
         """
+        if self.pk is not None and waves_settings.ALLOW_JOB_SUBMISSION:
+            from waves.wcore.utils.access import get_access
+            return self.pk in get_access(user).submissions
         return self.service.available_for_user(user)
 
 
@@ -0,0 +1,222 @@
+""" Resumable uploads: large job inputs are uploaded by chunks (tus-like create / append at offset / complete with
+checksum), data is written directly in UPLOADS_DIR and jobs reference completed uploads instead of inline files """
+from __future__ import unicode_literals
+
+import datetime
+import hashlib
+import os
+import sys
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, connection, transaction, DatabaseError
+from django.utils import six, timezone
+from django.utils.encoding import python_2_unicode_compatible
+
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.storage import SharedFile
+
+#: Supported checksum algorithms, checksums are given as '<algorithm>:<hex digest>'
+CHECKSUM_ALGORITHMS = ('md5', 'sha1', 'sha256')
+#: Job file inputs given as 'upload:<upload id>' (or {'upload': '<upload id>'}) reference a completed upload
+REFERENCE_PREFIX = 'upload:'
+#: Size of chunks read from request streams / written to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def parse_checksum(checksum):
+    """ Split checksum into (algorithm, hex digest)
+
+    :raise: ValidationError for badly formatted / unsupported checksum
+    """
+    algorithm, _, digest = (checksum or '').partition(':')
+    if algorithm not in CHECKSUM_ALGORITHMS or not digest:
+        raise ValidationError({'checksum': 'Expected <algorithm>:<hex digest>, with algorithm in %s' %
+                                           ', '.join(CHECKSUM_ALGORITHMS)})
+    return algorithm, digest.lower()
+
+
+def upload_reference(value):
+    """ Upload id referenced by a submitted input value, None if value is not an upload reference """
+    if isinstance(value, dict):
+        return value.get('upload')
+    if isinstance(value, six.string_types) and value.startswith(REFERENCE_PREFIX):
+        return value[len(REFERENCE_PREFIX):]
+    return None
+
+
+class UploadManager(models.Manager):
+    def start(self, user, filename, size, checksum=''):
+        """ Declare a new upload, empty data file is created at once
+
+        :raise: ValidationError if upload exceeds UPLOADS_MAX_SIZE or user disk quota
+        """
+        if checksum:
+            parse_checksum(checksum)
+        if size < 0 or (waves_settings.UPLOADS_MAX_SIZE is not None and size > waves_settings.UPLOADS_MAX_SIZE):
+            raise ValidationError({'size': 'Upload size must be between 0 and %s bytes' %
+                                           waves_settings.UPLOADS_MAX_SIZE})
+        if waves_settings.USER_DISK_QUOTA is not None:
+            from waves.wcore.models import Job
+            pending = self.filter(client=user).aggregate(usage=models.Sum('size'))['usage'] or 0
+            if Job.objects.user_disk_usage(user) + pending + size > waves_settings.USER_DISK_QUOTA:
+                raise ValidationError({'size': 'Disk quota exceeded'})
+        upload = self.create(client=user, filename=os.path.basename(filename), size=size, checksum=checksum)
+        if not os.path.isdir(waves_settings.UPLOADS_DIR):
+            os.makedirs(waves_settings.UPLOADS_DIR, mode=0o775)
+        open(upload.path, 'wb').close()
+        return upload
+
+    def expired(self):
+        """ Uploads not updated for UPLOADS_EXPIRY seconds """
+        return self.filter(updated__lt=timezone.now() - datetime.timedelta(seconds=waves_settings.UPLOADS_EXPIRY))
+
+    def purge_expired(self):
+        """ Delete expired uploads and their data
+
+        :return: number of deleted uploads
+        """
+        deleted = 0
+        for upload in self.expired():
+            upload.delete()
+            deleted += 1
+        return deleted
+
+    def resolve_inputs(self, user, file_inputs, submitted_inputs):
+        """ Resolve upload references in submitted file inputs into shared files pointing to uploads data
+
+        :param user: submitting user, uploads are private
+        :param file_inputs: file inputs api names
+        :param submitted_inputs: submitted inputs dict
+        :return: dict of resolved inputs values, for inputs referencing uploads only
+        :raise: ValidationError for unknown or incomplete uploads
+        """
+        client = user if user is not None and user.is_authenticated() else None
+        resolved = {}
+        for api_name in file_inputs:
+            values = submitted_inputs.get(api_name)
+            multiple = isinstance(values, list)
+            references = [upload_reference(value) for value in (values if multiple else [values])]
+            if not any(reference is not None for reference in references):
+                continue
+            uploads = []
+            for value, upload_id in zip(values if multiple else [values], references):
+                if upload_id is not None:
+                    try:
+                        value = self.get(pk=upload_id, client=client, completed__isnull=False).as_shared_file()
+                    except (self.model.DoesNotExist, ValueError, ValidationError):
+                        raise ValidationError({api_name: 'Unknown or incomplete upload %s' % upload_id})
+                uploads.append(value)
+            resolved[api_name] = uploads if multiple else uploads[0]
+        return resolved
+
+
+@python_2_unicode_compatible
+class Upload(models.Model):
+    """ A resumable upload, data is appended at current offset until declared size is reached """
+
+    class Meta:
+        verbose_name = 'Upload'
+        ordering = ['-created']
+
+    objects = UploadManager()
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    #: Uploading user
+    client = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='uploads', on_delete=models.CASCADE)
+    #: Original file name, used for job input file
+    filename = models.CharField('File name', max_length=255)
+    #: Declared total size (bytes)
+    size = models.BigIntegerField('Size')
+    #: Bytes received so far
+    offset = models.BigIntegerField('Offset', default=0)
+    #: Expected checksum ('<algorithm>:<hex digest>'), verified upon completion
+    checksum = models.CharField('Checksum', max_length=150, blank=True, default='')
+    created = models.DateTimeField('Created on', auto_now_add=True)
+    updated = models.DateTimeField('Last update', auto_now=True)
+    #: Completion time, once all data received and checksum verified
+    completed = models.DateTimeField('Completed on', null=True, blank=True)
+
+    def __str__(self):
+        return '{} ({}/{})'.format(self.filename, self.offset, self.size)
+
+    @property
+    def path(self):
+        """ Upload data file path """
+        return os.path.join(waves_settings.UPLOADS_DIR, str(self.id))
+
+    def append(self, stream, offset, length=None):
+        """ Write data read from stream at offset, upload row is locked while writing so that concurrent requests
+        never write data at the same time: offset is checked against current one once lock is acquired, requests made
+        while upload is locked do not wait for it
+
+        :param stream: file like object
+        :param offset: client upload offset, must be current one
+        :param length: number of bytes to read (None: up to stream end)
+        :return: False if upload is locked or offset does not match current one, True otherwise
+        :raise: ValidationError if upload is completed or data exceeds declared size
+        """
+        written = 0
+        error = None
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    current = Upload.objects.select_for_update(
+                        nowait=connection.features.has_select_for_update_nowait).get(pk=self.pk)
+            except (DatabaseError, Upload.DoesNotExist):
+                # data being written by another request, or upload deleted
+                return False
+            self.offset = current.offset
+            if current.completed is not None:
+                raise ValidationError('Upload already completed')
+            if offset != current.offset:
+                return False
+            try:
+                with open(self.path, 'r+b') as data:
+                    data.seek(offset)
+                    while length is None or written < length:
+                        chunk = stream.read(COPY_BUFFER_SIZE if length is None else min(COPY_BUFFER_SIZE,
+                                                                                        length - written))
+                        if not chunk:
+                            break
+                        if offset + written + len(chunk) > self.size:
+                            raise ValidationError('Data exceeds declared upload size')
+                        data.write(chunk)
+                        written += len(chunk)
+            except Exception:
+                error = sys.exc_info()
+            # data received before an interruption is kept, client resumes from there
+            Upload.objects.filter(pk=self.pk).update(offset=offset + written, updated=timezone.now())
+        self.offset = offset + written
+        if error is not None:
+            six.reraise(*error)
+        return True
+
+    def complete(self):
+        """ Mark upload as completed once all data received, data is verified against checksum if any
+
+        :raise: ValidationError if data is incomplete or checksum does not match
+        """
+        if self.offset != self.size:
+            raise ValidationError('Upload incomplete, %s bytes received out of %s' % (self.offset, self.size))
+        if self.checksum:
+            algorithm, expected = parse_checksum(self.checksum)
+            digest = hashlib.new(algorithm)
+            with open(self.path, 'rb') as data:
+                for chunk in iter(lambda: data.read(COPY_BUFFER_SIZE), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != expected:
+                raise ValidationError({'checksum': 'Checksum mismatch'})
+        self.completed = timezone.now()
+        self.save(update_fields=['checksum', 'completed', 'updated'])
+
+    def as_shared_file(self):
+        """ Upload data to be linked into jobs working dirs """
+        return SharedFile(self.filename, self.path)
+
+    def delete(self, *args, **kwargs):
+        path = self.path
+        result = super(Upload, self).delete(*args, **kwargs)
+        if os.path.exists(path):
+            os.remove(path)
+        return result
@@ -0,0 +1,77 @@
+""" Jobs webhooks: status transitions notified to job callback url, deliveries are logged and retried """
+from __future__ import unicode_literals
+
+import json
+
+from django.db import models
+from django.utils import timezone
+
+from waves.wcore.adaptors.const import JobStatus
+from waves.wcore.settings import waves_settings
+
+
+class JobWebhookManager(models.Manager):
+    def schedule(self, job, status):
+        """
+        Record a delivery for job status transition, if job has a callback url and status is one of WEBHOOK_STATUS
+
+        :param job: job changing status
+        :param status: new job status
+        :return: created JobWebhook or None
+        """
+        if not job.callback_url or status not in waves_settings.WEBHOOK_STATUS:
+            return None
+        now = timezone.now()
+        payload = {'event': 'job.status',
+                   'job': str(job.slug),
+                   'title': job.title,
+                   'service': job.service,
+                   'status': status,
+                   'label': dict(JobStatus.STATUS_LIST).get(status),
+                   'previous_status': job.status,
+                   'timestamp': now.isoformat()}
+        return self.create(job=job, url=job.callback_url, status=status, payload=json.dumps(payload),
+                           next_attempt=now)
+
+    def pending(self):
+        """ Deliveries to attempt now, oldest first """
+        return self.filter(next_attempt__lte=timezone.now()).order_by('next_attempt', 'id')
+
+
+class JobWebhook(models.Model):
+    """ A job status notification to deliver (or delivered) to job callback url """
+
+    class Meta:
+        verbose_name = 'Job webhook'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['next_attempt'], name='wcore_jobwebhook_pending_idx'),
+        ]
+
+    objects = JobWebhookManager()
+    #: Notified job
+    job = models.ForeignKey('Job', related_name='webhooks', on_delete=models.CASCADE)
+    #: Callback url
+    url = models.URLField('Callback URL', max_length=255)
+    #: Notified job status
+    status = models.IntegerField('Job status', choices=JobStatus.STATUS_LIST)
+    #: JSON payload, as posted
+    payload = models.TextField('Payload')
+    #: Time when transition occurred
+    created = models.DateTimeField('Created on', auto_now_add=True)
+    #: Number of delivery attempts
+    attempts = models.IntegerField('Attempts', default=0)
+    #: Next delivery attempt time, None once delivered or abandoned
+    next_attempt = models.DateTimeField('Next attempt', null=True, blank=True)
+    #: Successful delivery time
+    delivered = models.DateTimeField('Delivered on', null=True, blank=True)
+    #: Last HTTP response code received
+    response_code = models.IntegerField('Response code', null=True, blank=True)
+    #: Last delivery error
+    error = models.TextField('Last error', blank=True, default='')
+
+    def __str__(self):
+        return '{}:{}:{}'.format(self.job_id, self.get_status_display(), self.url)
+
+    def __unicode__(self):
+        return '{}:{}:{}'.format(self.job_id, self.get_status_display(), self.url)
@@ -57,12 +57,23 @@ DEFAULTS = {
     'BINARIES_DIR': join(getattr(settings, 'BASE_DIR', '/tmp'), 'data', 'bin'),
     'SAMPLE_DIR': join(getattr(settings, 'BASE_DIR', '/tmp'), 'data', 'sample'),
     'UPLOAD_MAX_SIZE': 20 * 1024 * 1024,
+    'UPLOADS_DIR': join(getattr(settings, 'BASE_DIR', '/tmp'), 'data', 'uploads'),
+    'UPLOADS_MAX_SIZE': 50 * 1024 * 1024 * 1024,
+    'UPLOADS_EXPIRY': 86400,
     'HOST': HOSTNAME,
     'ADMIN_EMAIL': 'admin@your-site.com',
     'ALLOW_JOB_SUBMISSION': True,
     'APP_NAME': 'WAVES',
     'JOBS_MAX_RETRY': 5,
     'JOB_LOG_LEVEL': logging.INFO,
+    'JOB_PROGRESS_FILES': (),
+    'JOB_FOLLOW_TIMEOUT': 20,
+    'JOB_FOLLOW_MAX_SIZE': 64 * 1024,
+    'JOB_EVENTS_STREAM_TIMEOUT': 300,
+    'JOB_TIME_COMMAND': None,
+    'RESULTS_BUNDLE': False,
+    'RESULTS_TRANSFER_THREADS': 4,
+    'INPUTS_STAGING_COMPRESS': True,
     'SRV_IMPORT_LOG_LEVEL': logging.INFO,
     'KEEP_ANONYMOUS_JOBS': 30,
     'KEEP_REGISTERED_JOBS': 120,
@@ -80,6 +91,31 @@ DEFAULTS = {
         'waves.wcore.adaptors.cluster.SshKeyClusterAdaptor',
     ),
     'PURGE_WAIT': 86400,
+    'PURGE_CHUNK_SIZE': 500,
+    'PURGE_TIME_BUDGET': None,
+    'PURGE_WORKERS': 4,
+    'USER_DISK_QUOTA': None,
+    'DISK_HIGH_WATERMARK': None,
+    'DISK_LOW_WATERMARK': 0.8,
+    'EVICTION_POLICY': 'oldest',
+    'SERVICES_CACHE': 'default',
+    'SERVICES_CACHE_TIMEOUT': 300,
+    'API_FORM_MAX_AGE': 60,
+    'API_CATALOG_MAX_AGE': 60,
+    'API_COMPRESSION_MIN_SIZE': 200,
+    'API_JOBS_PAGE_SIZE': 50,
+    'API_JOBS_MAX_PAGE_SIZE': 500,
+    'API_JOBS_STATUS_MAX': 500,
+    'API_JOBS_STATUS_DELAY': 2,
+    'API_BATCH_MAX_JOBS': 1000,
+    'API_ARCHIVE_MAX_JOBS': 100,
+    # Running, Results data retrieved, Cancelled, Warnings, Error (see waves.wcore.adaptors.const.JobStatus)
+    'WEBHOOK_STATUS': (3, 6, 7, 8, 9),
+    'WEBHOOK_SECRET': None,
+    'WEBHOOK_TIMEOUT': 10,
+    'WEBHOOK_MAX_ATTEMPTS': 8,
+    'WEBHOOK_BACKOFF': 30,
+    'WEBHOOK_ALLOWED_HOSTS': (),
     'PERMISSION_CLASSES': (),
     'MAILER_CLASS': 'waves.wcore.mails.JobMailer',
 }
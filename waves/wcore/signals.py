@@ -6,18 +6,22 @@ from __future__ import unicode_literals
 import os
 import shutil
 
-from django.db.models.signals import pre_save, post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
 from waves.wcore.models import get_service_model, get_submission_model
 from waves.wcore.models.adaptors import AdaptorInitParam, HasAdaptorClazzMixin
 from waves.wcore.models.base import ApiModel
 from waves.wcore.models.binaries import ServiceBinaryFile
-from waves.wcore.models.inputs import FileInputSample, FileInput
+from waves.wcore.models.counters import JobCounter
+from waves.wcore.models.inputs import AParam, FileInputSample, FileInput, RepeatedGroup, SampleDepParam
 from waves.wcore.models.jobs import Job, JobOutput
 from waves.wcore.models.runners import Runner
-from waves.wcore.models.services import SubmissionExitCode
+from waves.wcore.models.services import SubmissionExitCode, SubmissionOutput
 from waves.wcore.utils import get_all_subclasses
+from waves.wcore.utils.access import invalidate_access
+from waves.wcore.utils.catalog import invalidate_catalog
+from waves.wcore.utils.schema import invalidate_schemas
 
 Service = get_service_model()
 Submission = get_submission_model()
@@ -44,6 +48,7 @@ def job_post_save_handler(sender, instance, created, **kwargs):
         if created:
             # create job working dirs locally
             instance.make_job_dirs()
+            JobCounter.objects.increment(instance.submission_id, instance.client_id, instance.status)
             instance.create_non_editable_inputs()
             instance.create_default_outputs()
             instance.job_history.create(message="Job defaults created", status=instance.status)
@@ -52,6 +57,7 @@ def job_post_save_handler(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Job)
 def job_post_delete_handler(sender, instance, **kwargs):
     """ post delete job handler """
+    JobCounter.objects.increment(instance.submission_id, instance.client_id, instance.status, -1)
     instance.delete_job_dirs()
 
 
@@ -87,6 +93,22 @@ def submission_post_save_handler(sender, instance, created, **kwargs):
                                                                   message='Process exit error'))
 
 
+# Services access map is invalidated upon any change in services, submissions, runners or restricted access
+for model in (Service, Submission, Runner):
+    post_save.connect(invalidate_access, model, dispatch_uid='access_save_%s' % model._meta.label_lower)
+    post_delete.connect(invalidate_access, model, dispatch_uid='access_delete_%s' % model._meta.label_lower)
+m2m_changed.connect(invalidate_access, Service.restricted_client.through, dispatch_uid='access_restricted_client')
+
+# Compiled submissions schemas are invalidated upon any change in submissions, inputs, samples
+for model in [Submission, FileInputSample, SampleDepParam, RepeatedGroup, AParam] + get_all_subclasses(AParam):
+    post_save.connect(invalidate_schemas, model, dispatch_uid='schema_save_%s' % model.__name__)
+    post_delete.connect(invalidate_schemas, model, dispatch_uid='schema_delete_%s' % model.__name__)
+
+# Services catalogs follow access maps and schemas versions, submissions outputs are only part of catalogs
+post_save.connect(invalidate_catalog, SubmissionOutput, dispatch_uid='catalog_save_submissionoutput')
+post_delete.connect(invalidate_catalog, SubmissionOutput, dispatch_uid='catalog_delete_submissionoutput')
+
+
 @receiver(post_delete, sender=FileInputSample)
 def service_sample_post_delete_handler(sender, instance, **kwargs):
     """ SubmissionSample delete handler """
@@ -34,6 +34,7 @@ logger = logging.getLogger(__name__)
         'JOB_BASE_DIR': join(settings.BASE_DIR, 'tests', 'data', 'jobs'),
         'BINARIES_DIR': join(settings.BASE_DIR, 'tests', 'data', 'bin'),
         'SAMPLE_DIR': join(settings.BASE_DIR, 'tests', 'data', 'sample'),
+        'UPLOADS_DIR': join(settings.BASE_DIR, 'tests', 'data', 'uploads'),
         'UPLOAD_MAX_SIZE': 20 * 1024 * 1024,
         'ADMIN_EMAIL': 'admin@test-waves.com',
         'ALLOW_JOB_SUBMISSION': True,
@@ -1,14 +1,29 @@
 from __future__ import unicode_literals
 
+import datetime
+import io
 import logging
 import os
+import shutil
+import tarfile
+import tempfile
+import uuid
+import zipfile
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.management import call_command, CommandError
+from django.utils import six
+from django.urls import reverse
 
 from waves.wcore.adaptors.const import JobStatus
-from waves.wcore.models import get_service_model, get_submission_model
+from waves.wcore.exceptions.jobs import JobMissingMandatoryParam
+from waves.wcore.management.subcommands import CleanUpCommand
+from waves.wcore.models import Job, JobCounter, get_service_model, get_submission_model
+from waves.wcore.settings import waves_settings
 from waves.wcore.tests.base import BaseTestCase
+from waves.wcore.utils.purge import purge_expired_jobs, evict_jobs
 
 logger = logging.getLogger(__name__)
 Service = get_service_model()
@@ -99,3 +114,212 @@ class JobsTestCase(BaseTestCase):
         logger.debug('Mail from: %s', sent_mail.from_email)
         logger.debug('Mail content: \n%s', sent_mail.body)
         job.delete()
+
+    def test_job_live_output(self):
+        job = self.create_random_job()
+        self.assertIn(job.stdout, job.live_output_files)
+        with open(os.path.join(job.working_dir, job.stdout), 'a') as fp:
+            fp.write('first line\n')
+        content, offset = job.read_live_output(job.stdout)
+        self.assertEqual(content, 'first line\n')
+        with open(os.path.join(job.working_dir, job.stdout), 'a') as fp:
+            fp.write('second line\n')
+        content, offset = job.read_live_output(job.stdout, offset)
+        self.assertEqual(content, 'second line\n')
+        content, new_offset = job.read_live_output(job.stdout, offset)
+        self.assertEqual(content, '')
+        self.assertEqual(offset, new_offset)
+        with self.assertRaises(ValueError):
+            job.read_live_output('not_followed.txt')
+        job.delete()
+
+    def test_job_results_files(self):
+        job = self.create_random_job()
+        remote_files = ['out1', 'out2', 'job.stdout', 'job.stderr', 'run.log', 'scratch.tmp', 'core']
+        self.assertEqual(sorted(job.filter_results_files(remote_files)),
+                         sorted(['out1', 'out2', 'job.stdout', 'job.stderr']))
+        job.submission.results_include = '*.log, *.tmp'
+        job.submission.results_exclude = 'scratch*'
+        job.submission.save()
+        self.assertEqual(sorted(job.filter_results_files(remote_files)),
+                         sorted(['out1', 'out2', 'job.stdout', 'job.stderr', 'run.log']))
+        job.delete()
+
+    def test_job_run_details(self):
+        # saga adaptors can not retrieve details for a never run job
+        job = self.create_random_job(runner=next(runner for runner in self.runners if 'mocks' in runner.clazz))
+        self.assertIsNone(job.run_details)
+        details = job.retrieve_run_details()
+        self.assertEqual(details.slug, str(job.slug))
+        # details are stored in database, disk file is only a fallback
+        os.remove(os.path.join(job.working_dir, 'job_run_details.json'))
+        job.refresh_from_db()
+        self.assertEqual(job.run_details.slug, str(job.slug))
+        job.re_run()
+        self.assertIsNone(job.run_details)
+        job.delete()
+
+    def test_job_output_file_size(self):
+        job = self.create_random_job()
+        output = job.outputs.get(value=job.stdout)
+        self.assertFalse(output.available)
+        with open(output.file_path, 'w') as fp:
+            fp.write('some output')
+        # never scanned, disk is checked
+        self.assertTrue(output.available)
+        job.refresh_files_size()
+        output.refresh_from_db()
+        self.assertEqual(output.file_size, len('some output'))
+        os.remove(output.file_path)
+        # recorded size is used until next refresh
+        self.assertTrue(output.available)
+        output.refresh_file_size()
+        self.assertFalse(output.available)
+        job.delete()
+
+    def test_job_outputs_archive(self):
+        job = self.create_random_job()
+        contents = {'out1': b'first output\n' * 100, 'out2': os.urandom(5000)}
+        for name, content in contents.items():
+            with open(os.path.join(job.working_dir, name), 'wb') as fp:
+                fp.write(content)
+        url = reverse('wcore:job_archive', kwargs={'unique_id': job.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(data))
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual({name: archive.read(name) for name in archive.namelist()}, contents)
+        # resumed download
+        response = self.client.get(url, HTTP_RANGE='bytes=1000-', HTTP_IF_RANGE=response['ETag'])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 1000-%d/%d' % (len(data) - 1, len(data)))
+        self.assertEqual(b''.join(response.streaming_content), data[1000:])
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=%d-' % len(data)).status_code, 416)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"changed"').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        response = self.client.get(url, {'type': 'tar.gz'})
+        archive = tarfile.open(fileobj=io.BytesIO(b''.join(response.streaming_content)), mode='r:gz')
+        self.assertEqual({member.name: archive.extractfile(member).read() for member in archive.getmembers()},
+                         contents)
+        job.delete()
+
+    def test_purge_jobs(self):
+        expired = [self.create_random_job() for _ in range(3)]
+        kept = self.create_random_job()
+        Job.objects.filter(pk__in=[job.pk for job in expired]).update(
+            updated=datetime.datetime.now() - datetime.timedelta(waves_settings.KEEP_ANONYMOUS_JOBS + 1))
+        progress = []
+        deleted, removed = purge_expired_jobs(chunk_size=2, progress=lambda *args: progress.append(args))
+        self.assertEqual(deleted, 3)
+        self.assertEqual(removed, 3)
+        self.assertEqual(len(progress), 2)
+        self.assertFalse(Job.objects.filter(pk__in=[job.pk for job in expired]).exists())
+        self.assertTrue(all(not os.path.isdir(job.working_dir) for job in expired))
+        self.assertTrue(os.path.isdir(kept.working_dir))
+        kept.delete()
+
+    def test_cleanup_command(self):
+        kept = self.create_random_job()
+        missing = self.create_random_job()
+        shutil.rmtree(missing.working_dir)
+        orphan_dir = os.path.join(os.path.dirname(kept.working_dir), str(uuid.uuid4()))
+        os.makedirs(orphan_dir)
+        yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+        # nothing older than date
+        output = six.StringIO()
+        call_command(CleanUpCommand(), yes=True, delete_missing=True, to_date=yesterday, stdout=output)
+        self.assertNotIn('without working directory', output.getvalue())
+        self.assertTrue(os.path.isdir(orphan_dir))
+        self.assertTrue(Job.objects.filter(pk=missing.pk).exists())
+        # orphan directories removed, missing jobs only reported unless asked for
+        output = six.StringIO()
+        call_command(CleanUpCommand(), yes=True, stdout=output)
+        self.assertIn('1 job(s) without working directory', output.getvalue())
+        self.assertFalse(os.path.isdir(orphan_dir))
+        self.assertTrue(os.path.isdir(kept.working_dir))
+        self.assertTrue(Job.objects.filter(pk=missing.pk).exists())
+        # jobs are not deleted when no job directory is found at all (i.e. unmounted base dir)
+        empty_dir = tempfile.mkdtemp()
+        with self.settings(WAVES_CORE=dict(settings.WAVES_CORE, JOB_BASE_DIR=empty_dir)):
+            with self.assertRaises(CommandError):
+                call_command(CleanUpCommand(), yes=True, delete_missing=True, stdout=six.StringIO())
+        os.rmdir(empty_dir)
+        self.assertEqual(Job.objects.filter(pk__in=[kept.pk, missing.pk]).count(), 2)
+        call_command(CleanUpCommand(), yes=True, delete_missing=True, stdout=six.StringIO())
+        self.assertFalse(Job.objects.filter(pk=missing.pk).exists())
+        self.assertTrue(Job.objects.filter(pk=kept.pk).exists())
+        with self.assertRaises(CommandError):
+            call_command(CleanUpCommand(), to_date='not a date', stdout=six.StringIO())
+        kept.delete()
+
+    def test_batch_rollback(self):
+        submission = self.create_random_service().default_submission
+        base_dir = os.path.dirname(self.create_random_job(service=submission.service).working_dir)
+        dirs = set(os.listdir(base_dir))
+        count = Job.objects.count()
+        # second job fails once created: none is kept, neither are working dirs
+        with self.assertRaises(JobMissingMandatoryParam):
+            Job.objects.create_batch(submission, [{'param1': 'Value1', 'param2': True, 'param3': 'file.txt'},
+                                                  {'param1': 'Value2', 'param2': True, 'param3': None}])
+        self.assertEqual(Job.objects.count(), count)
+        self.assertEqual(set(os.listdir(base_dir)), dirs)
+
+    def test_disk_usage_eviction(self):
+        user = User.objects.create(username='DiskUser', is_active=True)
+        small = self.create_random_job(user=user)
+        large = self.create_random_job(user=user)
+        with open(os.path.join(large.working_dir, 'big_output'), 'w') as fp:
+            fp.write('x' * 4096)
+        for job in (small, large):
+            job.update_disk_usage()
+            job.status = JobStatus.JOB_TERMINATED
+            job.save()
+        self.assertGreater(large.disk_usage, small.disk_usage)
+        self.assertEqual(Job.objects.user_disk_usage(user), small.disk_usage + large.disk_usage)
+        self.assertEqual(Job.objects.disk_usage_by_user().get(client=user.pk)['jobs'], 2)
+        # no watermark reached
+        self.assertEqual(evict_jobs(high_watermark=1.0), (0, 0))
+        # watermark always reached, only one job to free enough space: largest one
+        evicted, freed = evict_jobs(policy='largest', high_watermark=0.0, low_watermark=1.0)
+        self.assertEqual(evicted, 1)
+        self.assertEqual(freed, large.disk_usage)
+        self.assertFalse(Job.objects.filter(pk=large.pk).exists())
+        self.assertFalse(os.path.isdir(large.working_dir))
+        small.delete()
+
+    def test_job_counters(self):
+        user = User.objects.create(username='CounterUser', is_active=True)
+        job = self.create_random_job(user=user)
+        other = self.create_random_job(service=job.submission.service)
+        service = job.submission.service
+        self.assertEqual(service.pending_jobs_count, 2)
+        self.assertEqual(job.submission.pending_jobs_count, 2)
+        self.assertEqual(Job.objects.count_pending_jobs(user), 1)
+        job.status = JobStatus.JOB_RUNNING
+        job.save()
+        self.assertEqual(service.running_jobs_count, 1)
+        self.assertEqual(service.pending_jobs_count, 2)
+        job.status = JobStatus.JOB_TERMINATED
+        job.save()
+        self.assertEqual(service.running_jobs_count, 0)
+        self.assertEqual(service.pending_jobs_count, service.pending_jobs.count())
+        self.assertEqual(Job.objects.count_pending_jobs(user), 0)
+        # transition made from a stale instance is counted from status saved in database
+        stale = Job.objects.get(pk=other.pk)
+        other.status = JobStatus.JOB_RUNNING
+        other.save()
+        stale.status = JobStatus.JOB_TERMINATED
+        self.assertEqual(Job.objects.get(pk=other.pk).status, JobStatus.JOB_TERMINATED)
+        self.assertEqual(service.running_jobs_count, 0)
+        self.assertEqual(JobCounter.objects.job_count([JobStatus.JOB_TERMINATED], submission__service=service), 2)
+        # deleted jobs are counted out from their loaded status
+        other.refresh_from_db()
+        other.delete()
+        self.assertEqual(service.pending_jobs_count, 0)
+        # counters drift (i.e. direct updates) is repaired
+        Job.objects.filter(pk=job.pk).update(_status=JobStatus.JOB_QUEUED)
+        self.assertEqual(JobCounter.objects.rebuild(), (1, 2))
+        self.assertEqual(Job.objects.count_pending_jobs(user), 1)
+        job.delete()
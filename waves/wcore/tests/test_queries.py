@@ -0,0 +1,61 @@
+from __future__ import unicode_literals
+
+import datetime
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from waves.wcore.adaptors.const import JobStatus
+from waves.wcore.models import Job
+from waves.wcore.tests.base import BaseTestCase
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+class JobQueriesTestCase(BaseTestCase):
+    """ Check hot jobs queries count and their execution plans """
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            elif connection.vendor == 'postgresql':
+                # Test tables are tiny, force planner to consider indexes
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql, params)
+            else:
+                self.skipTest('No query plan check for %s' % connection.vendor)
+            plan = ' '.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+        logger.debug('Query plan: %s', plan)
+        return plan
+
+    def assertUsesIndex(self, queryset, *indexes):
+        plan = self.explain(queryset)
+        self.assertTrue(any(index in plan for index in indexes), "None of %s used in plan: %s" % (indexes, plan))
+
+    def test_jobs_queries(self):
+        user = User.objects.create(username='QueryUser', email='query@fake.com', is_active=True)
+        job = self.create_random_job(user=user)
+        other = self.create_random_job()
+        with self.assertNumQueries(1):
+            list(Job.objects.get_user_job(user))
+        with self.assertNumQueries(1):
+            list(Job.objects.get_pending_jobs(user))
+        with self.assertNumQueries(1):
+            list(Job.objects.get_expired_jobs().values_list('pk', flat=True))
+        with self.assertNumQueries(1):
+            job.last_history
+        self.assertUsesIndex(Job.objects.get_unfinished_jobs(), 'wcore_job_status_idx')
+        self.assertUsesIndex(Job.objects.filter(client=user), 'wcore_job_client_idx')
+        self.assertUsesIndex(Job.objects.filter(email_to=user.email), 'wcore_job_email_idx')
+        self.assertUsesIndex(Job.objects.filter(client__isnull=True, updated__lt=datetime.date.today()),
+                             'wcore_job_client_idx', 'wcore_job_updated_idx')
+        self.assertUsesIndex(Job.objects.filter(submission=job.submission, _status__in=JobStatus.PENDING_STATUS),
+                             'wcore_job_submission_idx')
+        self.assertUsesIndex(job.public_history, 'wcore_jobhistory_public_idx')
+        self.assertUsesIndex(job.job_history.filter(is_admin=False)[:1], 'wcore_jobhistory_public_idx')
+        job.delete()
+        other.delete()
@@ -2,6 +2,8 @@ from __future__ import unicode_literals
 
 import logging
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from waves.wcore.models import get_service_model, get_submission_model
@@ -121,3 +123,73 @@ class ServicesTestCase(BaseTestCase):
         _test_access(url, 200, 'admin')
         _test_access(url, 200, 'api_user')
         logger.debug('Test PUBLIC status OK')
+
+    def test_access_cache(self):
+        service = self.create_random_service()
+        service.status = service.SRV_RESTRICTED
+        service.save()
+        api_user = self.users['api_user']
+        self.assertNotIn(service, Service.objects.get_services(api_user))
+        self.assertIn(service, Service.objects.get_services(self.users['admin']))
+        # cached access map: only services query is issued
+        with self.assertNumQueries(1):
+            list(Service.objects.get_services(self.users['admin']).values_list('pk', flat=True))
+        submission = service.default_submission
+        with self.assertNumQueries(0):
+            self.assertFalse(submission.available_for_user(api_user))
+        # restricted client changes invalidate access map
+        service.restricted_client.add(api_user)
+        self.assertIn(service, Service.objects.get_services(api_user))
+        self.assertTrue(service.available_for_user(api_user))
+        self.assertTrue(submission.available_for_user(api_user))
+        service.runner = None
+        service.save()
+        self.assertIn(service, Service.objects.get_services(api_user))
+        self.assertFalse(service.available_for_user(api_user))
+
+    def test_submission_schema(self):
+        from waves.wcore.forms.services import ServiceSubmissionForm
+        from waves.wcore.models.inputs import IntegerParam, TextParam
+        service = self.create_random_service()
+        submission = service.default_submission
+        parent = submission.inputs.get(name='param2')
+        dependent = TextParam.objects.create(name='param_dep', label='Dependent', submission=submission,
+                                             parent=parent, when_value='True')
+        schema = Submission.objects.get(pk=submission.pk).schema
+        self.assertEqual([param.name for param in schema.expected_inputs],
+                         [param.name for param in submission.expected_inputs])
+        self.assertEqual([param.name for param in schema.dependents(parent)], ['param_dep'])
+        # compiled schema is cached, rendering a form does not walk inputs in DB anymore
+        form_submission = Submission.objects.get(pk=submission.pk)
+        form_submission.schema
+        with self.assertNumQueries(0):
+            dep = form_submission.schema.get_input(name='param_dep')
+            self.assertEqual(dep.parent.name, 'param2')
+            self.assertEqual(dep.parent.dependents_inputs.count(), 1)
+            self.assertEqual(form_submission.schema.get_input(name='param3').input_samples.count(), 0)
+        form = ServiceSubmissionForm(instance=form_submission, parent=service)
+        self.assertIn('param_dep', form.fields)
+        # inputs changes invalidate schema
+        IntegerParam.objects.create(name='param4', label='New', submission=submission)
+        self.assertIn('param4', [param.name for param in Submission.objects.get(pk=submission.pk).schema.inputs])
+        dependent.delete()
+        self.assertIsNone(Submission.objects.get(pk=submission.pk).schema.get_input(name='param_dep'))
+
+    def test_override_templates(self):
+        from waves.wcore.utils.templates import resolve_template, clear_templates_cache
+        clear_templates_cache()
+        self.assertEqual(resolve_template('waves/override/service_missing_details.html',
+                                          'waves/services/service_details.html'),
+                         ['waves/services/service_details.html'])
+        self.assertEqual(resolve_template('waves/services/service_form.html', 'waves/services/service_details.html'),
+                         ['waves/services/service_form.html'])
+        service = self.create_random_service()
+        service.status = service.SRV_PUBLIC
+        service.save()
+        # service retrieved once per request, whatever the number of override templates candidates
+        url = reverse('wcore:service_details', kwargs={'service_app_name': service.api_name})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertTemplateUsed(response, 'waves/services/service_details.html')
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if '"api_name" = ' in query['sql'] and 'wcore_service' in query['sql']]), 1)
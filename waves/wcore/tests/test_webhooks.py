@@ -0,0 +1,159 @@
+from __future__ import unicode_literals
+
+import json
+import threading
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from waves.wcore.adaptors.const import JobStatus
+from waves.wcore.models import Job
+from waves.wcore.models.webhooks import JobWebhook
+from waves.wcore.settings import waves_settings
+from waves.wcore.tests.base import BaseTestCase
+from waves.wcore.utils.webhooks import deliver_webhooks, deliver, sign, check_callback_url, post_payload, \
+    resolve_callback_host, SIGNATURE_HEADER
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """ Local callback receiver: record received requests, reply with queued response codes (default 200),
+    redirections point to /redirected """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.received.append((self.headers, body))
+        code = self.server.responses.pop(0) if self.server.responses else 200
+        self.send_response(code)
+        if 300 <= code < 400:
+            self.send_header('Location', '/redirected')
+        self.end_headers()
+
+    do_GET = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+class WebhooksTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(WebhooksTestCase, self).setUp()
+        self.server = HTTPServer(('127.0.0.1', 0), CallbackHandler)
+        self.server.received = []
+        self.server.responses = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.callback_url = 'http://127.0.0.1:%s/callback' % self.server.server_port
+        self.allowed_hosts = waves_settings.WEBHOOK_ALLOWED_HOSTS
+        waves_settings.WEBHOOK_ALLOWED_HOSTS = ('127.0.0.1',)
+
+    def tearDown(self):
+        waves_settings.WEBHOOK_ALLOWED_HOSTS = self.allowed_hosts
+        self.server.shutdown()
+        self.server.server_close()
+        super(WebhooksTestCase, self).tearDown()
+
+    def test_webhook_delivery(self):
+        job = self.create_random_job()
+        job.callback_url = self.callback_url
+        job.save()
+        job.status = JobStatus.JOB_QUEUED
+        job.save()
+        # not a notified status
+        self.assertEqual(job.webhooks.count(), 0)
+        job.status = JobStatus.JOB_RUNNING
+        job.save()
+        webhook = job.webhooks.get()
+        self.server.responses = [500]
+        self.assertEqual(deliver_webhooks(), (0, 1))
+        webhook.refresh_from_db()
+        self.assertEqual((webhook.attempts, webhook.response_code), (1, 500))
+        self.assertGreater(webhook.next_attempt, timezone.now())
+        # retried only after backoff delay
+        self.assertEqual(deliver_webhooks(), (0, 0))
+        JobWebhook.objects.filter(pk=webhook.pk).update(next_attempt=timezone.now())
+        self.assertEqual(deliver_webhooks(), (1, 0))
+        webhook.refresh_from_db()
+        self.assertIsNotNone(webhook.delivered)
+        self.assertIsNone(webhook.next_attempt)
+        headers, body = self.server.received[-1]
+        self.assertEqual(headers[SIGNATURE_HEADER], sign(body))
+        payload = json.loads(body.decode('utf-8'))
+        self.assertEqual((payload['job'], payload['status'], payload['previous_status']),
+                         (str(job.slug), JobStatus.JOB_RUNNING, JobStatus.JOB_QUEUED))
+        self.assertEqual(len(self.server.received), 2)
+
+        # unreachable callback is abandoned after max attempts
+        job.status = JobStatus.JOB_ERROR
+        webhook = job.webhooks.get(status=JobStatus.JOB_ERROR)
+        webhook.url = 'http://127.0.0.1:1/callback'
+        webhook.attempts = waves_settings.WEBHOOK_MAX_ATTEMPTS - 1
+        self.assertFalse(deliver(webhook))
+        self.assertIsNone(webhook.next_attempt)
+        self.assertIn('Delivery error', webhook.error)
+        job.delete()
+
+    def test_callback_url(self):
+        service = self.create_random_service()
+        user = self.users['api_user']
+        user.waves_user.callback_url = self.callback_url
+        user.waves_user.save()
+        params = {'param1': 'Value1', 'param2': True, 'param3': 'file.txt'}
+        job = Job.objects.create_from_submission(service.default_submission, params, user=user)
+        self.assertEqual(job.callback_url, self.callback_url)
+        other = Job.objects.create_from_submission(service.default_submission, params, user=user,
+                                                   callback_url='https://example.com/hook')
+        self.assertEqual(other.callback_url, 'https://example.com/hook')
+        job.delete()
+        other.delete()
+        with self.assertRaises(ValidationError):
+            Job.objects.create_from_submission(service.default_submission, params,
+                                               callback_url='ftp://example.com/hook')
+        # internal hosts are refused unless allowed
+        for url in ('http://localhost:8000/hook', 'http://10.1.2.3/hook', 'http://169.254.169.254/latest',
+                    'http://[::1]/hook', 'http://[::ffff:127.0.0.1]/hook'):
+            with self.assertRaises(ValueError):
+                check_callback_url(url)
+        check_callback_url('http://8.8.8.8/hook')
+        waves_settings.WEBHOOK_ALLOWED_HOSTS = ()
+        with self.assertRaises(ValidationError):
+            Job.objects.create_from_submission(service.default_submission, params, callback_url=self.callback_url)
+
+    def test_refused_delivery(self):
+        job = self.create_random_job()
+        job.callback_url = self.callback_url
+        job.save()
+        job.status = JobStatus.JOB_RUNNING
+        job.save()
+        # allowed host removed after job submission
+        waves_settings.WEBHOOK_ALLOWED_HOSTS = ()
+        self.assertEqual(deliver_webhooks(), (0, 1))
+        webhook = job.webhooks.get()
+        self.assertIn('Delivery refused', webhook.error)
+        self.assertIsNone(webhook.next_attempt)
+        self.assertEqual(self.server.received, [])
+        job.delete()
+
+    def test_delivery_target(self):
+        job = self.create_random_job()
+        job.callback_url = self.callback_url
+        job.save()
+        job.status = JobStatus.JOB_RUNNING
+        job.save()
+        # redirections are not followed, delivery failed
+        self.server.responses = [302]
+        webhook = job.webhooks.get()
+        self.assertFalse(deliver(webhook))
+        self.assertEqual((webhook.response_code, webhook.error), (302, 'HTTP error 302'))
+        self.assertIsNotNone(webhook.next_attempt)
+        self.assertEqual(len(self.server.received), 1)
+        job.delete()
+        # connection made to checked address, whatever host resolves to
+        self.assertEqual(resolve_callback_host('http://8.8.8.8/hook'), '8.8.8.8')
+        self.assertIsNone(resolve_callback_host(self.callback_url))
+        url = 'http://callback.invalid:%s/callback' % self.server.server_port
+        self.assertEqual(post_payload(url, '{}', {'Content-Type': 'application/json'}, address='127.0.0.1'), 200)
+        headers, body = self.server.received[-1]
+        self.assertEqual(headers['Host'], 'callback.invalid:%s' % self.server.server_port)
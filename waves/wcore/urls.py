@@ -3,7 +3,8 @@ from __future__ import unicode_literals
 from django.conf.urls import url
 from django.contrib.auth.decorators import login_required
 
-from waves.wcore.views.jobs import JobInputView, JobOutputView, JobSubmissionView, JobView, JobListView
+from waves.wcore.views.jobs import JobInputView, JobOutputView, JobSubmissionView, JobView, JobListView, \
+    JobArchiveView
 from waves.wcore.views.services import ServiceListView, ServiceDetailView
 
 
@@ -14,5 +15,6 @@ urlpatterns = [
     url(r'^jobs/(?P<unique_id>[\w-]+)/$', JobView.as_view(), name="job_details"),
     url(r'^jobs/inputs/(?P<slug>[\w-]+)/$', JobInputView.as_view(), name="job_input"),
     url(r'^jobs/outputs/(?P<slug>[\w-]+)/$', JobOutputView.as_view(), name="job_output"),
+    url(r'^jobs/(?P<unique_id>[\w-]+)/archive$', JobArchiveView.as_view(), name="job_archive"),
     url(r'^jobs/', login_required(JobListView.as_view()), name="job_list"),
 ]
@@ -0,0 +1,60 @@
+""" WAVES services access map: visible services and available submissions per user profile, stored in Django cache
+and invalidated by version bump upon services / submissions changes """
+from __future__ import unicode_literals
+
+import logging
+from collections import namedtuple
+
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.cache import waves_cache, cache_version, bump_version
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'waves:access:version'
+
+#: Access map for a user profile, sets of ids:
+#: - services: listed services (see :func:`waves.wcore.models.services.ServiceManager.get_services`)
+#: - available: services open for submission (see :func:`waves.wcore.models.services.BaseService.available_for_user`)
+#: - submissions: submissions open for submission
+AccessMap = namedtuple('AccessMap', ['services', 'available', 'submissions'])
+
+
+def invalidate_access(**kwargs):
+    """ Invalidate all cached access maps (signature allows usage as a signal receiver) """
+    bump_version(VERSION_KEY)
+
+
+def user_profile(user):
+    """ Cache key part for user: all anonymous users share the same map, as all superusers do """
+    if user is None or user.is_anonymous():
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return '%s:%s' % ('staff' if user.is_staff else 'user', user.pk)
+
+
+def compute_access(user):
+    """ Compute access map for user from database """
+    from waves.wcore.models import get_service_model, get_submission_model
+    service_model = get_service_model()
+    services = frozenset(service_model.objects.visible_services(user).values_list('pk', flat=True))
+    available = frozenset(service_model.objects.available_services(user).values_list('pk', flat=True))
+    submissions = frozenset(get_submission_model().objects.filter(service__in=available).values_list('pk', flat=True))
+    return AccessMap(services, available, submissions)
+
+
+def get_access(user):
+    """ Access map for user, from cache when available
+
+    :rtype: :class:`AccessMap`
+    """
+    cache = waves_cache()
+    key = 'waves:access:%s:%s' % (cache_version(VERSION_KEY), user_profile(user))
+    access = cache.get(key)
+    if access is None:
+        access = compute_access(user)
+        cache.set(key, tuple(access), waves_settings.SERVICES_CACHE_TIMEOUT)
+        logger.debug('Access map computed for %s', key)
+    else:
+        access = AccessMap(*access)
+    return access
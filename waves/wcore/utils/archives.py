@@ -0,0 +1,265 @@
+""" WAVES jobs files archives, built on the fly while streamed with constant memory: zip (stored or deflated) and
+tar.gz. Stored zip layout only depends on archived files names and sizes, so that its size is known before any file
+is read and byte ranges can be served (i.e. to resume an interrupted download). """
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import struct
+import tarfile
+import time
+import zlib
+from collections import namedtuple
+
+#: Size of chunks read from archived files
+CHUNK_SIZE = 64 * 1024
+#: Sizes / offsets above this need zip64 extensions
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+#: Data descriptor (sizes and crc after data) and UTF-8 names flags
+ZIP_FLAGS = 0x08 | 0x800
+
+ArchiveEntry = namedtuple('ArchiveEntry', ['name', 'path', 'size', 'mtime'])
+
+
+def archive_entry(name, path):
+    """ Entry for file at path, archived as name, size and modification time are read once here """
+    stat = os.stat(path)
+    return ArchiveEntry(name, path, stat.st_size, int(stat.st_mtime))
+
+
+def jobs_outputs_entries(jobs, api_names=None, job_dirs=False):
+    """ Archive entries for jobs available outputs (existing, not empty, files)
+
+    :param jobs: list of jobs
+    :param api_names: outputs api names to archive (default to all)
+    :param job_dirs: archive each job outputs in a directory named after job slug
+    :return: list of :class:`ArchiveEntry`
+    """
+    entries = []
+    names = set()
+    for job in jobs:
+        for job_output in job.outputs.all():
+            if api_names and job_output.get_api_name() not in api_names:
+                continue
+            name = os.path.join(str(job.slug), job_output.file_name) if job_dirs else job_output.file_name
+            if name in names or not os.path.isfile(job_output.file_path):
+                continue
+            entry = archive_entry(name, job_output.file_path)
+            if entry.size:
+                names.add(name)
+                entries.append(entry)
+    return entries
+
+
+def read_file(path, size):
+    """ Read exactly size bytes from file by chunks, so that archive layout is kept even if file grows meanwhile
+
+    :raise: IOError if file is shorter than expected
+    """
+    remaining = size
+    with open(path, 'rb') as archived:
+        while remaining > 0:
+            chunk = archived.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError('File %s truncated while archived' % path)
+            remaining -= len(chunk)
+            yield chunk
+
+
+def byte_range(chunks, start, end):
+    """ Part of a chunks stream, from start to end (included) """
+    position = 0
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > start:
+            part = chunk[max(start - position, 0):end + 1 - position]
+            if part:
+                yield part
+        position = chunk_end
+        if position > end:
+            break
+
+
+def dos_datetime(timestamp):
+    """ Zip (MS-DOS) date and time for timestamp """
+    local = time.localtime(timestamp)
+    if local.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return ((local.tm_hour << 11) | (local.tm_min << 5) | (local.tm_sec // 2),
+            ((local.tm_year - 1980) << 9) | (local.tm_mon << 5) | local.tm_mday)
+
+
+class Archive(object):
+    """ Archive of entries, iterate to get its content """
+    content_type = 'application/octet-stream'
+    extension = ''
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    @property
+    def size(self):
+        """ Archive size in bytes if known in advance, None otherwise """
+        return None
+
+    @property
+    def last_modified(self):
+        """ Latest archived file modification timestamp """
+        return max([entry.mtime for entry in self.entries] or [0])
+
+    @property
+    def etag(self):
+        """ Archive entity tag, changes whenever an archived file is added, removed or modified """
+        digest = hashlib.md5(self.__class__.__name__.encode('utf-8'))
+        for entry in self.entries:
+            digest.update(('%s:%s:%s\n' % (entry.name, entry.size, entry.mtime)).encode('utf-8'))
+        return '"%s"' % digest.hexdigest()
+
+    def __iter__(self):
+        raise NotImplementedError()
+
+
+class ZipArchive(Archive):
+    """ Zip archive, entries are stored or deflated (size not known in advance) """
+    content_type = 'application/zip'
+    extension = 'zip'
+
+    def __init__(self, entries, compress=False):
+        super(ZipArchive, self).__init__(entries)
+        self.compress = compress
+
+    @property
+    def etag(self):
+        return super(ZipArchive, self).etag[:-1] + ('-deflated"' if self.compress else '"')
+
+    def _zip64(self, entry):
+        # deflated data may be slightly larger than original
+        return entry.size >= (ZIP64_LIMIT - ZIP64_LIMIT // 100 if self.compress else ZIP64_LIMIT)
+
+    def _local_header(self, name, entry, zip64):
+        extra = struct.pack('<HHQQ', 1, 16, 0, 0) if zip64 else b''
+        dostime, dosdate = dos_datetime(entry.mtime)
+        return struct.pack('<IHHHHHIIIHH', 0x04034b50, 45 if zip64 else 20, ZIP_FLAGS,
+                           ZIP_DEFLATED if self.compress else ZIP_STORED, dostime, dosdate, 0,
+                           ZIP64_LIMIT if zip64 else 0, ZIP64_LIMIT if zip64 else 0, len(name), len(extra)) \
+            + name + extra
+
+    @staticmethod
+    def _data_descriptor(crc, compressed_size, size, zip64):
+        if zip64:
+            return struct.pack('<IIQQ', 0x08074b50, crc, compressed_size, size)
+        return struct.pack('<IIII', 0x08074b50, crc, compressed_size, size)
+
+    def _central_directory(self, records, offset):
+        """ Central directory and end records, records are (name, entry, zip64, crc, compressed size, offset) """
+        directory = []
+        for name, entry, zip64, crc, compressed_size, header_offset in records:
+            zip64 = zip64 or header_offset >= ZIP64_LIMIT
+            extra = struct.pack('<HHQQQ', 1, 24, entry.size, compressed_size, header_offset) if zip64 else b''
+            dostime, dosdate = dos_datetime(entry.mtime)
+            directory.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | 45, 45 if zip64 else 20, ZIP_FLAGS,
+                ZIP_DEFLATED if self.compress else ZIP_STORED, dostime, dosdate, crc,
+                ZIP64_LIMIT if zip64 else compressed_size, ZIP64_LIMIT if zip64 else entry.size, len(name),
+                len(extra), 0, 0, 0, (0o100644 & 0xFFFF) << 16, ZIP64_LIMIT if zip64 else header_offset) + name + extra)
+        directory = b''.join(directory)
+        count = len(records)
+        end = b''
+        if count >= 0xFFFF or offset >= ZIP64_LIMIT or len(directory) >= ZIP64_LIMIT:
+            end = struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count, len(directory), offset) \
+                + struct.pack('<IIQI', 0x07064b50, 0, offset + len(directory), 1)
+            count, offset = min(count, 0xFFFF), ZIP64_LIMIT
+        end += struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count, min(len(directory), ZIP64_LIMIT), offset, 0)
+        return directory + end
+
+    @property
+    def size(self):
+        if self.compress:
+            return None
+        offset = 0
+        records = []
+        for entry in self.entries:
+            name = entry.name.encode('utf-8')
+            zip64 = self._zip64(entry)
+            records.append((name, entry, zip64, 0, entry.size, offset))
+            offset += len(self._local_header(name, entry, zip64)) + entry.size + len(
+                self._data_descriptor(0, entry.size, entry.size, zip64))
+        return offset + len(self._central_directory(records, offset))
+
+    def __iter__(self):
+        offset = 0
+        records = []
+        for entry in self.entries:
+            name = entry.name.encode('utf-8')
+            zip64 = self._zip64(entry)
+            header = self._local_header(name, entry, zip64)
+            yield header
+            crc = 0
+            compressed_size = 0
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS) if self.compress else None
+            for chunk in read_file(entry.path, entry.size):
+                crc = zlib.crc32(chunk, crc)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    compressed_size += len(chunk)
+                    yield chunk
+            if compressor is not None:
+                chunk = compressor.flush()
+                compressed_size += len(chunk)
+                yield chunk
+            crc &= 0xFFFFFFFF
+            descriptor = self._data_descriptor(crc, compressed_size, entry.size, zip64)
+            yield descriptor
+            records.append((name, entry, zip64, crc, compressed_size, offset))
+            offset += len(header) + compressed_size + len(descriptor)
+        yield self._central_directory(records, offset)
+
+
+class TarGzArchive(Archive):
+    """ Gzip compressed tar archive (pax format, no size limit) """
+    content_type = 'application/gzip'
+    extension = 'tar.gz'
+
+    def _blocks(self):
+        for entry in self.entries:
+            info = tarfile.TarInfo(entry.name)
+            info.size = entry.size
+            info.mtime = entry.mtime
+            info.mode = 0o644
+            yield info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'strict')
+            for chunk in read_file(entry.path, entry.size):
+                yield chunk
+            if entry.size % tarfile.BLOCKSIZE:
+                yield tarfile.NUL * (tarfile.BLOCKSIZE - entry.size % tarfile.BLOCKSIZE)
+        yield tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+
+    def __iter__(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for block in self._blocks():
+            chunk = compressor.compress(block)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+
+#: Available archive types
+ARCHIVE_TYPES = ('zip', 'tar.gz')
+
+
+def build_archive(entries, archive_type='zip', compress=False):
+    """ Archive of entries
+
+    :param entries: list of :class:`ArchiveEntry`
+    :param archive_type: one of ARCHIVE_TYPES
+    :param compress: deflate zip archive entries (archive size is then not known in advance)
+    :rtype: :class:`Archive`
+    :raise: ValueError for unknown archive type
+    """
+    if archive_type == 'zip':
+        return ZipArchive(entries, compress)
+    elif archive_type == 'tar.gz':
+        return TarGzArchive(entries)
+    raise ValueError('Unknown archive type %s, expected one of %s' % (archive_type, ', '.join(ARCHIVE_TYPES)))
@@ -0,0 +1,30 @@
+""" WAVES cache helpers: versioned keys in Django cache (SERVICES_CACHE alias) """
+from __future__ import unicode_literals
+
+from django.core.cache import caches
+
+from waves.wcore.settings import waves_settings
+
+
+def waves_cache():
+    """ Django cache used by WAVES """
+    return caches[waves_settings.SERVICES_CACHE]
+
+
+def cache_version(key):
+    """ Current version stored under key, created if missing """
+    cache = waves_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(key):
+    """ Increment version stored under key: all values cached with previous version are ignored """
+    cache = waves_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
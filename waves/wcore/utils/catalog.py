@@ -0,0 +1,118 @@
+""" WAVES services catalog: services descriptions (with their submissions inputs and outputs) precomputed once per
+visibility class (public, registered, staff), stored in Django cache as ready to send JSON documents and regenerated
+after any change in services, submissions, inputs or outputs (version bump). Services only visible to some users
+(restricted access, own drafts) are cached one by one and merged into their class document. """
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import logging
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.text import compress_string
+
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.access import VERSION_KEY as ACCESS_VERSION_KEY, get_access
+from waves.wcore.utils.cache import waves_cache, cache_version, bump_version
+from waves.wcore.utils.schema import VERSION_KEY as SCHEMA_VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'waves:catalog:version'
+
+PUBLIC = 'public'
+REGISTERED = 'registered'
+STAFF = 'staff'
+
+#: A catalog document: JSON content, its gzip compressed version (None if not computed yet), entity tag and entries
+#: it is made of, as (service name, service id, JSON text) tuples ordered by name
+CatalogDocument = namedtuple('CatalogDocument', ['content', 'gzipped', 'etag', 'entries'])
+
+
+def invalidate_catalog(**kwargs):
+    """ Invalidate all cached catalogs (signature allows usage as a signal receiver)
+
+    .. note::
+        Catalogs are also invalidated along with services access maps and submissions schemas
+    """
+    bump_version(VERSION_KEY)
+
+
+def visibility_class(user):
+    """ Catalog shared by user: anonymous users get the public one, superusers share the staff one """
+    if user is None or user.is_anonymous():
+        return PUBLIC
+    if user.is_staff or user.is_superuser:
+        return STAFF
+    return REGISTERED
+
+
+def class_services(visibility):
+    """ Services listed for every user in visibility class (see
+    :func:`waves.wcore.models.services.ServiceManager.visible_services`)
+
+    :rtype: QuerySet
+    """
+    from waves.wcore.models import get_service_model
+    service_model = get_service_model()
+    statuses = {PUBLIC: (service_model.SRV_PUBLIC,),
+                REGISTERED: (service_model.SRV_PUBLIC, service_model.SRV_REGISTERED),
+                STAFF: (service_model.SRV_PUBLIC, service_model.SRV_REGISTERED, service_model.SRV_RESTRICTED,
+                        service_model.SRV_TEST)}[visibility]
+    return service_model.objects.filter(status__in=statuses)
+
+
+def catalog_entries(services, serialize):
+    """ Catalog entries for services, see :class:`CatalogDocument` """
+    return [(service.name, service.pk, json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')))
+            for service, data in zip(services, serialize(services))]
+
+
+def make_document(entries, compress=True):
+    """ Catalog document (JSON list) made of entries
+
+    :param compress: compute gzip compressed content at once
+    :rtype: :class:`CatalogDocument`
+    """
+    entries = tuple(sorted(entries))
+    content = ('[%s]' % ','.join(entry[2] for entry in entries)).encode('utf-8')
+    return CatalogDocument(content, compress_string(content) if compress else None,
+                           'W/"%s"' % hashlib.md5(content).hexdigest(), entries)
+
+
+def get_catalog(user, serialize, key_parts=()):
+    """ Catalog document for user: its visibility class document, from cache when available, merged with entries
+    for services only visible to this user
+
+    :param user: current user
+    :param serialize: callable returning JSON serializable representations for a list of services
+    :param key_parts: values identifying representations (i.e. base url)
+    :rtype: :class:`CatalogDocument`
+    """
+    cache = waves_cache()
+    prefix = 'waves:catalog:%s:%s:%s:%s' % (cache_version(VERSION_KEY), cache_version(SCHEMA_VERSION_KEY),
+                                            cache_version(ACCESS_VERSION_KEY),
+                                            hashlib.md5(repr(key_parts).encode('utf-8')).hexdigest())
+    key = '%s:%s' % (prefix, visibility_class(user))
+    document = cache.get(key)
+    if document is None:
+        services = list(class_services(visibility_class(user)))
+        document = make_document(catalog_entries(services, serialize))
+        cache.set(key, tuple(document), waves_settings.SERVICES_CACHE_TIMEOUT)
+        logger.debug('Catalog computed for %s (%d services)', key, len(services))
+    else:
+        document = CatalogDocument(*document)
+    extra = get_access(user).services - set(entry[1] for entry in document.entries)
+    if not extra:
+        return document
+    keys = {'%s:service:%s' % (prefix, pk): pk for pk in extra}
+    cached = cache.get_many(keys.keys())
+    missing = [pk for service_key, pk in keys.items() if service_key not in cached]
+    if missing:
+        from waves.wcore.models import get_service_model
+        entries = catalog_entries(list(get_service_model().objects.filter(pk__in=missing)), serialize)
+        cache.set_many({'%s:service:%s' % (prefix, entry[1]): entry for entry in entries},
+                       waves_settings.SERVICES_CACHE_TIMEOUT)
+        cached.update({'%s:service:%s' % (prefix, entry[1]): entry for entry in entries})
+    return make_document(document.entries + tuple(tuple(entry) for entry in cached.values()), compress=False)
@@ -0,0 +1,105 @@
+""" WAVES jobs status events: status transitions are read from public jobs history (ids are events cursor), waiting
+clients are woken up by an in-process broker upon status changes made in the same process, and poll database
+otherwise (i.e. changes made by daemon process).
+
+History ids are allocated upon insert, not upon commit: a lower id may be committed after a higher one has been read.
+Events are therefore only sent once API_JOBS_STATUS_DELAY seconds old, as jobs bulk status does. """
+from __future__ import unicode_literals
+
+import datetime
+import threading
+import time
+
+#: Max delay between two database checks while waiting for events (seconds)
+POLL_INTERVAL = 1
+#: Max events returned at once
+MAX_EVENTS = 500
+
+
+class JobEventsBroker(object):
+    """ In-process notification of jobs status changes, waiters are released as soon as a change is committed """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._sequence = 0
+
+    @property
+    def sequence(self):
+        """ Changes counter, to be passed to :func:`wait` """
+        return self._sequence
+
+    def notify(self):
+        """ Signal a change to all waiters """
+        with self._condition:
+            self._sequence += 1
+            self._condition.notify_all()
+
+    def wait(self, sequence, timeout):
+        """ Wait at most timeout seconds for a change after sequence
+
+        :return: current sequence
+        """
+        with self._condition:
+            if self._sequence == sequence:
+                self._condition.wait(timeout)
+            return self._sequence
+
+
+broker = JobEventsBroker()
+
+
+def settled_before():
+    """ History rows inserted before returned time are expected to be committed (see API_JOBS_STATUS_DELAY) """
+    from django.utils import timezone
+    from waves.wcore.settings import waves_settings
+    return timezone.now() - datetime.timedelta(seconds=waves_settings.API_JOBS_STATUS_DELAY)
+
+
+def latest_event_id():
+    """ Current events cursor: last settled history id """
+    from waves.wcore.models.history import JobHistory
+    return JobHistory.objects.filter(timestamp__lte=settled_before()).order_by('-id').values_list(
+        'id', flat=True).first() or 0
+
+
+def job_events(user, last_id, limit=MAX_EVENTS):
+    """
+    Public status events for user jobs after last_id
+
+    :param user: current user
+    :param last_id: last event id already received
+    :param limit: max number of events returned
+    :return: list of dict (id, slug, status, label, message, timestamp), ordered by id, up to first event not yet
+        settled (see :func:`settled_before`)
+    """
+    from waves.wcore.adaptors.const import JobStatus
+    from waves.wcore.models import Job
+    from waves.wcore.models.history import JobHistory
+    labels = dict(JobStatus.STATUS_LIST)
+    settled = settled_before()
+    events = []
+    for event_id, slug, event_status, message, timestamp in JobHistory.objects.filter(
+            id__gt=last_id, is_admin=False, job__in=Job.objects.get_user_job(user)).order_by('id').values_list(
+            'id', 'job__slug', 'status', 'message', 'timestamp')[:limit]:
+        if timestamp > settled:
+            # following events are sent with this one, once rows committed in between are visible
+            break
+        events.append(dict(id=event_id, slug=str(slug), status=event_status, label=labels.get(event_status),
+                           message=message, timestamp=timestamp))
+    return events
+
+
+def wait_job_events(user, last_id, timeout):
+    """
+    Wait at most timeout seconds for user jobs events after last_id
+
+    :return: list of events, empty if none occurred before timeout (see :func:`job_events`)
+    """
+    deadline = time.time() + timeout
+    while True:
+        sequence = broker.sequence
+        events = job_events(user, last_id)
+        remaining = deadline - time.time()
+        if events or remaining <= 0:
+            return events
+        broker.wait(sequence, min(POLL_INTERVAL, remaining))
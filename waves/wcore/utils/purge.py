@@ -0,0 +1,186 @@
+""" WAVES jobs purge engine: expired jobs are deleted in chunks, working dirs are removed in background """
+from __future__ import unicode_literals
+
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils.six.moves.queue import Queue
+
+from waves.wcore.settings import waves_settings
+
+logger = logging.getLogger(__name__)
+
+_removal = threading.local()
+
+
+class DirectoryRemover(object):
+    """ Remove directories in background threads, keep count of removed directories """
+
+    def __init__(self, workers=None):
+        self.submitted = 0
+        self.removed = 0
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, name='waves-remover-%d' % i)
+                         for i in range(workers or waves_settings.PURGE_WORKERS)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def remove(self, path):
+        """ Add directory to removal queue """
+        self.submitted += 1
+        self._queue.put(path)
+
+    def _work(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            with self._lock:
+                self.removed += 1
+
+    @property
+    def pending(self):
+        return self.submitted - self.removed
+
+    def close(self, timeout=None):
+        """ Wait for queued removals, at most timeout seconds (directories not yet removed are left on disk)
+
+        :return: number of removed directories
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.time() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.time(), 0))
+        return self.removed
+
+
+def current_remover():
+    """ Directory remover in use for current thread, if any """
+    return getattr(_removal, 'remover', None)
+
+
+@contextmanager
+def deferred_dirs_removal(remover):
+    """ Jobs deleted within this context have their working dirs removed by remover """
+    _removal.remover = remover
+    try:
+        yield remover
+    finally:
+        _removal.remover = None
+
+
+def _delete_jobs(ids):
+    """ Delete jobs in one transaction """
+    from waves.wcore.models import Job
+    with transaction.atomic():
+        Job.objects.filter(pk__in=ids).delete()
+
+
+def purge_expired_jobs(chunk_size=None, time_budget=None, workers=None, progress=None):
+    """
+    Delete expired jobs (see :func:`waves.wcore.models.jobs.JobManager.get_expired_jobs`) by chunks, each chunk
+    deleted in one transaction, jobs working dirs are removed by parallel background workers.
+
+    :param chunk_size: number of jobs deleted at once, default to PURGE_CHUNK_SIZE setting
+    :param time_budget: max duration in seconds for this run, default to PURGE_TIME_BUDGET setting (None: no limit)
+    :param workers: number of directory removal threads, default to PURGE_WORKERS setting
+    :param progress: callable called after each chunk with (deleted jobs, removed dirs, pending dirs)
+    :return: a tuple (deleted jobs, removed dirs)
+    """
+    from waves.wcore.models import Job
+    chunk_size = chunk_size or waves_settings.PURGE_CHUNK_SIZE
+    time_budget = time_budget if time_budget is not None else waves_settings.PURGE_TIME_BUDGET
+    deadline = time.time() + time_budget if time_budget is not None else None
+    deleted = 0
+    remover = DirectoryRemover(workers)
+    try:
+        with deferred_dirs_removal(remover):
+            while deadline is None or time.time() < deadline:
+                chunk = list(Job.objects.get_expired_jobs().values_list('pk', flat=True)[:chunk_size])
+                if not chunk:
+                    break
+                _delete_jobs(chunk)
+                deleted += len(chunk)
+                logger.info('Purge progress: %d jobs deleted, %d directories removed (%d pending)', deleted,
+                            remover.removed, remover.pending)
+                if progress is not None:
+                    progress(deleted, remover.removed, remover.pending)
+            else:
+                logger.warning('Purge time budget exhausted, remaining expired jobs will be deleted on next run')
+    finally:
+        remover.close(timeout=max(deadline - time.time(), 0) if deadline is not None else None)
+    if remover.pending:
+        logger.warning('%d jobs directories not removed within time budget', remover.pending)
+    return deleted, remover.removed
+
+
+#: Eviction policies, order in which finished jobs are evicted
+EVICTION_ORDER = {
+    'oldest': ('created',),
+    'largest': ('-disk_usage', 'created'),
+    'lru': (Coalesce('last_access', 'updated').asc(), 'created'),
+}
+
+
+def evict_jobs(policy=None, high_watermark=None, low_watermark=None, chunk_size=None, workers=None):
+    """
+    When jobs file system usage passes DISK_HIGH_WATERMARK, delete finished jobs according to eviction policy
+    ('oldest', 'largest' or 'lru'), until estimated usage falls under DISK_LOW_WATERMARK.
+
+    :param policy: eviction policy, default to EVICTION_POLICY setting
+    :param high_watermark: file system usage ratio triggering eviction, default to DISK_HIGH_WATERMARK setting
+    :param low_watermark: file system usage ratio to reach, default to DISK_LOW_WATERMARK setting
+    :param chunk_size: number of jobs deleted at once, default to PURGE_CHUNK_SIZE setting
+    :param workers: number of directory removal threads, default to PURGE_WORKERS setting
+    :return: a tuple (evicted jobs, freed bytes)
+    """
+    from waves.wcore.adaptors.const import JobStatus
+    from waves.wcore.models import Job
+    high_watermark = high_watermark if high_watermark is not None else waves_settings.DISK_HIGH_WATERMARK
+    low_watermark = low_watermark if low_watermark is not None else waves_settings.DISK_LOW_WATERMARK
+    if high_watermark is None:
+        return 0, 0
+    fs_stat = os.statvfs(waves_settings.JOB_BASE_DIR)
+    total = fs_stat.f_blocks * fs_stat.f_frsize
+    used = total - fs_stat.f_bavail * fs_stat.f_frsize
+    if used < high_watermark * total:
+        return 0, 0
+    to_free = used - low_watermark * total
+    logger.warning('Jobs file system usage over watermark, %d bytes to free', to_free)
+    chunk_size = chunk_size or waves_settings.PURGE_CHUNK_SIZE
+    candidates = Job.objects.filter(_status__in=(JobStatus.JOB_TERMINATED, JobStatus.JOB_WARNING,
+                                                 JobStatus.JOB_CANCELLED, JobStatus.JOB_ERROR)).order_by(
+        *EVICTION_ORDER[policy or waves_settings.EVICTION_POLICY]).values_list('pk', 'disk_usage')
+    evicted = freed = 0
+    chunk = []
+    remover = DirectoryRemover(workers)
+    try:
+        with deferred_dirs_removal(remover):
+            for job_id, disk_usage in candidates.iterator():
+                chunk.append(job_id)
+                freed += disk_usage
+                if len(chunk) >= chunk_size or freed >= to_free:
+                    _delete_jobs(chunk)
+                    evicted += len(chunk)
+                    chunk = []
+                    logger.info('Eviction progress: %d jobs evicted, %d bytes freed', evicted, freed)
+                if freed >= to_free:
+                    break
+            if chunk:
+                _delete_jobs(chunk)
+                evicted += len(chunk)
+    finally:
+        remover.close()
+    if freed < to_free:
+        logger.error('Unable to free enough disk space, only %d bytes freed', freed)
+    return evicted, freed
@@ -0,0 +1,113 @@
+""" WAVES compiled submission schemas: all submission inputs loaded once with their dependency tree and samples,
+cached and invalidated upon any submission / inputs change """
+from __future__ import unicode_literals
+
+import logging
+
+from waves.wcore.settings import waves_settings
+from waves.wcore.utils.cache import waves_cache, cache_version, bump_version
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'waves:schema:version'
+
+
+def _set_prefetched(instance, related_name, objects):
+    """ Fill instance related manager cache, as prefetch_related does, related.all() / count() do not query DB """
+    queryset = getattr(instance, related_name).get_queryset()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[related_name] = queryset
+
+
+class SubmissionSchema(object):
+    """
+    Compiled submission inputs: inputs are loaded with their concrete type, each input parent, dependents inputs
+    and file samples are pre-loaded, so that forms, serializers and jobs creation do not issue any query while
+    walking the inputs tree.
+
+    .. note::
+        Schemas are shared through cache, consumers must not modify inputs
+    """
+
+    def __init__(self, submission_id, inputs, samples):
+        from waves.wcore.models.inputs import FileInput
+        self.submission_id = submission_id
+        #: All submission inputs, ordered
+        self.inputs = tuple(sorted(inputs, key=lambda param: (param.order, param.pk)))
+        self._by_pk = {param.pk: param for param in self.inputs}
+        self._dependents = {}
+        for param in self.inputs:
+            if param.parent_id is not None:
+                self._dependents.setdefault(param.parent_id, []).append(param)
+        for param in self.inputs:
+            param.parent = self._by_pk.get(param.parent_id)
+            _set_prefetched(param, 'dependents_inputs', self._dependents.get(param.pk, []))
+            if isinstance(param, FileInput):
+                _set_prefetched(param, 'input_samples', samples.get(param.pk, []))
+
+    @property
+    def expected_inputs(self):
+        """ Top level submitted inputs, as :attr:`waves.wcore.models.services.BaseSubmission.expected_inputs` """
+        return tuple(sorted([param for param in self.inputs if param.parent_id is None and param.required is not None],
+                            key=lambda param: (param.order, not param.required)))
+
+    @property
+    def form_inputs(self):
+        """ Top level submitted inputs, in form display order (required first) """
+        return tuple(sorted(self.expected_inputs, key=lambda param: (not param.required, param.order)))
+
+    @property
+    def mandatory_inputs(self):
+        """ Top level required inputs """
+        return tuple(param for param in self.expected_inputs if param.required is True)
+
+    @property
+    def non_editable_inputs(self):
+        """ Inputs not submitted by user, set with their default value """
+        return tuple(param for param in self.inputs if param.required is None)
+
+    def submitted_inputs(self, api_names):
+        """ Inputs (including dependents) submitted by user among api_names """
+        return tuple(param for param in self.inputs if param.api_name in api_names and param.required is not None)
+
+    def dependents(self, param):
+        """ Dependents inputs submitted by user for param """
+        return tuple(dep for dep in self._dependents.get(param.pk, []) if dep.required is not None)
+
+    def get_input(self, **kwargs):
+        """ First input matching all attributes values, None if not found """
+        return next((param for param in self.inputs if all(getattr(param, attr) == value
+                                                           for attr, value in kwargs.items())), None)
+
+
+def compile_schema(submission_id):
+    """ Load submission inputs and samples from DB: one query per input type, one for samples """
+    from waves.wcore.models.inputs import AParam, FileInputSample
+    inputs = list(AParam.objects.filter(submission_id=submission_id))
+    samples = {}
+    for sample in FileInputSample.objects.filter(file_input__submission_id=submission_id).order_by('pk'):
+        samples.setdefault(sample.file_input_id, []).append(sample)
+    return SubmissionSchema(submission_id, inputs, samples)
+
+
+def get_schema(submission):
+    """ Compiled schema for submission, from cache when available
+
+    :rtype: :class:`SubmissionSchema`
+    """
+    cache = waves_cache()
+    key = 'waves:schema:%s:%s' % (cache_version(VERSION_KEY), submission.pk)
+    schema = cache.get(key)
+    if schema is None:
+        schema = compile_schema(submission.pk)
+        cache.set(key, schema, waves_settings.SERVICES_CACHE_TIMEOUT)
+        logger.debug('Submission schema compiled for %s', key)
+    return schema
+
+
+def invalidate_schemas(**kwargs):
+    """ Invalidate all cached schemas (signature allows usage as a signal receiver) """
+    bump_version(VERSION_KEY)
@@ -1,10 +1,13 @@
 """ WAVES Files storage engine parameters """
 from __future__ import unicode_literals
 
+import hashlib
 import os
+import shutil
 
 from waves.wcore.settings import waves_settings
 from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import python_2_unicode_compatible
 
 
 class WavesStorage(FileSystemStorage):
@@ -25,6 +28,41 @@ class BinaryStorage(FileSystemStorage):
                                             file_permissions_mode=0o775)
 
 
+@python_2_unicode_compatible
+class SharedFile(object):
+    """ Uploaded file stored once and submitted for several jobs, hard linked into each job working dir (copied
+    when link is not possible) """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def store(cls, uploaded_file, directory):
+        """ Save uploaded file in directory (created if needed)
+
+        :rtype: :class:`SharedFile`
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o775)
+        name = os.path.basename(uploaded_file.name)
+        file_path = os.path.join(directory, name)
+        with open(file_path, 'wb+') as stored:
+            for chunk in uploaded_file.chunks():
+                stored.write(chunk)
+        return cls(name, file_path)
+
+    def link_to(self, destination):
+        """ Make file available at destination path """
+        try:
+            os.link(self.path, destination)
+        except OSError:
+            shutil.copyfile(self.path, destination)
+
+
 def file_sample_directory(instance, filename):
     """ Submission file sample directory upload pattern """
     return os.path.join('sample', str(instance.file_input.submission.service.api_name),
@@ -40,19 +78,35 @@ def job_file_directory(instance, filename):
     return 'jobs/{0}/{1}'.format(str(instance.job.slug), filename)
 
 
-def allow_display_online(file_name):
+def allow_display_online(file_name, size=None):
     """
     Determine if current 'input' or 'output' may be displayed online, maximum file size is set to '1Mo'
     :param file_name: file name to test for size
+    :param size: already known file size, file is not checked on disk if set
     :return: bool
     """
     display_file_online = 1024 * 1024 * 1
     try:
-        size = os.path.getsize(file_name)
+        if size is None:
+            size = os.path.getsize(file_name)
         return display_file_online >= size > 0
     except os.error:
         return False
 
 
+def file_checksum(file_name, block_size=64 * 1024):
+    """
+    Compute sha1 checksum for file content, read by blocks
+    :param file_name: file path
+    :param block_size: size of blocks read
+    :return: hexadecimal digest, as produced by 'sha1sum'
+    """
+    checksum = hashlib.sha1()
+    with open(file_name, 'rb') as fp:
+        for block in iter(lambda: fp.read(block_size), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
 waves_storage = WavesStorage()
 binary_storage = BinaryStorage()
@@ -0,0 +1,50 @@
+""" WAVES override templates resolution: first existing template among candidates, resolved once per process """
+from __future__ import unicode_literals
+
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.exceptions import TemplateDoesNotExist
+from django.template.loader import get_template
+
+_resolved = {}
+_lock = threading.Lock()
+
+
+def resolve_template(*candidates):
+    """
+    Return first existing template name among candidates (last one is the default, returned whatever), results are
+    kept in process memory (i.e cleared on restart, upon each deploy), and not kept when DEBUG is on so that
+    templates added while developing are immediately used.
+
+    :param candidates: templates names, by priority order
+    :return: a list with resolved template name, as expected from get_template_names
+    """
+    resolved = _resolved.get(candidates)
+    if resolved is None:
+        resolved = candidates[-1]
+        for template_name in candidates[:-1]:
+            try:
+                get_template(template_name)
+                resolved = template_name
+                break
+            except TemplateDoesNotExist:
+                pass
+        if not settings.DEBUG:
+            with _lock:
+                _resolved[candidates] = resolved
+    return [resolved]
+
+
+def clear_templates_cache():
+    """ Forget resolved templates (i.e when override templates are deployed without restart) """
+    with _lock:
+        _resolved.clear()
+
+
+@receiver(setting_changed)
+def templates_settings_changed(setting, **kwargs):
+    if setting in ('TEMPLATES', 'DEBUG'):
+        clear_templates_cache()
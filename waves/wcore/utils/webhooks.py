@@ -0,0 +1,242 @@
+""" WAVES jobs webhooks delivery: signed JSON POST to job callback url, failed deliveries are retried with
+exponential backoff up to WEBHOOK_MAX_ATTEMPTS """
+from __future__ import unicode_literals
+
+import datetime
+import functools
+import hashlib
+import hmac
+import ipaddress
+import logging
+import socket
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.utils import six, timezone
+from django.utils.encoding import force_bytes
+from six.moves import http_client
+from six.moves.urllib.error import HTTPError, URLError
+from six.moves.urllib.parse import urlparse
+from six.moves.urllib.request import Request, build_opener, HTTPHandler, HTTPSHandler, HTTPRedirectHandler, \
+    ProxyHandler
+
+from waves.wcore.settings import waves_settings
+
+logger = logging.getLogger(__name__)
+
+#: Request header holding payload signature
+SIGNATURE_HEADER = 'X-Waves-Signature'
+
+
+def sign(body, secret=None):
+    """
+    Payload signature: HMAC SHA256 of request body, keyed with WEBHOOK_SECRET (default to SECRET_KEY)
+
+    :return: header value, 'sha256=<hex digest>'
+    """
+    key = secret or waves_settings.WEBHOOK_SECRET or settings.SECRET_KEY
+    return 'sha256=' + hmac.new(force_bytes(key), force_bytes(body), hashlib.sha256).hexdigest()
+
+
+def _ip_literal(host):
+    try:
+        ipaddress.ip_address(six.text_type(host))
+        return True
+    except ValueError:
+        return False
+
+
+def internal_address(address):
+    """ Whether IP address is not a public one: loopback, private, link local, reserved, multicast or unspecified """
+    address = ipaddress.ip_address(six.text_type(address))
+    if getattr(address, 'ipv4_mapped', None) is not None:
+        address = address.ipv4_mapped
+    return address.is_loopback or address.is_private or address.is_link_local or address.is_reserved \
+        or address.is_multicast or address.is_unspecified
+
+
+def check_callback_url(url):
+    """
+    Check url may be used as a job callback: a valid http(s) url with an allowed host (see
+    :func:`check_callback_host`)
+
+    :raise: ValueError if url is not valid or its host is not allowed
+    """
+    try:
+        URLValidator(schemes=['http', 'https'])(url)
+    except ValidationError:
+        raise ValueError('Enter a valid http(s) URL')
+    check_callback_host(url)
+
+
+class CallbackHostError(ValueError):
+    """ Callback url host is not allowed """
+    pass
+
+
+def resolve_callback_host(url):
+    """
+    Resolve url host, checking it is listed in WEBHOOK_ALLOWED_HOSTS or only resolves to public addresses, so that
+    server is not used to post to internal services
+
+    :return: checked address to connect to, None for allowed hosts
+    :raise: CallbackHostError if url host is not allowed, socket.error if it can't be resolved
+    """
+    parsed = urlparse(url)
+    host = parsed.hostname
+    if host in waves_settings.WEBHOOK_ALLOWED_HOSTS:
+        return None
+    addresses = [host] if _ip_literal(host) else [info[4][0] for info in socket.getaddrinfo(
+        host, parsed.port or (443 if parsed.scheme == 'https' else 80), 0, socket.SOCK_STREAM)]
+    if any(internal_address(address.split('%')[0]) for address in addresses):
+        raise CallbackHostError('Callback host %s is not allowed' % host)
+    return addresses[0]
+
+
+def check_callback_host(url):
+    """
+    Check url host is allowed (see :func:`resolve_callback_host`). Hosts which can't be resolved (yet) are accepted,
+    they are checked again upon each delivery.
+
+    :raise: CallbackHostError if url host is not allowed
+    """
+    try:
+        resolve_callback_host(url)
+    except socket.error:
+        pass
+
+
+class PinnedHTTPConnection(http_client.HTTPConnection):
+    """ HTTP connection to an already checked address, whatever url host resolves to at connection time """
+
+    def __init__(self, *args, **kwargs):
+        self.address = kwargs.pop('address')
+        http_client.HTTPConnection.__init__(self, *args, **kwargs)
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class PinnedHTTPSConnection(http_client.HTTPSConnection):
+    """ HTTPS connection to an already checked address, certificate is still verified against url host """
+
+    def __init__(self, *args, **kwargs):
+        self.address = kwargs.pop('address')
+        http_client.HTTPSConnection.__init__(self, *args, **kwargs)
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class PinnedHTTPHandler(HTTPHandler):
+    def __init__(self, address):
+        HTTPHandler.__init__(self)
+        self.address = address
+
+    def http_open(self, req):
+        return self.do_open(functools.partial(PinnedHTTPConnection, address=self.address), req)
+
+
+class PinnedHTTPSHandler(HTTPSHandler):
+    def __init__(self, address):
+        HTTPSHandler.__init__(self)
+        self.address = address
+
+    def https_open(self, req):
+        return self.do_open(functools.partial(PinnedHTTPSConnection, address=self.address), req,
+                            context=self._context)
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    """ Redirections are not followed (target host is not checked), 3xx responses raise an HTTPError """
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def post_payload(url, body, headers, address=None):
+    """ POST body to url, redirections are not followed, environment proxies are not used
+
+    :param address: connect to this address instead of resolving url host (see :func:`resolve_callback_host`)
+    :return: HTTP response code
+    :raise: HTTPError for error and redirection response codes, URLError when url can't be reached
+    """
+    handlers = [ProxyHandler({}), NoRedirectHandler()]
+    if address is not None:
+        handlers.extend([PinnedHTTPHandler(address), PinnedHTTPSHandler(address)])
+    request = Request(url, data=force_bytes(body), headers=headers)
+    response = build_opener(*handlers).open(request, timeout=waves_settings.WEBHOOK_TIMEOUT)
+    try:
+        return response.getcode()
+    finally:
+        response.close()
+
+
+def deliver(webhook):
+    """
+    Attempt webhook delivery, record result and schedule next attempt upon failure
+
+    :param webhook: :class:`waves.wcore.models.webhooks.JobWebhook`
+    :return: True if delivered
+    """
+    headers = {'Content-Type': 'application/json',
+               'User-Agent': 'WAVES/%s' % waves_settings.VERSION,
+               'X-Waves-Event': 'job.status',
+               'X-Waves-Delivery': str(webhook.pk),
+               SIGNATURE_HEADER: sign(webhook.payload)}
+    webhook.attempts += 1
+    try:
+        # connect to checked address, host may resolve to another one between check and connection
+        address = resolve_callback_host(webhook.url)
+        webhook.response_code = post_payload(webhook.url, webhook.payload, headers, address=address)
+        webhook.delivered = timezone.now()
+        webhook.next_attempt = None
+        webhook.error = ''
+    except CallbackHostError as exc:
+        webhook.response_code = None
+        webhook.next_attempt = None
+        webhook.error = 'Delivery refused: %s' % exc
+        logger.warning('Webhook %s for job %s refused: %s', webhook.pk, webhook.job_id, exc)
+        webhook.save(update_fields=['attempts', 'response_code', 'next_attempt', 'error'])
+        return False
+    except HTTPError as exc:
+        webhook.response_code = exc.code
+        webhook.error = 'HTTP error %s' % exc.code
+    except (URLError, IOError, ValueError) as exc:
+        webhook.response_code = None
+        webhook.error = 'Delivery error %s' % exc
+    if webhook.delivered is None:
+        if webhook.attempts >= waves_settings.WEBHOOK_MAX_ATTEMPTS:
+            webhook.next_attempt = None
+            logger.warning('Webhook %s for job %s abandoned after %s attempts: %s', webhook.pk, webhook.job_id,
+                           webhook.attempts, webhook.error)
+        else:
+            webhook.next_attempt = timezone.now() + datetime.timedelta(
+                seconds=waves_settings.WEBHOOK_BACKOFF * 2 ** (webhook.attempts - 1))
+            logger.info('Webhook %s for job %s failed (%s), retry at %s', webhook.pk, webhook.job_id,
+                        webhook.error, webhook.next_attempt)
+    webhook.save(update_fields=['attempts', 'response_code', 'delivered', 'next_attempt', 'error'])
+    return webhook.delivered is not None
+
+
+def deliver_webhooks(limit=100):
+    """
+    Deliver pending webhooks, each one is leased before attempt so that concurrent workers do not deliver twice
+
+    :param limit: max number of deliveries attempted
+    :return: a tuple (delivered, failed)
+    """
+    from waves.wcore.models.webhooks import JobWebhook
+    delivered = failed = 0
+    for webhook in JobWebhook.objects.pending()[:limit]:
+        lease = timezone.now() + datetime.timedelta(seconds=waves_settings.WEBHOOK_TIMEOUT * 2)
+        if not JobWebhook.objects.filter(pk=webhook.pk, next_attempt=webhook.next_attempt).update(next_attempt=lease):
+            # taken by another worker
+            continue
+        if deliver(webhook):
+            delivered += 1
+        else:
+            failed += 1
+    return delivered, failed
@@ -1,14 +1,20 @@
 from __future__ import unicode_literals
 
 import os
+import re
 from wsgiref.util import FileWrapper
 
 import magic
 from django.http import Http404
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from django.utils.encoding import smart_str
+from django.utils.http import http_date, parse_http_date_safe
 from django.views import generic
 from waves.wcore.models.base import ExportAbleMixin
+from waves.wcore.utils.archives import byte_range
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
 
 class DownloadFileView(generic.DetailView):
@@ -91,3 +97,50 @@ class DownloadFileView(generic.DetailView):
     def file_path(self):
         """ Abstract method, must be overridden in child class """
         raise NotImplementedError('file_path function must be defined')
+
+
+def archive_response(request, archive, file_name):
+    """ Stream archive content (see :mod:`waves.wcore.utils.archives`), archives with a size known in advance are
+    sent with Content-Length, ETag / Last-Modified and a single byte range may be requested (resumed downloads).
+
+    :param request: current request
+    :param archive: :class:`waves.wcore.utils.archives.Archive`
+    :param file_name: downloaded file name, without extension
+    :return: StreamingHttpResponse
+    """
+    file_name = '%s.%s' % (file_name, archive.extension)
+    size = archive.size
+    if size is None:
+        response = StreamingHttpResponse(iter(archive), content_type=archive.content_type)
+    else:
+        etag, last_modified = archive.etag, archive.last_modified
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            content, status = iter(archive), 200
+            match = RANGE_RE.match(request.META.get('HTTP_RANGE', ''))
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if match and if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+                # archive changed since first part was downloaded: send it whole
+                match = None
+            if match and any(match.groups()):
+                start, end = match.groups()
+                if start:
+                    start, end = int(start), min(int(end), size - 1) if end else size - 1
+                else:
+                    start, end = max(size - int(end), 0), size - 1
+                if start > end or start >= size:
+                    response = HttpResponse(status=416)
+                    response['Content-Range'] = 'bytes */%d' % size
+                    return response
+                content, status = byte_range(content, start, end), 206
+            response = StreamingHttpResponse(content, content_type=archive.content_type, status=status)
+            if status == 206:
+                response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+                response['Content-Length'] = end - start + 1
+            else:
+                response['Content-Length'] = size
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = 'attachment; filename="%s"' % file_name
+    return response
@@ -3,14 +3,15 @@ from __future__ import unicode_literals
 
 from uuid import UUID
 
-from django.template.exceptions import TemplateDoesNotExist
-from django.template.loader import get_template
+from django.http import Http404
 from django.urls import reverse
 from django.views import generic
 
 from waves.wcore.forms.services import ServiceSubmissionForm
 from waves.wcore.models import JobOutput, JobInput, Job, get_submission_model, get_service_model
-from waves.wcore.views.files import DownloadFileView
+from waves.wcore.utils.archives import build_archive, jobs_outputs_entries
+from waves.wcore.utils.templates import resolve_template
+from waves.wcore.views.files import DownloadFileView, archive_response
 from waves.wcore.views.services import SubmissionFormView, ServiceDetailView
 
 Service = get_service_model()
@@ -38,6 +39,11 @@ class JobFileView(DownloadFileView):
     def return_link(self):
         return self.object.job.get_absolute_url()
 
+    def get_object(self, queryset=None):
+        obj = super(JobFileView, self).get_object(queryset)
+        obj.job.touch()
+        return obj
+
 
 class JobOutputView(JobFileView):
     """ Extended JobFileView for job outputs """
@@ -57,6 +63,23 @@ class JobInputView(JobFileView):
         return ""
 
 
+class JobArchiveView(generic.DetailView):
+    """ Download all job available outputs in one zip archive (add ?type=tar.gz for a tar.gz archive) """
+    model = Job
+    slug_field = 'slug'
+    slug_url_kwarg = "unique_id"
+    http_method_names = ['get', ]
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        job.touch()
+        try:
+            archive = build_archive(jobs_outputs_entries([job]), request.GET.get('type', 'zip'))
+        except ValueError as e:
+            raise Http404(e)
+        return archive_response(request, archive, job.slug)
+
+
 class JobSubmissionView(ServiceDetailView, SubmissionFormView):
     model = Service
     template_name = 'waves/services/service_form.html'
@@ -82,17 +105,10 @@ class JobSubmissionView(ServiceDetailView, SubmissionFormView):
             return Submission.objects.get(slug=UUID(slug))
 
     def get_template_names(self):
-        try:
-            get_template(
-                'waves/override/service_' + self.get_object().api_name + '_' + self.get_object().version + '_form.html')
-            return [
-                'waves/override/service_' + self.get_object().api_name + '_' + self.get_object().version + '_form.html']
-        except TemplateDoesNotExist:
-            try:
-                get_template('waves/override/service_' + self.get_object().api_name + '_form.html')
-                return ['waves/override/service_' + self.get_object().api_name + '_form.html']
-            except TemplateDoesNotExist:
-                return ['waves/services/service_form.html']
+        service = self.get_object()
+        return resolve_template('waves/override/service_' + service.api_name + '_' + service.version + '_form.html',
+                                'waves/override/service_' + service.api_name + '_form.html',
+                                'waves/services/service_form.html')
 
 
 class JobView(generic.DetailView):
@@ -103,6 +119,11 @@ class JobView(generic.DetailView):
     template_name = 'waves/jobs/job_detail.html'
     context_object_name = 'job'
 
+    def get_object(self, queryset=None):
+        obj = super(JobView, self).get_object(queryset)
+        obj.touch()
+        return obj
+
 
 class JobListView(generic.ListView):
     """ Job List view (for user) """
@@ -5,16 +5,16 @@ import logging
 
 from django.contrib import messages
 from django.db import transaction
-from django.template.exceptions import TemplateDoesNotExist
-from django.template.loader import get_template
 from django.urls import reverse
 from django.views import generic
 from django.core.exceptions import PermissionDenied
 
-from waves.wcore.exceptions.jobs import JobException
+from waves.wcore.exceptions.jobs import JobException, JobQuotaExceeded
 from waves.wcore.forms.services import ServiceSubmissionForm
 from waves.wcore.models import Job, get_submission_model, get_service_model
 from waves.wcore.settings import waves_settings
+from waves.wcore.utils.access import get_access
+from waves.wcore.utils.templates import resolve_template
 
 Submission = get_submission_model()
 Service = get_service_model()
@@ -33,26 +33,26 @@ class SubmissionFormView(generic.FormView, generic.DetailView):
     def get_template_names(self):
         if self.template_name is None:
             self.template_name = 'waves/services/' + waves_settings.TEMPLATE_PACK + '/submission_form.html'
-        try:
-            get_template('waves/override/submission_' + self.get_object().api_name + '_form.html')
-            return ['waves/override/submission_' + self.get_object().api_name + '_form.html']
-        except TemplateDoesNotExist:
-            pass
-        return super(SubmissionFormView, self).get_template_names()
+        return resolve_template('waves/override/submission_' + self.get_object().api_name + '_form.html',
+                                self.template_name)
 
     def __init__(self, **kwargs):
         super(SubmissionFormView, self).__init__(**kwargs)
 
     def get_submissions(self):
         submissions = self.get_object().submissions
+        access = get_access(self.request.user)
         available = []
-        for submission in submissions.all():
-            available.append(submission) if submission.available_for_user(self.request.user) else None
+        if waves_settings.ALLOW_JOB_SUBMISSION:
+            available = [submission for submission in submissions.all() if submission.pk in access.submissions]
         if len(available) == 0:
             raise PermissionDenied()
         return available
 
     def get_object(self, queryset=None):
+        if queryset is None and self.object is not None:
+            # already retrieved for this request
+            return self.object
         self.object = super(SubmissionFormView, self).get_object(queryset)
         return self.object
 
@@ -124,6 +124,9 @@ class SubmissionFormView(generic.FormView, generic.DetailView):
                 self.request,
                 "Job successfully submitted %s" % self.job.slug
             )
+        except JobQuotaExceeded as e:
+            messages.error(self.request, e.message)
+            return self.render_to_response(self.get_context_data(form=form))
         except JobException as e:
             logger.exception("JobException %s: %s", self.job.id, e.message)
             messages.error(
@@ -165,6 +168,9 @@ class ServiceDetailView(generic.DetailView):
         return context
 
     def get_object(self, queryset=None):
+        if queryset is None and self.object is not None:
+            # already retrieved (and access checked) for this request
+            return self.object
         obj = super(ServiceDetailView, self).get_object(queryset)
         self.object = obj
         if not obj.available_for_user(self.request.user):
@@ -172,16 +178,7 @@ class ServiceDetailView(generic.DetailView):
         return obj
 
     def get_template_names(self):
-        try:
-            get_template(
-                'waves/override/service_' + self.get_object().api_name + '_' + self.get_object().version +
-                '_details.html')
-            return [
-                'waves/override/service_' + self.get_object().api_name + '_' + self.get_object().version +
-                '_details.html']
-        except TemplateDoesNotExist:
-            try:
-                get_template('waves/override/service_' + self.get_object().api_name + '_details.html')
-                return ['waves/override/service_' + self.get_object().api_name + '_details.html']
-            except TemplateDoesNotExist:
-                return ['waves/services/service_details.html']
+        service = self.get_object()
+        return resolve_template('waves/override/service_' + service.api_name + '_' + service.version + '_details.html',
+                                'waves/override/service_' + service.api_name + '_details.html',
+                                'waves/services/service_details.html')
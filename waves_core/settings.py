@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'waves.wcore.api.middleware.ApiCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -151,13 +152,20 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser',
 
     ],
-    'DEFAULT_RENDERER_CLASSES': (
+    'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
+        'waves.wcore.api.share.CompactJSONRenderer',
         'rest_framework.renderers.CoreJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
 
-    )
+    ]
 }
+try:
+    import msgpack
+
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(2, 'waves.wcore.api.share.MessagePackRenderer')
+except ImportError:
+    pass
 ALLOWED_TEMPLATE_PACKS = ['bootstrap3', 'bootstrap4']
 
 MESSAGE_TAGS = {